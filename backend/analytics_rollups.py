@@ -0,0 +1,144 @@
+"""
+Incrementally maintained analytics rollups.
+
+Instead of $group-ing all of conversation_turns on every dashboard poll, every
+batch the turn writer persists is folded into small rollup documents:
+
+  user_rollups      {_id: user_id, activity_count, last_activity}
+  scenario_rollups  {_id: scenario_id, turn_count, unique_user_count, last_used}
+  scenario_users    {_id: {scenario_id, user_id}, first_seen}   (one marker per pair)
+
+Unique users per scenario are counted exactly: a pair counts once, when its
+marker is first upserted. Increments are not transactional, so a crash between
+steps can drift a counter; `python analytics_rollups.py rebuild` recomputes all
+rollups from conversation_turns (also the backfill for existing data).
+"""
+from collections import defaultdict
+
+from pymongo import UpdateOne
+
+USER_ROLLUPS = "user_rollups"
+SCENARIO_ROLLUPS = "scenario_rollups"
+SCENARIO_USERS = "scenario_users"
+
+
+def apply_turns(db, docs: list[dict]):
+    """Fold newly saved conversation_turns documents into the rollups."""
+    users = defaultdict(lambda: {"count": 0, "last": None})
+    scenarios = defaultdict(lambda: {"count": 0, "last": None})
+    pairs = {}
+    for doc in docs:
+        user_id = doc.get("user_id")
+        scenario_id = doc.get("scenario_id")
+        created_at = doc.get("created_at")
+        for bucket in (users[user_id], scenarios[scenario_id]):
+            bucket["count"] += 1
+            if created_at and (bucket["last"] is None or created_at > bucket["last"]):
+                bucket["last"] = created_at
+        pairs.setdefault((scenario_id, user_id), created_at)
+
+    # Markers first: upserted ones are users new to that scenario
+    new_users = defaultdict(int)
+    pair_list = list(pairs.items())
+    if pair_list:
+        result = db[SCENARIO_USERS].bulk_write([
+            UpdateOne(
+                {"_id": {"scenario_id": scenario_id, "user_id": user_id}},
+                {"$setOnInsert": {"first_seen": first_seen}},
+                upsert=True,
+            )
+            for (scenario_id, user_id), first_seen in pair_list
+        ], ordered=False)
+        for index in result.upserted_ids:
+            new_users[pair_list[index][0][0]] += 1
+
+    def _max(field, value):
+        return {"$max": {field: value}} if value else {}
+
+    if users:
+        db[USER_ROLLUPS].bulk_write([
+            UpdateOne(
+                {"_id": user_id},
+                {"$inc": {"activity_count": b["count"]}, **_max("last_activity", b["last"])},
+                upsert=True,
+            )
+            for user_id, b in users.items()
+        ], ordered=False)
+    if scenarios:
+        db[SCENARIO_ROLLUPS].bulk_write([
+            UpdateOne(
+                {"_id": scenario_id},
+                {
+                    "$inc": {"turn_count": b["count"], "unique_user_count": new_users.get(scenario_id, 0)},
+                    **_max("last_used", b["last"]),
+                },
+                upsert=True,
+            )
+            for scenario_id, b in scenarios.items()
+        ], ordered=False)
+
+
+def rebuild_rollups(db):
+    """Recompute every rollup collection from conversation_turns ($out replaces each atomically)."""
+    turns = db.conversation_turns
+    turns.aggregate([
+        {"$group": {
+            "_id": "$user_id",
+            "activity_count": {"$sum": 1},
+            "last_activity": {"$max": "$created_at"}
+        }},
+        {"$out": USER_ROLLUPS},
+    ], allowDiskUse=True)
+    turns.aggregate([
+        {"$group": {
+            "_id": {"scenario_id": "$scenario_id", "user_id": "$user_id"},
+            "first_seen": {"$min": "$created_at"}
+        }},
+        {"$out": SCENARIO_USERS},
+    ], allowDiskUse=True)
+    # Per (scenario, user) first, so unique users fall out of the second $group exactly
+    turns.aggregate([
+        {"$group": {
+            "_id": {"scenario_id": "$scenario_id", "user_id": "$user_id"},
+            "turns": {"$sum": 1},
+            "last": {"$max": "$created_at"}
+        }},
+        {"$group": {
+            "_id": "$_id.scenario_id",
+            "turn_count": {"$sum": "$turns"},
+            "unique_user_count": {"$sum": 1},
+            "last_used": {"$max": "$last"}
+        }},
+        {"$out": SCENARIO_ROLLUPS},
+    ], allowDiskUse=True)
+    return {
+        "users": db[USER_ROLLUPS].estimated_document_count(),
+        "scenarios": db[SCENARIO_ROLLUPS].estimated_document_count(),
+        "scenario_users": db[SCENARIO_USERS].estimated_document_count(),
+    }
+
+
+def user_rollups(db) -> list[dict]:
+    return list(db[USER_ROLLUPS].find().sort("activity_count", -1))
+
+
+def scenario_rollups(db) -> list[dict]:
+    return list(db[SCENARIO_ROLLUPS].find().sort("turn_count", -1))
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    parser = argparse.ArgumentParser(description="Maintain BeSpoken analytics rollups.")
+    parser.add_argument("command", choices=["rebuild"], help="rebuild: recompute all rollups from conversation_turns")
+    args = parser.parse_args()
+
+    load_dotenv(os.path.join(os.path.dirname(__file__), ".env"), override=True)
+    client = MongoClient(os.getenv("MONGODB_URI"), serverSelectionTimeoutMS=30000, tls=True)
+    database = client[os.getenv("DB_NAME", "Cluster0")]
+    print("🔁 Rebuilding analytics rollups from conversation_turns...")
+    print(f"✅ Rollups rebuilt: {rebuild_rollups(database)}")
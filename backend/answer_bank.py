@@ -0,0 +1,121 @@
+"""
+Per-turn answer bank: precomputed feedback for turns that need no LLM grading.
+
+Scenario turns can declare, next to their transcript:
+
+    "no_grade": true,                       any reply is fine ("Let's head in!")
+    "no_grade_tip": "...",                  optional tip shown instead of a grade
+    "expected_answers": [                   textbook replies, matched after normalization
+        "what's up",
+        [["hey", "hi"], ["", "eddie"]]      a sequence of slots; every combination is accepted,
+    ],                                      "" makes a slot optional
+    "answer_tip": "..."                     optional tip for a matched answer
+
+The answers are normalized like the feedback cache keys (case, punctuation and
+whitespace folded) and compiled once per catalog load into a frozenset, so matching
+a transcript is a single set lookup.
+
+A textbook answer is known to be on topic and safe, so it gets green feedback. A
+no-grade reply was never looked at: its feedback has grade "none" and safety
+"unchecked", keeps postprocess_feedback's neutral defaults for the other fields and
+is marked answer_bank: "no_grade" (filter on that, not on the defaults). Only short
+replies take this path - longer ones still go to the model, which checks safety.
+"""
+import threading
+from itertools import product
+
+from feedback_cache import normalize_transcript
+from feedback_engine import postprocess_feedback
+
+MAX_EXPANSIONS = 5000
+NO_GRADE_MAX_WORDS = 8  # longer replies on a no-grade turn are still graded (and safety-checked)
+DEFAULT_ANSWER_TIP = "Perfect - that's exactly how a native speaker would say it!"
+DEFAULT_NO_GRADE_TIP = "Nothing to grade here - just enjoy the moment and keep going!"
+
+_stats_lock = threading.Lock()
+_stats = {"lookups": 0, "expected": 0, "no_grade": 0}
+
+
+def validate_answers(spec, fail):
+    """Check an expected_answers value from a scenario file; fail(msg) raises."""
+    if not isinstance(spec, list):
+        fail("'expected_answers' must be a list")
+    for entry in spec:
+        if isinstance(entry, str):
+            continue
+        if not isinstance(entry, list) or not entry or not all(
+            isinstance(slot, list) and slot and all(isinstance(alt, str) for alt in slot) for slot in entry
+        ):
+            fail("each expected answer must be a string or a list of slots (non-empty lists of strings)")
+    if len(compile_answers(spec)) > MAX_EXPANSIONS:
+        fail(f"'expected_answers' expands to more than {MAX_EXPANSIONS} phrases")
+
+
+def compile_answers(spec) -> frozenset:
+    """Expand and normalize expected answers into the set of accepted transcripts."""
+    accepted = set()
+    for entry in spec or []:
+        if isinstance(entry, str):
+            phrases = [entry]
+        else:
+            phrases = (" ".join(parts) for parts in product(*entry))
+        for phrase in phrases:
+            normalized = normalize_transcript(phrase)
+            if normalized:
+                accepted.add(normalized)
+    return frozenset(accepted)
+
+
+def _all_green(transcript: str) -> list[dict]:
+    return [{"token": word, "color": "green"} for word in (transcript or "").split()]
+
+
+def match(record, transcript: str, catalog_version: str | None = None) -> dict | None:
+    """
+    Precomputed feedback for transcript on this turn (a scenarios.TurnRecord), or None when it
+    needs real grading. Empty transcripts are never matched, and on a no-grade turn only
+    replies of up to NO_GRADE_MAX_WORDS words are. The feedback's prompt_version is
+    "answer_bank@<catalog_version>", so evals and caches can tell these rows apart.
+    """
+    normalized = normalize_transcript(transcript)
+    if record is None or not normalized:
+        return None
+    if normalized in record.expected_answers:
+        kind, tip = "expected", record.answer_tip or DEFAULT_ANSWER_TIP
+    elif record.no_grade and len(normalized.split()) <= NO_GRADE_MAX_WORDS:
+        kind, tip = "no_grade", record.no_grade_tip or DEFAULT_NO_GRADE_TIP
+    else:
+        kind = None
+    with _stats_lock:
+        _stats["lookups"] += 1
+        if kind:
+            _stats[kind] += 1
+    if kind is None:
+        return None
+    if kind == "no_grade":
+        # Nothing was evaluated: no grade or safety verdict, same field types as graded feedback
+        feedback = postprocess_feedback({
+            "tip": tip,
+            "safety": "unchecked",
+            "grade": "none",
+        })
+    else:
+        feedback = postprocess_feedback({
+            "tip": tip,
+            "rewrite": "none",
+            "context_relevance": 1.0,
+            "off_topic": False,
+            "missing_elements": [],
+            "safety": "ok",
+            "grade": "green",
+            "highlight_tokens": _all_green(transcript),
+        })
+    feedback["answer_bank"] = kind
+    feedback["prompt_version"] = f"answer_bank@{catalog_version}"
+    return feedback
+
+
+def stats() -> dict:
+    with _stats_lock:
+        matched = _stats["expected"] + _stats["no_grade"]
+        return {**_stats, "hit_ratio": round(matched / _stats["lookups"], 3) if _stats["lookups"] else None}
@@ -1,34 +1,41 @@
 import os
 import io
+import hmac
 import time
 import uuid
 import json
+import threading
 from datetime import datetime, timezone
 
-from concurrent.futures import ThreadPoolExecutor
+_IMPORT_STARTED = time.perf_counter()
+
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 
-import boto3
 from botocore.exceptions import BotoCoreError, ClientError
 from pymongo import MongoClient
 from bson import ObjectId
-from scenarios import get_turn_context, get_video_url, get_example_video_url, get_all_scenarios, get_scenario_data, get_turn_question
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
-
-# If you use the OpenAI Python SDK for Whisper + GPT-5
-# pip install openai>=1.40.0
-try:
-    from openai import OpenAI
-    print("✅ OpenAI SDK imported successfully")
-except Exception as e:  # pragma: no cover
-    print(f"❌ OpenAI SDK import failed: {e}")
-    import traceback
-    traceback.print_exc()
-    OpenAI = None
+import analytics_rollups
+import answer_bank
+import turn_export
+from context_cache import SessionContextCache
+from db_indexes import ensure_indexes, explain_queries, verify_indexes
+from pagination import fetch_page, parse_limit
+from feedback_engine import FeedbackEngine
+from feedback_cache import FeedbackCache, context_fingerprint, feedback_key, retarget_highlights
+from similarity_index import SimilarityIndex
+from executors import PoolSaturated, StagePool, StagePools
+from jobs import JobQueue, JobQueueFull
+from turn_writer import TurnWriter
+from user_cache import UserProfileCache
+from http_cache import CachedBodies
+from scenarios import get_answer_feedback, get_catalog, get_partner_lines, get_turn_context, get_scenario_data, get_turn_question
+from lazy import Lazy
+from readiness import ReadinessProbe
+# boto3, the OpenAI SDK and google-auth are imported on first use (see the Lazy clients
+# below and google_signin), keeping them off the import/startup path of every worker
 
 # ----------------------------
 # App / Config
@@ -38,8 +45,7 @@ print("🔎 Using .env at:", dotenv_path, "exists=", os.path.exists(dotenv_path)
 load_dotenv(dotenv_path, override=True)
 print("✅ Loaded MONGODB_URI:", os.getenv("MONGODB_URI"))
 
-app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": os.getenv("CORS_ALLOW_ORIGINS", "*")}})
+bp = Blueprint("bespoken", __name__)
 
 # Required environment variables
 MONGODB_URI = os.getenv("MONGODB_URI")
@@ -58,7 +64,46 @@ GPT_MODEL = os.getenv("GPT_MODEL", "gpt-5")
 MAX_AUDIO_SECONDS = int(os.getenv("MAX_AUDIO_SECONDS", "70"))  # enforce < 1 minute + buffer
 ALLOWED_EXTENSIONS = set(os.getenv("ALLOWED_EXTENSIONS", "wav,mp3,m4a,webm,ogg").split(','))
 MAX_CONTENT_LENGTH_MB = float(os.getenv("MAX_CONTENT_LENGTH_MB", "20"))
-app.config['MAX_CONTENT_LENGTH'] = int(MAX_CONTENT_LENGTH_MB * 1024 * 1024)
+
+# Async /upload job mode (opt-in per request)
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", "4"))
+UPLOAD_JOB_QUEUE_MAX = int(os.getenv("UPLOAD_JOB_QUEUE_MAX", "32"))
+UPLOAD_JOB_TTL_SEC = int(os.getenv("UPLOAD_JOB_TTL_SEC", "600"))
+JOB_MAX_WAIT_SEC = float(os.getenv("JOB_MAX_WAIT_SEC", "25"))
+
+# HTTP caching for catalog-derived responses (/scenarios, /api/turn)
+SCENARIO_CACHE_MAX_AGE_SEC = int(os.getenv("SCENARIO_CACHE_MAX_AGE_SEC", "60"))
+SCENARIO_CACHE_SWR_SEC = int(os.getenv("SCENARIO_CACHE_SWR_SEC", "600"))
+
+# Analytics pagination (keyset on created_at, _id)
+ANALYTICS_DEFAULT_PAGE = int(os.getenv("ANALYTICS_DEFAULT_PAGE", "100"))
+ANALYTICS_MAX_PAGE = int(os.getenv("ANALYTICS_MAX_PAGE", "1000"))
+# /analytics/user projection expression (MongoDB 4.4+): true when a turn has a non-empty feedback document
+HAS_FEEDBACK_EXPR = {"$and": [{"$ifNull": ["$feedback", False]}, {"$ne": ["$feedback", {}]}]}
+
+# /export/turns: documents pulled from Mongo per cursor batch
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+# Admin token for /export/turns (Authorization: Bearer <token>); the route is off when unset
+EXPORT_TOKEN = os.getenv("EXPORT_TOKEN")
+
+# App-lifetime stage pools: POOL_<NAME>_WORKERS running + POOL_<NAME>_PENDING queued, then 503
+POOL_ADMIT_TIMEOUT_SEC = float(os.getenv("POOL_ADMIT_TIMEOUT_SEC", "0.25"))
+POOL_RETRY_AFTER_SEC = int(os.getenv("POOL_RETRY_AFTER_SEC", "2"))
+
+# In-process cache of each learner's recent transcripts per scenario (context window)
+CONTEXT_CACHE_MAX_SESSIONS = int(os.getenv("CONTEXT_CACHE_MAX_SESSIONS", "10000"))
+CONTEXT_CACHE_TTL_SEC = float(os.getenv("CONTEXT_CACHE_TTL_SEC", "1800"))
+CONTEXT_CACHE_DEPTH = int(os.getenv("CONTEXT_CACHE_DEPTH", "8"))
+
+# User profile cache (email enrichment of saved turns)
+USER_CACHE_MAX = int(os.getenv("USER_CACHE_MAX", "10000"))
+USER_CACHE_TTL_SEC = float(os.getenv("USER_CACHE_TTL_SEC", "3600"))
+USER_LOOKUP_TIMEOUT_SEC = float(os.getenv("USER_LOOKUP_TIMEOUT_SEC", "2"))
+
+# Write-behind persistence for conversation turns
+TURN_WRITE_BATCH_SIZE = int(os.getenv("TURN_WRITE_BATCH_SIZE", "50"))
+TURN_WRITE_FLUSH_SEC = float(os.getenv("TURN_WRITE_FLUSH_SEC", "0.5"))
+TURN_WRITE_QUEUE_MAX = int(os.getenv("TURN_WRITE_QUEUE_MAX", "10000"))
 
 # Optional: Google OAuth placeholders (handled in a separate auth module or proxy)
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
@@ -66,7 +111,24 @@ GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 # OAuth redirect URI for Google sign-in flow
 REDIRECT_URI = os.getenv("REDIRECT_URI", "https://bespoken-frontend.onrender.com/auth/callback")
 
-# Initialize clients with proper SSL configuration
+# Exact-match feedback cache (see feedback_cache.py); the Mongo tier shares entries across workers
+FEEDBACK_CACHE_ENABLED = os.getenv("FEEDBACK_CACHE_ENABLED", "true").lower() == "true"
+FEEDBACK_CACHE_MAX = int(os.getenv("FEEDBACK_CACHE_MAX", "5000"))
+FEEDBACK_CACHE_TTL_SEC = float(os.getenv("FEEDBACK_CACHE_TTL_SEC", "86400"))
+FEEDBACK_CACHE_MONGO = os.getenv("FEEDBACK_CACHE_MONGO", "false").lower() == "true"
+FEEDBACK_CACHE_MONGO_TTL_SEC = float(os.getenv("FEEDBACK_CACHE_MONGO_TTL_SEC", str(7 * 86400)))
+
+# Similarity reuse of green feedback for near-identical answers (see similarity_index.py, needs numpy)
+SIMILAR_FEEDBACK_ENABLED = os.getenv("SIMILAR_FEEDBACK_ENABLED", "false").lower() == "true"
+SIMILAR_FEEDBACK_THRESHOLD = float(os.getenv("SIMILAR_FEEDBACK_THRESHOLD", "0.9"))
+SIMILAR_FEEDBACK_MAX_PER_TURN = int(os.getenv("SIMILAR_FEEDBACK_MAX_PER_TURN", "200"))
+SIMILAR_FEEDBACK_SHADOW_RATE = float(os.getenv("SIMILAR_FEEDBACK_SHADOW_RATE", "0.05"))
+
+# Readiness probe: dependency checks cached in the background for /ready
+READY_CHECK_INTERVAL_SEC = float(os.getenv("READY_CHECK_INTERVAL_SEC", "30"))
+
+# Initialize clients with proper SSL configuration.
+# connect=False: no connection or monitor threads until the first operation (or the readiness probe)
 mongo_client = MongoClient(
     MONGODB_URI,
     serverSelectionTimeoutMS=30000,
@@ -75,51 +137,167 @@ mongo_client = MongoClient(
     retryWrites=True,
     tls=True,
     tlsAllowInvalidCertificates=False,
-    tlsAllowInvalidHostnames=False
+    tlsAllowInvalidHostnames=False,
+    connect=False,
 )
 db = mongo_client[DB_NAME]
 
-# Test MongoDB connection with retry logic
-def test_mongodb_connection():
-    """Test MongoDB connection with retry logic"""
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            # Try to ping the server
-            mongo_client.admin.command('ping')
-            print(f"✅ MongoDB connection successful (attempt {attempt + 1})")
-            return True
-        except Exception as e:
-            print(f"⚠️ MongoDB connection attempt {attempt + 1} failed: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(1)  # Wait 1 second before retry
-            else:
-                print(f"❌ MongoDB connection failed after {max_retries} attempts")
-                return False
-
-# Test connection on startup
-test_mongodb_connection()
-
-s3_client = boto3.client(
-    "s3",
-    region_name=AWS_REGION,
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-)
+# Create the indexes the hot queries rely on (see db_indexes.py) without blocking startup
+MONGO_ENSURE_INDEXES = os.getenv("MONGO_ENSURE_INDEXES", "true").lower() == "true"
+index_status = {"ensure": None, "finished_at": None}
+
+def _ensure_indexes_on_startup():
+    index_status["ensure"] = ensure_indexes(db)
+    index_status["finished_at"] = datetime.now(timezone.utc).isoformat()
 
-openai_client = None
-if OPENAI_API_KEY and OpenAI is not None:
+
+def _make_s3_client():
+    import boto3
+    return boto3.client(
+        "s3",
+        region_name=AWS_REGION,
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+    )
+
+
+def _make_openai_client():
+    if not OPENAI_API_KEY:
+        print("⚠️ OPENAI_API_KEY not set in environment variables")
+        return None
+    # If you use the OpenAI Python SDK for Whisper + GPT-5
+    # pip install openai>=1.40.0
+    try:
+        from openai import OpenAI
+    except Exception as e:  # pragma: no cover
+        print(f"❌ OpenAI SDK import failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
     try:
-        openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        client = OpenAI(api_key=OPENAI_API_KEY)
         print("✅ OpenAI client initialized successfully")
+        return client
     except Exception as e:
         print(f"❌ Failed to initialize OpenAI client: {e}")
         import traceback
         traceback.print_exc()
-elif not OPENAI_API_KEY:
-    print("⚠️ OPENAI_API_KEY not set in environment variables")
-elif OpenAI is None:
-    print("⚠️ OpenAI SDK not available (import failed)")
+        return None
+
+
+s3_client = Lazy(_make_s3_client, "S3 client")
+openai_client = Lazy(_make_openai_client, "OpenAI client")
+
+# Prompt building, GPT call and post-processing (shared with the eval/regen scripts)
+feedback_engine = FeedbackEngine(openai_client)
+
+feedback_cache = FeedbackCache(
+    maxsize=FEEDBACK_CACHE_MAX,
+    ttl_sec=FEEDBACK_CACHE_TTL_SEC,
+    collection=db.feedback_cache if FEEDBACK_CACHE_MONGO else None,
+    shared_ttl_sec=FEEDBACK_CACHE_MONGO_TTL_SEC,
+) if FEEDBACK_CACHE_ENABLED else None
+
+similar_feedback = None
+if SIMILAR_FEEDBACK_ENABLED:
+    try:
+        similar_feedback = SimilarityIndex(
+            threshold=SIMILAR_FEEDBACK_THRESHOLD,
+            max_per_turn=SIMILAR_FEEDBACK_MAX_PER_TURN,
+            ttl_sec=FEEDBACK_CACHE_TTL_SEC,
+            shadow_rate=SIMILAR_FEEDBACK_SHADOW_RATE,
+        )
+    except RuntimeError as e:
+        print(f"⚠️ Similar feedback reuse disabled: {e}")
+
+catalog_responses = CachedBodies(
+    lambda payload: current_app.json.response(payload).get_data(),
+    max_age_sec=SCENARIO_CACHE_MAX_AGE_SEC,
+    stale_while_revalidate_sec=SCENARIO_CACHE_SWR_SEC,
+)
+
+session_context = SessionContextCache(
+    max_sessions=CONTEXT_CACHE_MAX_SESSIONS,
+    ttl_sec=CONTEXT_CACHE_TTL_SEC,
+    depth=CONTEXT_CACHE_DEPTH,
+)
+
+user_profiles = UserProfileCache(db.users, maxsize=USER_CACHE_MAX, ttl_sec=USER_CACHE_TTL_SEC)
+
+stage_pools = StagePools()
+for _name, _workers in (("s3", 8), ("stt", 8), ("llm", 8), ("db", 4)):
+    _workers = int(os.getenv(f"POOL_{_name.upper()}_WORKERS", str(_workers)))
+    stage_pools.add(StagePool(
+        _name,
+        max_workers=_workers,
+        max_pending=int(os.getenv(f"POOL_{_name.upper()}_PENDING", str(_workers))),
+        admit_timeout_sec=POOL_ADMIT_TIMEOUT_SEC,
+        retry_after_sec=POOL_RETRY_AFTER_SEC,
+    ))
+
+def _on_turns_saved(docs: list):
+    """TurnWriter hook: these turns are in Mongo now, so the session context cache and rollups can count them."""
+    for doc in docs:
+        session_context.record(doc["user_id"], doc["scenario_id"], doc["turn_index"], doc["transcript"])
+    analytics_rollups.apply_turns(db, docs)
+
+
+turn_writer = TurnWriter(
+    db.conversation_turns,
+    on_saved=_on_turns_saved,
+    batch_size=TURN_WRITE_BATCH_SIZE,
+    flush_interval_sec=TURN_WRITE_FLUSH_SEC,
+    max_queue=TURN_WRITE_QUEUE_MAX,
+)
+
+upload_jobs = JobQueue(
+    max_workers=UPLOAD_JOB_WORKERS,
+    max_queue=UPLOAD_JOB_QUEUE_MAX,
+    result_ttl_sec=UPLOAD_JOB_TTL_SEC,
+)
+
+
+def _check_mongo():
+    mongo_client.admin.command('ping')
+
+
+def _check_openai():
+    if not openai_client:
+        raise RuntimeError("OpenAI client is not initialized. Set OPENAI_API_KEY and install openai SDK.")
+    return {"init_ms": openai_client.build_ms}
+
+
+def _check_s3():
+    if not S3_BUCKET:
+        raise RuntimeError("S3_BUCKET is not set")
+    s3_client.get()
+    return {"bucket": S3_BUCKET, "init_ms": s3_client.build_ms}
+
+
+def _check_prompt():
+    prompt = feedback_engine.current_prompt()
+    return {"name": prompt.name, "version": prompt.version}
+
+
+def _check_tokenizer():
+    # Loads tiktoken's encoding off the request path; "estimate" when it is unavailable
+    return {"tokenizer": feedback_engine.prompt_builder.tokenizer.load()}
+
+
+def _check_scenarios():
+    catalog = get_catalog()
+    return {"version": catalog.version, "scenarios": len(catalog.scenarios)}
+
+
+# First pass also warms the lazy clients, so the first request doesn't pay for them
+readiness = ReadinessProbe(
+    {"mongo": _check_mongo, "openai": _check_openai, "s3": _check_s3, "scenarios": _check_scenarios,
+     "prompt": _check_prompt, "tokenizer": _check_tokenizer},
+    required={"mongo", "openai", "s3", "scenarios", "prompt"},
+    interval_sec=READY_CHECK_INTERVAL_SEC,
+)
+startup = {"import_ms": None, "create_app_ms": None, "started_at": None}
+_background_started = False
 
 # ----------------------------
 # Helpers
@@ -180,56 +358,54 @@ def transcribe_with_whisper(file_bytes: bytes, filename: str) -> str:
 def get_context_window(db, user_id: str, scenario_id: str, turn_index: int, k: int = 2) -> dict:
     """
     Retrieve context window for context-aware feedback generation.
-    Returns last k partner transcripts (from SCENARIOS) and last k learner transcripts
-    (from conversation_turns) before the current turn.
-    Each transcript line is truncated to ~180 chars to stay within token limits.
+    Returns last k partner transcripts (token-capped when the scenario catalog loads) and last k
+    learner transcripts (from the session context cache, falling back to conversation_turns)
+    before the current turn. Learner lines are kept whole; the prompt builder caps them in tokens.
     """
-    prev_partner = []
-    prev_user = []
+    # Partner transcripts were compiled with the catalog
+    prev_partner = list(get_partner_lines(scenario_id, turn_index)[-k:]) if k > 0 else []
     
-    # Get partner transcripts from SCENARIOS data
-    scenario_data = get_scenario_data(scenario_id)
-    if scenario_data and "turns" in scenario_data:
-        for turn in scenario_data["turns"]:
-            if turn.get("turn_index", 0) < turn_index:
+    # Learner transcripts: in-process session cache first, conversation_turns on a miss
+    learner_lines = session_context.lookup(user_id, scenario_id, turn_index, k)
+    if learner_lines is None:
+        learner_lines = []
+        try:
+            # Query for previous turns from the same user/scenario with lower turn_index.
+            # Retries of a turn keep only the newest attempt, like the session cache does.
+            previous_turns = []
+            cursor = db.conversation_turns.find(
+                {
+                    "user_id": user_id,
+                    "scenario_id": scenario_id,
+                    "turn_index": {"$lt": turn_index}
+                },
+                {"turn_index": 1, "transcript": 1}
+            ).sort([("turn_index", -1), ("_id", -1)]).batch_size(2 * k + 1)
+            try:
+                for turn in cursor:
+                    if previous_turns and previous_turns[-1].get("turn_index") == turn.get("turn_index"):
+                        continue
+                    if len(previous_turns) == k:
+                        break
+                    previous_turns.append(turn)
+            finally:
+                cursor.close()
+            
+            for turn in reversed(previous_turns):  # Reverse to get chronological order
                 transcript = turn.get("transcript", "")
-                # Truncate to ~180 chars, preserving sentence boundaries where possible
-                if len(transcript) > 180:
-                    truncated = transcript[:177] + "..."
-                else:
-                    truncated = transcript
-                prev_partner.append(truncated)
-        
-        # Keep only the last k partner transcripts
-        prev_partner = prev_partner[-k:] if len(prev_partner) > k else prev_partner
-    
-    # Get learner transcripts from conversation_turns collection
-    try:
-        # Query for previous turns from the same user/scenario with lower turn_index
-        previous_turns = list(db.conversation_turns.find(
-            {
-                "user_id": user_id,
-                "scenario_id": scenario_id,
-                "turn_index": {"$lt": turn_index}
-            }
-        ).sort("turn_index", -1).limit(k))
-        
-        for turn in reversed(previous_turns):  # Reverse to get chronological order
-            transcript = turn.get("transcript", "")
-            if transcript:
-                # Truncate to ~180 chars
-                if len(transcript) > 180:
-                    truncated = transcript[:177] + "..."
-                else:
-                    truncated = transcript
-                prev_user.append(truncated)
-    except Exception as e:
-        print(f"⚠️ Error querying context window from DB: {e}")
-        # Continue with empty prev_user if DB query fails
-    
+                if transcript:
+                    learner_lines.append(transcript)
+            session_context.hydrate(
+                user_id, scenario_id, turn_index, k,
+                [(turn.get("turn_index"), turn.get("transcript", "")) for turn in previous_turns],
+            )
+        except Exception as e:
+            print(f"⚠️ Error querying context window from DB: {e}")
+            # Continue with empty prev_user if DB query fails
+
     return {
         "prev_partner": prev_partner,
-        "prev_user": prev_user
+        "prev_user": learner_lines
     }
 
 
@@ -238,95 +414,97 @@ def generate_feedback_with_gpt(
     scenario_title: str | None = None,
     scenario_description: str | None = None,
     turn_transcript: str | None = None,
-    context_window: dict | None = None
+    context_window: dict | None = None,
+    detailed: bool = False
 ) -> dict:
     """
-    Generate context-aware feedback using GPT with conversation history.
-    Returns JSON with tip, rewrite, context_relevance, off_topic, missing_elements, and safety.
+    Generate context-aware feedback using GPT with conversation history (see feedback_engine).
+    Returns JSON with tip, rewrite, context_relevance, off_topic, missing_elements, and safety;
+    with detailed=True, the engine's full result (feedback, usage, prompt size report, latency).
     """
     if not openai_client:
         raise RuntimeError("OpenAI client is not initialized. Set OPENAI_API_KEY and install openai SDK.")
 
-    with open("system_prompt.txt", "r", encoding="utf-8") as f:
-        system_prompt = f.read()
+    try:
+        result = feedback_engine.generate_detailed(
+            transcript, scenario_title, scenario_description, turn_transcript, context_window
+        )
+    except Exception as e:
+        raise RuntimeError(f"GPT feedback failed: {e}")
 
+    print(f"🧮 Prompt tokens: {result['prompt']['prompt_tokens']} (budget {result['prompt']['budget']}, "
+          f"API reported {result['usage'].get('prompt_tokens')})")
+    print("🧠 FINAL GPT FEEDBACK SENT TO FRONTEND:")
+    print(json.dumps(result["feedback"], indent=2, ensure_ascii=False))
+    return result if detailed else result["feedback"]
 
-    # Build context section for user prompt
-    context_section = ""
-    if context_window:
-        prev_partner = context_window.get("prev_partner", [])
-        prev_user = context_window.get("prev_user", [])
-        
-        if prev_partner or prev_user:
-            context_section = "\n\nPrevious conversation context:\n"
-            if prev_partner:
-                context_section += "Partner said earlier:\n"
-                for i, partner_line in enumerate(prev_partner, 1):
-                    context_section += f"  {i}. {partner_line}\n"
-            if prev_user:
-                context_section += "Learner said earlier:\n"
-                for i, user_line in enumerate(prev_user, 1):
-                    context_section += f"  {i}. {user_line}\n"
-
-    user_prompt = (
-        f"Scenario: {scenario_title or 'Conversation'} - {scenario_description or 'Practice conversation'}\n"
-        f"Current turn - Partner said: '{turn_transcript or '[no context]'}'{context_section}\n"
-        f"Learner responded: '{transcript}'\n\n"
-        "Evaluate if the learner's response appropriately addresses the partner's question/goal."
-        " Give one quick tip about how to sound more natural to a native U.S. English speaker."
-        " If it already sounds natural, praise them instead of suggesting a rewrite."
-    )
+
+def stream_feedback_with_gpt(
+    transcript: str,
+    scenario_title: str | None = None,
+    scenario_description: str | None = None,
+    turn_transcript: str | None = None,
+    context_window: dict | None = None
+):
+    """
+    Streaming variant of generate_feedback_with_gpt.
+    Yields ("prompt", report), ("feedback_field", {"field", "value"}) events, then ("feedback", result).
+    """
+    if not openai_client:
+        raise RuntimeError("OpenAI client is not initialized. Set OPENAI_API_KEY and install openai SDK.")
 
     try:
-        model = os.getenv("FAST_GPT_MODEL", "gpt-4o-mini")
-        completion = openai_client.chat.completions.create(
-            model=model,
-            temperature=0.5,
-            max_tokens=220,
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
+        yield from feedback_engine.stream(
+            transcript, scenario_title, scenario_description, turn_transcript, context_window
         )
-        content = completion.choices[0].message.content
-        import json
-        feedback = json.loads(content)
-        
-        # Ensure all required fields exist with defaults
-        result = {
-            "tip": feedback.get("tip", "Keep practicing!"),
-            "rewrite": feedback.get("rewrite", "none"),
-            "context_relevance": float(feedback.get("context_relevance", 0.5)),
-            "off_topic": bool(feedback.get("off_topic", False)),
-            "missing_elements": feedback.get("missing_elements", []),
-            "safety": feedback.get("safety", "ok"),
-            "grade": feedback.get("grade", "yellow"),  # Default to 'yellow' if missing
-            "highlight_tokens": feedback.get("highlight_tokens", [])  # Default to empty array
-        }
-        
-        # Validate context_relevance is in [0, 1]
-        result["context_relevance"] = max(0.0, min(1.0, result["context_relevance"]))
-        
-        # Post-process feedback based on off_topic and context_relevance flags
-        if result["off_topic"]:
-            result["raw_tip"] = result["tip"]
-            result["tip"] = "Your reply was off topic. Try responding to your partner's question next time."
-            result["rewrite"] = "none"
-        elif result["context_relevance"] < 0.5:
-            result["raw_tip"] = result["tip"]
-            result["tip"] = "Your answer didn't fully address the question. Try staying closer to the topic."
-
-        import json
-        print("🧠 FINAL GPT FEEDBACK SENT TO FRONTEND:")
-        print(json.dumps(result, indent=2, ensure_ascii=False))
-        return result
-
-
     except Exception as e:
         raise RuntimeError(f"GPT feedback failed: {e}")
 
 
+def feedback_cache_key(scenario_id: str, turn_index: int, transcript: str, scenario_title: str | None = None,
+                       scenario_description: str | None = None, turn_transcript: str | None = None,
+                       context_window: dict | None = None) -> str:
+    """Cache key for one feedback request: same turn, answer, context, prompt and model → same feedback."""
+    fingerprint = context_fingerprint(scenario_title, scenario_description, turn_transcript, context_window)
+    return feedback_key(
+        scenario_id, turn_index, transcript, fingerprint, feedback_engine.prompt_version, feedback_engine.model
+    )
+
+
+def similarity_bucket(scenario_id: str, turn_index: int, scenario_title: str | None = None,
+                      scenario_description: str | None = None, turn_transcript: str | None = None,
+                      context_window: dict | None = None) -> tuple:
+    """
+    Similarity index bucket: the turn with its partner context, prompt and model. The learner's
+    own earlier lines are left out so green answers from different learners can match.
+    """
+    fingerprint = context_fingerprint(
+        scenario_title, scenario_description, turn_transcript,
+        {"prev_partner": (context_window or {}).get("prev_partner")},
+    )
+    return scenario_id, turn_index, fingerprint, feedback_engine.prompt_version, feedback_engine.model
+
+
+def _shadow_verify(bucket: tuple, match: dict, cache_key: str | None, gpt_kwargs: dict):
+    """Generate real feedback for a similarity reuse in the background and report the verdict."""
+    def _verify():
+        try:
+            fresh = generate_feedback_with_gpt(**gpt_kwargs)
+        except Exception as e:
+            print(f"⚠️ Shadow verification failed: {e}")
+            similar_feedback.record_shadow(bucket, match, None)
+            return
+        if not similar_feedback.record_shadow(bucket, match, fresh) and feedback_cache is not None and cache_key:
+            # The exact cache stored the reused feedback under this answer; replace it with the real one
+            feedback_cache.put(cache_key, fresh)
+
+    try:
+        stage_pools["llm"].submit(_verify)
+    except PoolSaturated:
+        # Never compete with live uploads for the LLM pool
+        similar_feedback.record_shadow(bucket, match, None)
+
+
 def save_turn(
     user_id: str,
     user_email: str | None,
@@ -340,7 +518,13 @@ def save_turn(
     transcript: str,
     feedback: dict,
 ) -> str:
+    """
+    Queue a conversation turn for write-behind persistence and return its turn_id.
+    The _id is assigned here so the id is known before the batched insert lands;
+    GET /turns/<turn_id> reports whether it has been saved yet.
+    """
     doc = {
+        "_id": ObjectId(),
         "user_id": user_id,
         "user_email": user_email,
         "scenario_id": scenario_id,
@@ -361,35 +545,127 @@ def save_turn(
                 {
                     k: (v.isoformat() if isinstance(v, datetime) else v)
                     for k, v in doc.items()
-                    if k not in ['audio_url', 'feedback']
+                    if k not in ['_id', 'audio_url', 'feedback']
                 },
                 indent=2,
                 ensure_ascii=False
             )
         )
-        res = db.conversation_turns.insert_one(doc)
-        return str(res.inserted_id)
+        return turn_writer.enqueue(doc)
     except Exception as e:
-        print(f"⚠️ MongoDB insert_one failed: {e}")
+        print(f"⚠️ Failed to queue turn for MongoDB: {e}")
         raise e
 
 
 # ----------------------------
 # Routes
 # ----------------------------
-@app.get("/health")
+@bp.get("/health")
 def health():
     return {"ok": True, "time": datetime.now(timezone.utc).isoformat()}
 
 
-@app.get("/scenarios")
+@bp.get("/ready")
+def ready():
+    """
+    Readiness probe: cached dependency checks (Mongo ping, OpenAI/S3 clients, scenario catalog)
+    refreshed every READY_CHECK_INTERVAL_SEC in the background. 200 when all pass, else 503.
+    """
+    snapshot = readiness.snapshot()
+    ready_ms = None
+    if readiness.first_ready_at is not None:
+        ready_ms = int((readiness.first_ready_at - _IMPORT_STARTED) * 1000)
+    body = {
+        **snapshot,
+        "startup": {**startup, "ready_ms": ready_ms},
+        "time": datetime.now(timezone.utc).isoformat(),
+    }
+    return jsonify(body), (200 if snapshot["ready"] else 503)
+
+
+@bp.get("/scenarios")
 def list_scenarios():
-    """Return all scenarios from centralized config."""
-    scenarios = get_all_scenarios()
-    return jsonify(scenarios)
+    """Return all scenarios from centralized config (pre-serialized per catalog version, ETagged)."""
+    catalog = get_catalog()
+    return catalog_responses.respond(
+        ("scenarios",), catalog.version, lambda: [dict(summary) for summary in catalog.summaries]
+    )
+
+
+def build_scenario_manifest(scenario_id: str, scenario_data: dict, catalog_version: str) -> dict:
+    """
+    Everything the client needs to play a scenario without per-turn round trips:
+    all turns with transcripts and media URLs, plus an ordered preload list.
+    Turn videos come first in playback order ("auto" for the first two, "metadata" after);
+    example videos are optional viewing, so they follow at low priority.
+    """
+    turns = []
+    preload = []
+    examples = []
+    for position, turn in enumerate(scenario_data["turns"]):
+        entry = {
+            "turn_index": turn["turn_index"],
+            "video_url": turn["video_url"],
+            "turn_transcript": turn["transcript"],
+        }
+        if turn.get("example_video_url"):
+            entry["example_video_url"] = turn["example_video_url"]
+            examples.append({
+                "url": turn["example_video_url"],
+                "as": "video",
+                "kind": "example_video",
+                "turn_index": turn["turn_index"],
+                "priority": "low",
+                "preload": "none",
+            })
+        turns.append(entry)
+        preload.append({
+            "url": turn["video_url"],
+            "as": "video",
+            "kind": "turn_video",
+            "turn_index": turn["turn_index"],
+            "priority": "high" if position == 0 else "auto",
+            "preload": "auto" if position < 2 else "metadata",
+        })
+    preload.extend(examples)
+    for order, item in enumerate(preload):
+        item["order"] = order
+
+    return {
+        "scenario_id": scenario_id,
+        "scenario_name": scenario_data["title"],
+        "scenario_description": scenario_data["description"],
+        "difficulty": scenario_data.get("difficulty", "Beginner"),
+        "image_url": scenario_data.get("image_url", ""),
+        "catalog_version": catalog_version,
+        "turn_count": len(turns),
+        "turns": turns,
+        "preload": preload,
+    }
+
+
+@bp.get("/scenarios/<scenario_id>/manifest")
+def get_scenario_manifest(scenario_id):
+    """
+    GET /scenarios/<scenario_id>/manifest
+    Returns every turn of a scenario with transcripts, media URLs and preload hints in one call,
+    so the client can prefetch upcoming videos while the learner is recording.
+    """
+    catalog = get_catalog()
+
+    def _build():
+        scenario_data = catalog.scenarios.get(scenario_id)
+        if scenario_data is None:
+            return None
+        return build_scenario_manifest(scenario_id, scenario_data, catalog.version)
+
+    response = catalog_responses.respond(("manifest", scenario_id), catalog.version, _build)
+    if response is None:
+        return jsonify({"error": "Scenario not found"}), 404
+    return response
 
 
-@app.get("/api/turn")
+@bp.get("/api/turn")
 def get_turn():
     scenario_id = request.args.get('scenario_id')
     turn_index = request.args.get('turn_index')
@@ -402,85 +678,100 @@ def get_turn():
     except ValueError:
         return jsonify({"error": "turn_index must be an integer"}), 400
     
-    turn_context = get_turn_context(scenario_id, turn_index)
-    video_url = get_video_url(scenario_id, turn_index)
-    example_video_url = get_example_video_url(scenario_id, turn_index)
-    
-    if not turn_context or not video_url:
-        return jsonify({"error": "Scenario or turn not found"}), 404
-    
-    result = {
-        "scenario_name": turn_context["scenario_title"],
-        "scenario_description": turn_context["scenario_description"],
-        "turn_index": turn_index,
-        "video_url": video_url,
-        "turn_transcript": turn_context["turn_transcript"]
-    }
-    
-    # Only include example_video_url if it exists
-    if example_video_url:
-        result["example_video_url"] = example_video_url
-    
-    return jsonify(result)
+    catalog = get_catalog()
 
+    def _build():
+        record = catalog.turns.get((scenario_id, turn_index))
+        if record is None:
+            return None
+        result = {
+            "scenario_name": record.scenario_title,
+            "scenario_description": record.scenario_description,
+            "turn_index": turn_index,
+            "video_url": record.video_url,
+            "turn_transcript": record.transcript
+        }
+        # Only include example_video_url if it exists
+        if record.example_video_url:
+            result["example_video_url"] = record.example_video_url
+        return result
 
-@app.post("/upload")
-def handle_upload():
+    response = catalog_responses.respond(("turn", scenario_id, turn_index), catalog.version, _build)
+    if response is None:
+        return jsonify({"error": "Scenario or turn not found"}), 404
+    return response
 
-    """
-    POST /upload (multipart/form-data)
-    form fields:
-      - audio: file (required)
-      - user_id: str (required)
-      - scenario_id: str (required)
-      - turn_index: int (required)
-      - duration_sec: float (optional, used for simple server-side validation)
 
-    Flow:
-      1) Validate + store audio to S3
-      2) Transcribe via Whisper
-      3) Generate feedback via GPT-5
-      4) Persist in MongoDB
-      5) Return transcript + feedback (JSON)
+def _parse_upload_request():
+    """
+    Validate the multipart /upload form and read the audio bytes.
+    Returns (params, None) on success or (None, (response, status)) on validation failure.
     """
-    t0 = time.perf_counter()
-    t_s3_ms = None
-    t_stt_ms = None
-    t_llm_ms = None
-
     if "audio" not in request.files:
-        return jsonify({"error": "Missing file field 'audio'."}), 400
+        return None, (jsonify({"error": "Missing file field 'audio'."}), 400)
 
     file = request.files["audio"]
     filename = secure_filename(file.filename or "audio.webm")
 
     if not allowed_file(filename):
-        return jsonify({"error": f"Unsupported file type. Allowed: {sorted(ALLOWED_EXTENSIONS)}"}), 400
+        return None, (jsonify({"error": f"Unsupported file type. Allowed: {sorted(ALLOWED_EXTENSIONS)}"}), 400)
 
     user_id = request.form.get("user_id")
     scenario_id = request.form.get("scenario_id")
     turn_index_raw = request.form.get("turn_index")
 
     if not user_id or not scenario_id or turn_index_raw is None:
-        return jsonify({"error": "Missing required fields: user_id, scenario_id, turn_index."}), 400
+        return None, (jsonify({"error": "Missing required fields: user_id, scenario_id, turn_index."}), 400)
 
     try:
         turn_index = int(turn_index_raw)
     except ValueError:
-        return jsonify({"error": "turn_index must be an integer."}), 400
+        return None, (jsonify({"error": "turn_index must be an integer."}), 400)
 
     # Optional lightweight validation on duration
     try:
         duration_sec = float(request.form.get("duration_sec", 0))
         if duration_sec and duration_sec > MAX_AUDIO_SECONDS:
-            return jsonify({"error": f"Audio too long. Limit {MAX_AUDIO_SECONDS}s."}), 400
+            return None, (jsonify({"error": f"Audio too long. Limit {MAX_AUDIO_SECONDS}s."}), 400)
     except ValueError:
         duration_sec = 0
 
     # Read file bytes once
     file_bytes = file.read()
     if not file_bytes:
-        return jsonify({"error": "Empty file."}), 400
+        return None, (jsonify({"error": "Empty file."}), 400)
+
+    return {
+        "user_id": user_id,
+        "scenario_id": scenario_id,
+        "turn_index": turn_index,
+        "filename": filename,
+        "mimetype": file.mimetype or "application/octet-stream",
+        "file_bytes": file_bytes,
+    }, None
+
+
+def _upload_pipeline(params: dict, stream_llm: bool = False):
+    """
+    Run S3 + Whisper + GPT + persistence for one validated upload.
+    Yields (event, data) tuples as each stage finishes:
+      - transcript:      {"transcript", "t_stt_ms"}
+      - audio:           {"audio_url", "t_s3_ms"}
+      - feedback_field:  {"field", "value"}   (only when stream_llm=True)
+      - feedback:        {"feedback", "t_llm_ms", "feedback_cache"}   (answer_bank, hit, coalesced, similar, miss or model)
+      - done:            the full /upload response body
+      - error:           {"error", "status"} - terminal
+    """
+    t0 = time.perf_counter()
+    t_s3_ms = None
+    t_stt_ms = None
+    t_llm_ms = None
+
+    user_id = params["user_id"]
+    scenario_id = params["scenario_id"]
+    turn_index = params["turn_index"]
+    filename = params["filename"]
+    file_bytes = params["file_bytes"]
 
     ext = filename.rsplit(".", 1)[-1].lower()
     key = _s3_key(user_id, scenario_id, ext)
@@ -488,7 +779,7 @@ def handle_upload():
     # Upload to S3 and Transcribe with Whisper concurrently
     def _upload_task() -> tuple[str, int]:
         _t = time.perf_counter()
-        url = upload_to_s3(io.BytesIO(file_bytes), key, file.mimetype or "application/octet-stream")
+        url = upload_to_s3(io.BytesIO(file_bytes), key, params["mimetype"])
         return url, int((time.perf_counter() - _t) * 1000)
 
     def _transcribe_task() -> tuple[str, int]:
@@ -496,120 +787,373 @@ def handle_upload():
         text = transcribe_with_whisper(file_bytes, filename)
         return text, int((time.perf_counter() - _t) * 1000)
 
-    def _context_task() -> dict:
-        try:
-            return get_turn_context(scenario_id, turn_index)
-        except Exception as e:
-            print(f"⚠️ Failed to get turn context: {e}")
-            return None
+    def _context_window_task() -> dict:
+        return get_context_window(db, user_id, scenario_id, turn_index, k=2)
 
-    with ThreadPoolExecutor(max_workers=3) as executor:
-        future_upload = executor.submit(_upload_task)
-        future_transcribe = executor.submit(_transcribe_task)
-        future_context = executor.submit(_context_task)
-        
-        try:
-            audio_url, t_s3_ms = future_upload.result()
-        except Exception as e:
-            import traceback
-            print(f"❌ ERROR in S3 upload task: {e}")
-            traceback.print_exc()
-            return jsonify({"error": str(e)}), 502
-        try:
-            transcript, t_stt_ms = future_transcribe.result()
-            print(f"📝 WHISPER TRANSCRIBED: '{transcript}'")
-        except Exception as e:
-            import traceback
-            print(f"❌ ERROR in Whisper transcription task: {e}")
-            traceback.print_exc()
-            return jsonify({"error": str(e)}), 502
-        try:
-            turn_context = future_context.result()
-        except Exception as e:
-            print(f"⚠️ Failed to get turn context: {e}")
-            turn_context = None
+    # Admission control: fail fast with 503 when a stage pool is saturated
+    admitted = []
+    try:
+        for pool_name, task in (("stt", _transcribe_task), ("s3", _upload_task), ("db", _context_window_task)):
+            admitted.append(stage_pools[pool_name].submit(task))
+    except PoolSaturated as e:
+        for future in admitted:
+            future.cancel()
+        print(f"⚠️ Rejecting upload: {e}")
+        yield "error", {"error": str(e), "status": 503, "retry_after": e.retry_after_sec}
+        return
+    future_transcribe, future_upload, future_window = admitted
+
+    # User email only enriches the saved turn: resolve it off the critical path, never fail on it
+    try:
+        future_user = stage_pools["db"].submit(user_profiles.get_email, user_id)
+    except PoolSaturated:
+        future_user = None
+
+    # Transcript first: it is what the learner is waiting to see
+    try:
+        transcript, t_stt_ms = future_transcribe.result()
+        print(f"📝 WHISPER TRANSCRIBED: '{transcript}'")
+    except Exception as e:
+        import traceback
+        print(f"❌ ERROR in Whisper transcription task: {e}")
+        traceback.print_exc()
+        yield "error", {"error": str(e), "status": 502}
+        return
+    yield "transcript", {"transcript": transcript, "t_stt_ms": t_stt_ms}
+    try:
+        audio_url, t_s3_ms = future_upload.result()
+    except Exception as e:
+        import traceback
+        print(f"❌ ERROR in S3 upload task: {e}")
+        traceback.print_exc()
+        yield "error", {"error": str(e), "status": 502}
+        return
+    yield "audio", {"audio_url": audio_url, "t_s3_ms": t_s3_ms}
+
+    try:
+        turn_context = get_turn_context(scenario_id, turn_index)
+    except Exception as e:
+        print(f"⚠️ Failed to get turn context: {e}")
+        turn_context = None
 
     scenario_title = turn_context.get('scenario_title') if turn_context else None
     scenario_description = turn_context.get('scenario_description') if turn_context else None
     turn_transcript = turn_context.get('turn_transcript') if turn_context else None
 
-    # Build context window for context-aware feedback
-    context_window = get_context_window(db, user_id, scenario_id, turn_index, k=2)
+    # Context window for context-aware feedback (queried alongside S3/Whisper)
+    try:
+        context_window = future_window.result()
+    except Exception as e:
+        print(f"⚠️ Failed to build context window: {e}")
+        context_window = {"prev_partner": [], "prev_user": []}
     
     # Generate feedback with GPT-5
     print(f"🤖 SENDING TO GPT - Scenario: '{scenario_title or 'unknown'}', Turn question: '{(turn_transcript or '')[:50]}...', User said: '{transcript}'")
+    gpt_kwargs = dict(
+        transcript=transcript, 
+        scenario_title=scenario_title,
+        scenario_description=scenario_description,
+        turn_transcript=turn_transcript,
+        context_window=context_window
+    )
+    cache_key = feedback_cache_key(scenario_id, turn_index, **gpt_kwargs) if feedback_cache else None
+    bucket = similarity_bucket(scenario_id, turn_index, scenario_title, scenario_description,
+                               turn_transcript, context_window) if similar_feedback else None
+    feedback_source = "model"
+    reused = []
+    prompt_report = None
+
+    def _similar() -> dict | None:
+        match = similar_feedback.lookup(bucket, transcript) if similar_feedback else None
+        if match is None:
+            return None
+        print(f"♻️ Reusing green feedback for similar answer '{match['matched']}' (score={match['score']})")
+        if match["shadow"]:
+            _shadow_verify(bucket, match, cache_key, gpt_kwargs)
+        reused.append(match)
+        return match["feedback"]
+
+    def _generate() -> dict:
+        nonlocal prompt_report
+        similar = _similar()
+        if similar is not None:
+            return similar
+        with stage_pools["llm"].slot():
+            result = generate_feedback_with_gpt(**gpt_kwargs, detailed=True)
+        prompt_report = {**result["prompt"], "api_prompt_tokens": result["usage"].get("prompt_tokens")}
+        return result["feedback"]
+
     try:
         _t = time.perf_counter()
-        feedback = generate_feedback_with_gpt(
-            transcript=transcript, 
-            scenario_title=scenario_title,
-            scenario_description=scenario_description,
-            turn_transcript=turn_transcript,
-            context_window=context_window
-        )
+        # Answer bank first: no-grade turns and textbook replies never reach GPT or the caches
+        feedback = get_answer_feedback(scenario_id, turn_index, transcript)
+        if feedback is not None:
+            feedback_source = "answer_bank"
+        elif stream_llm:
+            if feedback_cache is not None:
+                feedback = feedback_cache.get(cache_key)
+                feedback_source = "hit" if feedback is not None else "miss"
+            if feedback is None:
+                feedback = _similar()
+        elif feedback_cache is not None:
+            # Identical answers in flight share one GPT call; only the leader takes an llm slot
+            feedback, feedback_source = feedback_cache.get_or_generate(cache_key, _generate)
+        else:
+            feedback = _generate()
+        if feedback is None:
+            # Streaming miss: forward fields as they arrive, then cache the final result
+            with stage_pools["llm"].slot():
+                for event, data in stream_feedback_with_gpt(**gpt_kwargs):
+                    if event == "feedback":
+                        feedback = data
+                    elif event == "prompt":
+                        prompt_report = data
+                    else:
+                        yield event, data
+            if feedback_cache is not None:
+                feedback_cache.put(cache_key, feedback)
+        if reused:
+            feedback_source = "similar"
+        if feedback_source in ("hit", "coalesced", "similar"):
+            # Served from another answer: highlight this transcript's own words
+            retarget_highlights(feedback, transcript)
+        elif similar_feedback is not None and feedback_source in ("miss", "model"):
+            similar_feedback.add(bucket, transcript, feedback)
         t_llm_ms = int((time.perf_counter() - _t) * 1000)
-        print(f"💬 GPT RESPONSE: {feedback}")
+        print(f"💬 GPT RESPONSE ({feedback_source}): {feedback}")
+    except PoolSaturated as e:
+        print(f"⚠️ Rejecting upload: {e}")
+        yield "error", {"error": str(e), "status": 503, "retry_after": e.retry_after_sec}
+        return
     except RuntimeError as e:
         import traceback
         print(f"❌ ERROR in GPT feedback generation: {e}")
         traceback.print_exc()
-        return jsonify({"error": str(e)}), 502
+        yield "error", {"error": str(e), "status": 502}
+        return
+    yield "feedback", {"feedback": feedback, "t_llm_ms": t_llm_ms, "feedback_cache": feedback_source}
 
-    # Lookup user email for analytics enrichment
+    # User email for analytics enrichment (looked up concurrently, usually a cache hit)
     user_email = None
-    if user_id:
+    if future_user is not None:
         try:
-            user_obj_id = ObjectId(user_id)
-            user_doc = db.users.find_one({"_id": user_obj_id})
-            if user_doc:
-                user_email = user_doc.get("email")
+            user_email = future_user.result(timeout=USER_LOOKUP_TIMEOUT_SEC)
         except Exception as e:
             print(f"⚠️ Failed to fetch user email for {user_id}: {e}")
 
-    # Save to MongoDB (non-blocking background task)
-    def _save_to_db():
-        try:
-            return save_turn(
-                user_id=user_id,
-                user_email=user_email,
-                scenario_id=scenario_id,
-                scenario_title=scenario_title,
-                scenario_description=scenario_description,
-                turn_index=turn_index,
-                turn_transcript=turn_transcript,
-                context_window=context_window,
-                audio_url=audio_url,
-                transcript=transcript,
-                feedback=feedback,
-            )
-        except Exception as e:
-            print(f"⚠️ MongoDB save failed: {e}")
-            return None
-    
-    # Submit MongoDB save as background task (don't wait for it)
-    with ThreadPoolExecutor(max_workers=1) as db_executor:
-        future_db = db_executor.submit(_save_to_db)
-        # Don't wait for the result - let it run in background
-    
-    # Return response immediately without waiting for MongoDB
-    turn_id = "pending"  # Placeholder since we're not waiting for the actual ID
+    # Queue for write-behind persistence (the insert happens on the turn writer thread)
+    try:
+        turn_id = save_turn(
+            user_id=user_id,
+            user_email=user_email,
+            scenario_id=scenario_id,
+            scenario_title=scenario_title,
+            scenario_description=scenario_description,
+            turn_index=turn_index,
+            turn_transcript=turn_transcript,
+            context_window=context_window,
+            audio_url=audio_url,
+            transcript=transcript,
+            feedback=feedback,
+        )
+    except Exception as e:
+        print(f"⚠️ MongoDB save failed: {e}")
+        turn_id = None
 
-    return jsonify({
+    yield "done", {
         "audio_url": audio_url,
         "transcript": transcript,
         "feedback": feedback,
         "turn_id": turn_id,
+        "turn_status": "pending" if turn_id else "failed",
         "t_s3_ms": t_s3_ms,
         "t_stt_ms": t_stt_ms,
         "t_llm_ms": t_llm_ms,
+        "feedback_cache": feedback_source,
+        "prompt_tokens": prompt_report["prompt_tokens"] if prompt_report else None,
+        "prompt": prompt_report,
         "latency_ms": int((time.perf_counter() - t0) * 1000),
+    }
+
+
+def _run_upload(params: dict) -> tuple[dict, int]:
+    """Run the upload pipeline to completion and return (response body, HTTP status)."""
+    for event, data in _upload_pipeline(params):
+        if event == "error":
+            body = {"error": data["error"]}
+            if data.get("retry_after"):
+                body["retry_after"] = data["retry_after"]
+            return body, data["status"]
+        if event == "done":
+            return data, 200
+    return {"error": "Upload pipeline finished without a result."}, 500
+
+
+def _wants_async() -> bool:
+    value = request.args.get("async") or request.form.get("async") or ""
+    return value.lower() in ("1", "true", "yes")
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@bp.post("/upload")
+def handle_upload():
+
+    """
+    POST /upload (multipart/form-data)
+    form fields:
+      - audio: file (required)
+      - user_id: str (required)
+      - scenario_id: str (required)
+      - turn_index: int (required)
+      - duration_sec: float (optional, used for simple server-side validation)
+      - async: "true" (optional, also accepted as ?async=true) - enqueue and return 202 + job_id;
+        fetch the result from /jobs/<job_id>. Returns 503 + Retry-After when the queue is full.
+
+    Flow:
+      1) Validate + store audio to S3
+      2) Transcribe via Whisper
+      3) Generate feedback via GPT-5
+      4) Persist in MongoDB
+      5) Return transcript + feedback (JSON)
+    """
+    params, error = _parse_upload_request()
+    if error:
+        return error
+
+    if _wants_async():
+        try:
+            job_id = upload_jobs.submit(_run_upload, params)
+        except JobQueueFull as e:
+            print(f"⚠️ Rejecting async upload: {e}")
+            return jsonify({"error": str(e)}), 503, {"Retry-After": "5"}
+        status_url = f"/jobs/{job_id}"
+        return jsonify({"job_id": job_id, "status": "queued", "status_url": status_url}), 202, {"Location": status_url}
+
+    body, status = _run_upload(params)
+    if body.get("retry_after"):
+        return jsonify(body), status, {"Retry-After": str(body["retry_after"])}
+    return jsonify(body), status
+
+
+@bp.post("/upload/stream")
+def handle_upload_stream():
+    """
+    POST /upload/stream (multipart/form-data, same fields as /upload)
+
+    Streams the pipeline as Server-Sent Events instead of one blocking JSON body:
+      event: transcript      -> as soon as Whisper returns (with t_stt_ms)
+      event: audio           -> S3 URL (with t_s3_ms)
+      event: feedback_field  -> each feedback field as the GPT completion streams
+      event: feedback        -> final post-processed feedback (with t_llm_ms); the only feedback
+                                event on a cache hit
+      event: done            -> same body /upload returns
+      event: error           -> {"error", "status"}; ends the stream
+    Validation errors are returned as plain JSON with 4xx before streaming starts.
+    """
+    params, error = _parse_upload_request()
+    if error:
+        return error
+
+    def _events():
+        try:
+            for event, data in _upload_pipeline(params, stream_llm=True):
+                yield _sse(event, data)
+        except Exception as e:
+            print(f"❌ ERROR in streaming upload: {e}")
+            yield _sse("error", {"error": str(e), "status": 500})
+
+    return Response(
+        stream_with_context(_events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@bp.get("/turns/<turn_id>")
+def get_turn_status(turn_id):
+    """
+    GET /turns/<turn_id>
+    Reports whether a turn returned by /upload has been persisted: pending, saved or failed.
+    """
+    status = turn_writer.status(turn_id)
+    if status is None:
+        try:
+            found = db.conversation_turns.find_one({"_id": ObjectId(turn_id)}, {"_id": 1})
+        except Exception as e:
+            print(f"⚠️ Failed to look up turn {turn_id}: {e}")
+            return jsonify({"error": "Invalid turn_id or lookup failed"}), 400
+        if not found:
+            return jsonify({"error": "Turn not found"}), 404
+        status = {"status": "saved"}
+    return jsonify({"turn_id": turn_id, **status})
+
+
+@bp.get("/metrics")
+def metrics():
+    """Process-local queue depths and counters for capacity tuning."""
+    return jsonify({
+        "time": datetime.now(timezone.utc).isoformat(),
+        "upload_jobs": upload_jobs.stats(),
+        "turn_writer": turn_writer.stats(),
+        "pools": stage_pools.stats(),
+        "catalog_responses": catalog_responses.stats(),
+        "session_context": session_context.stats(),
+        "user_profiles": user_profiles.stats(),
+        "answer_bank": answer_bank.stats(),
+        "prompts": {**feedback_engine.prompt_builder.stats(), **feedback_engine.registry.stats()},
+        "feedback_cache": feedback_cache.stats() if feedback_cache else None,
+        "similar_feedback": similar_feedback.stats() if similar_feedback else None,
+        "startup": startup,
     })
 
 
+@bp.get("/diagnostics/indexes")
+def diagnostics_indexes():
+    """
+    Declared vs. actual MongoDB indexes, the startup ensure_indexes() result, and an
+    explain() of each hot query. "uncovered" lists queries that still COLLSCAN or sort in memory.
+    """
+    try:
+        queries = explain_queries(db)
+        return jsonify({
+            "time": datetime.now(timezone.utc).isoformat(),
+            "startup": index_status,
+            "indexes": verify_indexes(db),
+            "queries": queries,
+            "uncovered": [q["name"] for q in queries if not q.get("covered")],
+        })
+    except Exception as e:
+        print(f"❌ Error in /diagnostics/indexes: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.get("/jobs/<job_id>")
+def get_job(job_id):
+    """
+    GET /jobs/<job_id>?wait=<seconds>
+    Returns the async upload job status (queued/running/done/failed).
+    With wait > 0 the request long-polls until the job finishes or the wait elapses.
+    When done, "result" holds the same body /upload returns synchronously.
+    """
+    try:
+        wait_sec = min(float(request.args.get("wait", 0)), JOB_MAX_WAIT_SEC)
+    except ValueError:
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+
+    job = upload_jobs.get(job_id, wait_sec=wait_sec)
+    if job is None:
+        return jsonify({"error": "Job not found or expired"}), 404
+    return jsonify(job)
+
+
 # ----------------------------
 # Google OAuth Authentication
 # ----------------------------
-@app.post("/auth/google/signin")
+@bp.post("/auth/google/signin")
 def google_signin():
     """
     POST /auth/google/signin
@@ -633,7 +1177,9 @@ def google_signin():
         if not credential:
             return jsonify({"error": "Credential cannot be empty"}), 400
         
-        # Verify the Google ID token
+        # Verify the Google ID token (google-auth is imported here, not at startup)
+        from google.oauth2 import id_token
+        from google.auth.transport import requests as google_requests
         try:
             idinfo = id_token.verify_oauth2_token(
                 credential, 
@@ -680,6 +1226,7 @@ def google_signin():
             # Get the user document
             user = db.users.find_one({"google_id": google_id})
             user_id = str(user['_id'])
+            user_profiles.put(user_id, email, name or email.split('@')[0])
             
             print(f"✅ User authenticated: {email} (ID: {user_id})")
             
@@ -701,7 +1248,7 @@ def google_signin():
 # ----------------------------
 # Auth placeholders (Google OAuth)
 # ----------------------------
-@app.get("/auth/google")
+@bp.get("/auth/google")
 def auth_google_start():
     """
     Placeholder redirect endpoint. In production, use a proper OAuth flow (e.g., Authlib) on the backend
@@ -710,7 +1257,7 @@ def auth_google_start():
     return jsonify({"message": "Implement Google OAuth or ID token verification here."}), 501
 
 
-@app.post("/auth/google/verify")
+@bp.post("/auth/google/verify")
 def verify_google_id_token():
     """
     Accept a Google ID token from the client and verify it on the server.
@@ -723,21 +1270,15 @@ def verify_google_id_token():
 # Analytics Endpoints
 # ----------------------------
 
-@app.get("/analytics/users")
+@bp.get("/analytics/users")
 def get_analytics_users():
-    """Returns list of all unique user IDs and their activity count"""
+    """
+    Returns list of all unique user IDs and their activity count.
+    Reads the user_rollups collection; run `python analytics_rollups.py rebuild` to backfill.
+    """
     try:
-        # Aggregate user activity counts
-        pipeline = [
-            {"$group": {
-                "_id": "$user_id",
-                "activity_count": {"$sum": 1},
-                "last_activity": {"$max": "$created_at"}
-            }},
-            {"$sort": {"activity_count": -1}}
-        ]
-        
-        users = list(db.conversation_turns.aggregate(pipeline))
+        # Pre-aggregated per user, maintained as turns are saved (see analytics_rollups.py)
+        users = analytics_rollups.user_rollups(db)
         
         # Format response
         result = []
@@ -745,7 +1286,7 @@ def get_analytics_users():
             result.append({
                 "user_id": user["_id"],
                 "activity_count": user["activity_count"],
-                "last_activity": user["last_activity"].isoformat() if user["last_activity"] else None
+                "last_activity": user["last_activity"].isoformat() if user.get("last_activity") else None
             })
         
         return jsonify({
@@ -763,14 +1304,34 @@ def get_analytics_users():
             "error": str(e)
         }), 500
 
-@app.get("/analytics/user/<user_id>")
+@bp.get("/analytics/user/<user_id>")
 def get_analytics_user(user_id):
-    """Returns all conversation turns for a specific user, sorted by timestamp"""
+    """
+    Returns a user's conversation turns, newest first, one page at a time.
+    Query params:
+      - limit: page size (default ANALYTICS_DEFAULT_PAGE, capped at ANALYTICS_MAX_PAGE; 'all' = the cap)
+      - cursor: the next_cursor from the previous page
+    total_turns is the user's total turn count (first page only, null on later pages);
+    count is the number of turns in this page.
+    """
     try:
-        # Find all turns for the user, sorted by timestamp
-        turns = list(db.conversation_turns.find(
-            {"user_id": user_id}
-        ).sort("created_at", -1))
+        limit = parse_limit(request.args.get('limit'), ANALYTICS_DEFAULT_PAGE, ANALYTICS_MAX_PAGE)
+        cursor = request.args.get('cursor')
+        try:
+            turns, next_cursor = fetch_page(
+                db.conversation_turns,
+                {"user_id": user_id},
+                # has_feedback is computed server-side (non-empty feedback), so the feedback body is never sent
+                {"scenario_id": 1, "turn_index": 1, "transcript": 1, "has_feedback": HAS_FEEDBACK_EXPR},
+                limit,
+                cursor,
+            )
+        except ValueError as e:
+            return jsonify({
+                "success": False,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "error": str(e)
+            }), 400
         
         # Format response
         result = []
@@ -781,7 +1342,7 @@ def get_analytics_user(user_id):
                 "turn_index": turn.get("turn_index"),
                 "timestamp": turn.get("created_at").isoformat() if turn.get("created_at") else None,
                 "transcript": turn.get("transcript"),
-                "has_feedback": bool(turn.get("feedback"))
+                "has_feedback": bool(turn.get("has_feedback"))
             })
         
         return jsonify({
@@ -789,7 +1350,10 @@ def get_analytics_user(user_id):
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "user_id": user_id,
             "data": result,
-            "total_turns": len(result)
+            # Counted once per listing, on the (user_id, created_at, _id) index
+            "total_turns": None if cursor else db.conversation_turns.count_documents({"user_id": user_id}),
+            "count": len(result),
+            "next_cursor": next_cursor
         })
         
     except Exception as e:
@@ -800,25 +1364,15 @@ def get_analytics_user(user_id):
             "error": str(e)
         }), 500
 
-@app.get("/analytics/scenarios")
+@bp.get("/analytics/scenarios")
 def get_analytics_scenarios():
-    """Returns scenario usage statistics (count of turns per scenario)"""
+    """
+    Returns scenario usage statistics (count of turns per scenario).
+    Reads the scenario_rollups collection; run `python analytics_rollups.py rebuild` to backfill.
+    """
     try:
-        # Aggregate scenario usage
-        pipeline = [
-            {"$group": {
-                "_id": "$scenario_id",
-                "turn_count": {"$sum": 1},
-                "unique_users": {"$addToSet": "$user_id"},
-                "last_used": {"$max": "$created_at"}
-            }},
-            {"$addFields": {
-                "unique_user_count": {"$size": "$unique_users"}
-            }},
-            {"$sort": {"turn_count": -1}}
-        ]
-        
-        scenarios = list(db.conversation_turns.aggregate(pipeline))
+        # Pre-aggregated per scenario, maintained as turns are saved (see analytics_rollups.py)
+        scenarios = analytics_rollups.scenario_rollups(db)
         
         # Format response
         result = []
@@ -826,8 +1380,8 @@ def get_analytics_scenarios():
             result.append({
                 "scenario_id": scenario["_id"],
                 "turn_count": scenario["turn_count"],
-                "unique_user_count": scenario["unique_user_count"],
-                "last_used": scenario["last_used"].isoformat() if scenario["last_used"] else None
+                "unique_user_count": scenario.get("unique_user_count", 0),
+                "last_used": scenario["last_used"].isoformat() if scenario.get("last_used") else None
             })
         
         return jsonify({
@@ -845,31 +1399,31 @@ def get_analytics_scenarios():
             "error": str(e)
         }), 500
 
-@app.get("/analytics/recent")
+@bp.get("/analytics/recent")
 def get_analytics_recent():
-    """Returns the most recent conversation turns across all users with scenario data"""
+    """
+    Returns the most recent conversation turns across all users with scenario data.
+    Query params:
+      - limit: page size (default 20, capped at ANALYTICS_MAX_PAGE; 'all' = the cap)
+      - cursor: the next_cursor from the previous page
+    """
     try:
-        # Parse limit parameter
-        limit_param = request.args.get('limit', '20')
-        
-        if limit_param.lower() == 'all':
-            limit = 0  # No limit
-        else:
-            try:
-                limit = int(limit_param)
-                if limit < 1:
-                    limit = 20
-                elif limit > 1000:
-                    limit = 1000
-            except ValueError:
-                limit = 20
-        
-        # Find most recent turns
-        query = db.conversation_turns.find().sort("created_at", -1)
-        if limit > 0:
-            query = query.limit(limit)
-        
-        turns = list(query)
+        limit = parse_limit(request.args.get('limit'), 20, ANALYTICS_MAX_PAGE)
+        try:
+            turns, next_cursor = fetch_page(
+                db.conversation_turns,
+                {},
+                {"user_id": 1, "scenario_id": 1, "turn_index": 1, "transcript": 1,
+                 "feedback.tip": 1, "feedback.rewrite": 1},
+                limit,
+                request.args.get('cursor'),
+            )
+        except ValueError as e:
+            return jsonify({
+                "success": False,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "error": str(e)
+            }), 400
         
         # Format response with scenario data
         result = []
@@ -908,7 +1462,8 @@ def get_analytics_recent():
             "success": True,
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "data": result,
-            "count": len(result)
+            "count": len(result),
+            "next_cursor": next_cursor
         })
         
     except Exception as e:
@@ -919,6 +1474,79 @@ def get_analytics_recent():
             "error": str(e)
         }), 500
 
+@bp.get("/export/turns")
+def export_turns():
+    """
+    Stream conversation turns for offline evaluation, oldest first.
+    Query params:
+      - format: ndjson (default) or csv
+      - scenario_id, since, until (ISO dates; since inclusive, until exclusive), grade
+    Columns match the eval CSVs (turn_transcript, transcript, feedback.tip, ...) minus user_email,
+    which only the CLI export (turn_export.py) includes.
+    Requires Authorization: Bearer <EXPORT_TOKEN>; without EXPORT_TOKEN set the route returns 404.
+    """
+    if not EXPORT_TOKEN:
+        return jsonify({"error": "Export is disabled (set EXPORT_TOKEN to enable it)"}), 404
+    auth = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(auth.encode("utf-8"), f"Bearer {EXPORT_TOKEN}".encode("utf-8")):
+        return jsonify({"error": "Unauthorized"}), 401
+    fmt = (request.args.get("format") or "ndjson").lower()
+    if fmt not in ("ndjson", "csv"):
+        return jsonify({"error": "format must be ndjson or csv (parquet: use python turn_export.py)"}), 400
+    try:
+        query = turn_export.build_filter(
+            request.args.get("scenario_id"),
+            request.args.get("since"),
+            request.args.get("until"),
+            request.args.get("grade"),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    docs = turn_export.iter_turns(db.conversation_turns, query, EXPORT_BATCH_SIZE, turn_export.HTTP_PROJECTION)
+    if fmt == "csv":
+        body, mimetype = turn_export.iter_csv(docs, turn_export.HTTP_COLUMNS), "text/csv"
+    else:
+        body, mimetype = turn_export.iter_ndjson(docs, turn_export.HTTP_COLUMNS), "application/x-ndjson"
+    filename = f"conversation_turns_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M')}.{fmt}"
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}", "Cache-Control": "no-store"},
+    )
+
+# ----------------------------
+# App factory
+# ----------------------------
+def create_app() -> Flask:
+    """
+    Build the Flask app. Cheap: clients are created lazily, and the Mongo ping, client
+    warm-up and index creation run on background threads (see /ready).
+    """
+    global _background_started
+    created = time.perf_counter()
+    flask_app = Flask(__name__)
+    flask_app.config['MAX_CONTENT_LENGTH'] = int(MAX_CONTENT_LENGTH_MB * 1024 * 1024)
+    CORS(flask_app, resources={r"/*": {"origins": os.getenv("CORS_ALLOW_ORIGINS", "*")}})
+    flask_app.register_blueprint(bp)
+
+    if not _background_started:
+        _background_started = True
+        readiness.start()
+        if MONGO_ENSURE_INDEXES:
+            threading.Thread(target=_ensure_indexes_on_startup, name="ensure-indexes", daemon=True).start()
+
+    startup["import_ms"] = int((created - _IMPORT_STARTED) * 1000)
+    startup["create_app_ms"] = int((time.perf_counter() - created) * 1000)
+    startup["started_at"] = datetime.now(timezone.utc).isoformat()
+    print(f"🚀 App created in {startup['create_app_ms']} ms (module import {startup['import_ms']} ms); "
+          "dependency checks running in background, see /ready")
+    return flask_app
+
+
+# gunicorn app:app
+app = create_app()
+
 # ----------------------------
 # Run
 # ----------------------------
@@ -0,0 +1,177 @@
+"""
+A/B benchmark of feedback prompt/model variants on the eval dataset.
+
+Each variant regenerates feedback for every row, the output is judged with
+eval.py's rubric, and variants are compared side by side on judge scores,
+p50/p95 completion latency and prompt/completion tokens from the API usage.
+
+    python benchmark.py --variant current=system_prompt.txt \
+                        --variant short=prompts/short.txt@gpt-4.1-mini
+
+Generations are cached on disk (same SQLite file as the judge cache) keyed by
+model + prompt text + row, so re-running a benchmark after adding a variant only
+pays for the new one. Cached rows keep the latency/usage measured when they
+were generated.
+"""
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+import eval as bespoken_eval
+import regen_and_eval as regen
+from eval_cache import JudgeCache, judgment_key
+from eval_runner import EvalRunner
+from feedback_engine import FeedbackEngine
+from prompt_registry import content_version
+
+
+def parse_variant(spec):
+    """name=prompt_path[@model] → dict; model defaults to REGEN_MODEL."""
+    name, _, rest = spec.partition("=")
+    if not name or not rest:
+        raise argparse.ArgumentTypeError(f"expected name=prompt_path[@model], got {spec!r}")
+    path, _, model = rest.partition("@")
+    prompt_path = Path(path)
+    if not prompt_path.is_absolute() and not prompt_path.exists():
+        prompt_path = Path(__file__).resolve().parent / path
+    try:
+        prompt = prompt_path.read_text(encoding="utf-8")
+    except OSError as e:
+        raise argparse.ArgumentTypeError(f"cannot read prompt for {name}: {e}")
+    return {"name": name, "prompt": prompt, "prompt_path": str(path), "model": model or regen.REGEN_MODEL}
+
+
+def variant_engine(variant):
+    """The production feedback path with this variant's system prompt and model."""
+    return FeedbackEngine(regen.client, model=variant["model"], system_prompt=variant["prompt"])
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; None for an empty list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))  # ceil without floats
+    return ordered[int(rank) - 1]
+
+
+def generate_variant(df, variant, cache, runner):
+    """Regenerate every row with one variant. Returns one {"feedback", "usage", "latency_ms", "cached"} per row."""
+    prompt_hash = content_version(variant["prompt"])
+    engine = variant_engine(variant)
+    rows = [row for _, row in df.iterrows()]
+    messages = [regen.build_user_message(row) for row in rows]
+    keys = [judgment_key(variant["model"], prompt_hash, m, "", "") for m in messages]
+    results = [None] * len(df)
+    todo = []
+    for i, key in enumerate(keys):
+        cached = cache.get(key) if cache else None
+        if cached:
+            results[i] = {**cached, "cached": True}
+        else:
+            todo.append(i)
+    print(f"🧪 {variant['name']}: {len(todo)} generations, {len(df) - len(todo)} from cache")
+
+    def _task(i):
+        feedback, usage, latency_ms = regen.generate(rows[i], engine)
+        result = {"feedback": feedback, "usage": usage, "latency_ms": latency_ms}
+        if cache:
+            cache.put(keys[i], result)
+        return {**result, "cached": False}
+
+    def _failed(exc):
+        print(f"⚠️ Error generating row for {variant['name']}: {exc}")
+        return None
+
+    generated = runner.run(
+        [lambda i=i: _task(i) for i in todo],
+        [bespoken_eval.estimate_tokens([{"content": variant["prompt"]}, {"content": messages[i]}]) + 300 for i in todo],
+        on_error=_failed,
+        desc=f"Generating ({variant['name']})",
+    )
+    for i, result in zip(todo, generated):
+        results[i] = result
+    return results
+
+
+def summarize_variant(variant, generations, eval_df):
+    ok = [g for g in generations if g]
+    latencies = [g["latency_ms"] for g in ok]
+    prompt_tokens = [g["usage"].get("prompt_tokens") or 0 for g in ok]
+    completion_tokens = [g["usage"].get("completion_tokens") or 0 for g in ok]
+    return {
+        "variant": variant["name"],
+        "model": variant["model"],
+        "prompt": variant["prompt_path"],
+        "prompt_version": content_version(variant["prompt"]),
+        "rows": len(generations),
+        "failed": len(generations) - len(ok),
+        "cached": sum(1 for g in ok if g.get("cached")),
+        "tip_score": round(eval_df["tip_score"].mean(), 3),
+        "rewrite_score": round(eval_df["rewrite_score"].mean(), 3),
+        "grade_accuracy": round(eval_df["grade_score"].mean(), 3),
+        "p50_latency_ms": percentile(latencies, 50),
+        "p95_latency_ms": percentile(latencies, 95),
+        "avg_prompt_tokens": round(sum(prompt_tokens) / len(ok), 1) if ok else None,
+        "avg_completion_tokens": round(sum(completion_tokens) / len(ok), 1) if ok else None,
+        "total_tokens": sum(prompt_tokens) + sum(completion_tokens),
+    }
+
+
+def run_benchmark(df, variants, cache=None):
+    runner = EvalRunner(
+        max_workers=bespoken_eval.EVAL_CONCURRENCY,
+        rpm=bespoken_eval.EVAL_RPM,
+        tpm=bespoken_eval.EVAL_TPM,
+        max_retries=bespoken_eval.EVAL_MAX_RETRIES,
+    )
+    summary = []
+    for variant in variants:
+        generations = generate_variant(df, variant, cache, runner)
+        variant_df = df.copy()
+        for field in regen.FEEDBACK_FIELDS:
+            variant_df[f"feedback.{field}_new"] = [
+                regen.clean_text((g["feedback"] if g else {}).get(field, "")) for g in generations
+            ]
+        eval_df = bespoken_eval.evaluate(regen.as_eval_frame(variant_df))
+        summary.append(summarize_variant(variant, generations, eval_df))
+    return pd.DataFrame(summary)
+
+
+def write_benchmark_report(summary, timestamp):
+    md_filename = f"BeSpoken_benchmark_{timestamp}.md"
+    columns = list(summary.columns)
+    with open(md_filename, "w", encoding="utf-8") as md:
+        md.write("# ⏱️ BeSpoken Prompt Benchmark\n\n")
+        md.write(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        md.write("| " + " | ".join(columns) + " |\n")
+        md.write("|" + "---|" * len(columns) + "\n")
+        for _, row in summary.iterrows():
+            md.write("| " + " | ".join("" if pd.isna(row[c]) else str(row[c]) for c in columns) + " |\n")
+    print(f"📄 Benchmark report saved to {md_filename}")
+    return md_filename
+
+
+def main(csv_path, variants):
+    df = bespoken_eval.load_eval_csv(csv_path)
+    cache_path = bespoken_eval.EVAL_CACHE_PATH
+    cache = JudgeCache(cache_path, namespace="generation") if cache_path else None
+    summary = run_benchmark(df, variants, cache)
+
+    print("\n📊 Benchmark:")
+    print(summary.to_string(index=False))
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    summary.to_csv(f"BeSpoken_benchmark_{timestamp}.csv", index=False)
+    write_benchmark_report(summary, timestamp)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare feedback prompt/model variants on quality, latency and tokens.")
+    parser.add_argument("csv_path", nargs="?", default=bespoken_eval.DEFAULT_CSV)
+    parser.add_argument("--variant", action="append", type=parse_variant, dest="variants",
+                        help="name=prompt_path[@model]; repeat for each variant (default: current system_prompt.txt)")
+    args = parser.parse_args()
+    main(args.csv_path, args.variants or [parse_variant("current=system_prompt.txt")])
@@ -0,0 +1,111 @@
+"""
+Per-(user, scenario) cache of the learner's recent transcripts.
+
+The TurnWriter's on_saved hook records every turn here once it is in Mongo, so the
+context window for the next upload is usually answered from memory instead of a
+Mongo find/sort/limit. Like that query, a session keeps only the newest attempt of
+each turn. Each session keeps a bounded buffer of its most recent turns plus a
+"floor": the lowest turn_index from which the buffer is known to be complete. A
+lookup that cannot be answered with certainty is a miss, and the caller hydrates
+the session from Mongo.
+
+The cache only sees turns saved by this process, so it assumes one process per
+instance (render.yaml runs a single gunicorn worker, as jobs.py needs). A lookup only
+counts as a hit when the turn right before turn_index is in the buffer. If another
+worker or instance saved that turn, the lookup misses and hydrates from Mongo
+instead of returning truncated context. Older turns saved elsewhere, or a retry
+saved by another process, can still be missed.
+"""
+import threading
+
+from ttl_cache import TTLCache
+
+
+class _Session:
+    __slots__ = ("floor", "turns")
+
+    def __init__(self, floor, turns: dict):
+        self.floor = floor  # None = complete from the first turn
+        self.turns = turns  # turn_index -> transcript (latest attempt wins)
+
+
+class SessionContextCache:
+    def __init__(self, max_sessions: int = 10000, ttl_sec: float = 1800.0, depth: int = 8):
+        self.depth = depth
+        self._cache = TTLCache(maxsize=max_sessions, ttl_sec=ttl_sec)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _trim(self, session: _Session):
+        if len(session.turns) <= self.depth:
+            return
+        keep = sorted(session.turns)[-self.depth:]
+        session.turns = {ti: session.turns[ti] for ti in keep}
+        session.floor = keep[0]
+
+    def lookup(self, user_id: str, scenario_id: str, turn_index: int, k: int) -> list[str] | None:
+        """
+        Last k learner transcripts before turn_index in chronological order, or None on a miss.
+        Only a hit if turn_index - 1 is buffered, so turns saved by another process fall back to Mongo.
+        """
+        if turn_index <= 1:
+            # Nothing precedes a scenario's first turn
+            with self._lock:
+                self._hits += 1
+            return []
+        session = self._cache.get((user_id, scenario_id))
+        with self._lock:
+            if session is not None and turn_index - 1 in session.turns:
+                earlier = sorted(ti for ti in session.turns if ti < turn_index)
+                if len(earlier) >= k or session.floor is None:
+                    self._hits += 1
+                    return [session.turns[ti] for ti in earlier[-k:]]
+            self._misses += 1
+            return None
+
+    def hydrate(self, user_id: str, scenario_id: str, turn_index: int, k: int, rows: list[tuple[int, str]]):
+        """
+        Merge the result of the Mongo fallback query (turn_index < turn_index, newest k).
+        Fewer than k rows means nothing older exists, so the session becomes complete.
+        """
+        key = (user_id, scenario_id)
+        with self._lock:
+            session = self._cache.get(key)
+            floor = None if len(rows) < k else min(ti for ti, _ in rows)
+            if session is None:
+                session = _Session(floor, {})
+            elif session.floor is not None and (floor is None or floor < session.floor):
+                session.floor = floor
+            for ti, transcript in rows:
+                if transcript:
+                    session.turns.setdefault(ti, transcript)
+            self._trim(session)
+            self._cache.set(key, session)
+
+    def record(self, user_id: str, scenario_id: str, turn_index: int, transcript: str):
+        """Record a freshly saved turn. Unknown sessions are only started from their first turn."""
+        if not transcript:
+            return
+        key = (user_id, scenario_id)
+        with self._lock:
+            session = self._cache.get(key)
+            if session is None:
+                if turn_index > 1:
+                    # Earlier turns may exist in Mongo; let the next lookup hydrate instead
+                    return
+                session = _Session(None, {})
+            session.turns[turn_index] = transcript
+            self._trim(session)
+            self._cache.set(key, session)
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        with self._lock:
+            lookups = self._hits + self._misses
+            stats.update({
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else None,
+            })
+        return stats
@@ -0,0 +1,176 @@
+"""
+MongoDB indexes the app's queries depend on.
+
+INDEXES is the declared index set; ensure_indexes() creates anything missing at
+startup (create_index is idempotent). QUERY_CHECKS mirrors the hot queries in
+app.py, and explain_queries() runs explain() on each to report which ones still
+fall back to a collection scan or an in-memory sort.
+"""
+from pymongo import ASCENDING, DESCENDING
+
+# (collection, keys, options)
+INDEXES = [
+    # get_context_window: user_id + scenario_id equality, turn_index range + sort, newest attempt first
+    ("conversation_turns",
+     [("user_id", ASCENDING), ("scenario_id", ASCENDING), ("turn_index", DESCENDING), ("_id", DESCENDING)],
+     {"name": "user_scenario_turn_id"}),
+    # /analytics/user/<id>: user_id equality, keyset pages newest first
+    ("conversation_turns", [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+     {"name": "user_created_at_id"}),
+    # /analytics/recent: whole collection, keyset pages newest first
+    ("conversation_turns", [("created_at", DESCENDING), ("_id", DESCENDING)],
+     {"name": "created_at_id"}),
+    # /analytics/users and /analytics/scenarios read rollups ordered by their counters
+    ("user_rollups", [("activity_count", DESCENDING)],
+     {"name": "activity_count"}),
+    ("scenario_rollups", [("turn_count", DESCENDING)],
+     {"name": "turn_count"}),
+    # FeedbackCache Mongo tier (FEEDBACK_CACHE_MONGO): lookups are by _id, documents expire at expires_at
+    ("feedback_cache", [("expires_at", ASCENDING)],
+     {"name": "expires_at_ttl", "expireAfterSeconds": 0}),
+    # google_signin: upsert + lookup by google_id
+    ("users", [("google_id", ASCENDING)],
+     {"name": "google_id_unique", "unique": True}),
+]
+
+# Representative shapes of the hot queries; values are placeholders, only the plan matters
+QUERY_CHECKS = [
+    {
+        "name": "context_window",
+        "collection": "conversation_turns",
+        "filter": {"user_id": "_", "scenario_id": "_", "turn_index": {"$lt": 1}},
+        "sort": [("turn_index", DESCENDING), ("_id", DESCENDING)],
+        "limit": 5,
+    },
+    {
+        "name": "analytics_user",
+        "collection": "conversation_turns",
+        "filter": {"user_id": "_"},
+        "sort": [("created_at", DESCENDING), ("_id", DESCENDING)],
+        "limit": 101,
+    },
+    {
+        "name": "analytics_recent",
+        "collection": "conversation_turns",
+        "filter": {},
+        "sort": [("created_at", DESCENDING), ("_id", DESCENDING)],
+        "limit": 21,
+    },
+    {
+        "name": "analytics_users",
+        "collection": "user_rollups",
+        "filter": {},
+        "sort": [("activity_count", DESCENDING)],
+        "limit": 0,
+    },
+    {
+        "name": "analytics_scenarios",
+        "collection": "scenario_rollups",
+        "filter": {},
+        "sort": [("turn_count", DESCENDING)],
+        "limit": 0,
+    },
+    {
+        "name": "google_signin",
+        "collection": "users",
+        "filter": {"google_id": "_"},
+        "sort": None,
+        "limit": 1,
+    },
+]
+
+
+def ensure_indexes(db) -> list[dict]:
+    """Create any declared index that is missing. Returns one status entry per declared index."""
+    results = []
+    existing_by_collection = {}
+    for collection, keys, options in INDEXES:
+        entry = {"collection": collection, "name": options["name"], "keys": [list(k) for k in keys]}
+        try:
+            if collection not in existing_by_collection:
+                existing_by_collection[collection] = db[collection].index_information()
+            existing = existing_by_collection[collection]
+            if options["name"] in existing:
+                entry["status"] = "exists"
+            else:
+                db[collection].create_index(keys, **options)
+                entry["status"] = "created"
+                print(f"🗂️ Created index {collection}.{options['name']}")
+        except Exception as e:
+            entry["status"] = "error"
+            entry["error"] = str(e)
+            print(f"⚠️ Failed to ensure index {collection}.{options['name']}: {e}")
+        results.append(entry)
+    return results
+
+
+def verify_indexes(db) -> list[dict]:
+    """Compare the declared index set with what the server actually has."""
+    results = []
+    for collection, keys, options in INDEXES:
+        entry = {"collection": collection, "name": options["name"]}
+        try:
+            info = db[collection].index_information().get(options["name"])
+            if info is None:
+                entry["status"] = "missing"
+            elif [tuple(k) for k in info["key"]] != [tuple(k) for k in keys]:
+                entry["status"] = "mismatch"
+                entry["actual_keys"] = [list(k) for k in info["key"]]
+            else:
+                entry["status"] = "ok"
+        except Exception as e:
+            entry["status"] = "error"
+            entry["error"] = str(e)
+        results.append(entry)
+    return results
+
+
+def _plan_stages(plan: dict):
+    """Yield every stage dict in an explain plan tree."""
+    if not isinstance(plan, dict):
+        return
+    # Slot-based engine nests the classic plan under queryPlan
+    if "queryPlan" in plan:
+        yield from _plan_stages(plan["queryPlan"])
+        return
+    yield plan
+    if "inputStage" in plan:
+        yield from _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+def summarize_plan(explain: dict) -> dict:
+    """Reduce an explain() document to the facts that matter for index coverage."""
+    winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+    stages = list(_plan_stages(winning))
+    names = [stage.get("stage") for stage in stages]
+    indexes = [stage.get("indexName") for stage in stages if stage.get("indexName")]
+    collscan = "COLLSCAN" in names
+    in_memory_sort = "SORT" in names
+    return {
+        "stages": names,
+        "indexes": indexes,
+        "collscan": collscan,
+        "in_memory_sort": in_memory_sort,
+        "covered": not collscan and not in_memory_sort,
+    }
+
+
+def explain_queries(db) -> list[dict]:
+    """Run explain() for each QUERY_CHECKS entry and report whether an index serves it."""
+    results = []
+    for check in QUERY_CHECKS:
+        entry = {"name": check["name"], "collection": check["collection"]}
+        try:
+            cursor = db[check["collection"]].find(check["filter"])
+            if check["sort"]:
+                cursor = cursor.sort(check["sort"])
+            if check["limit"]:
+                cursor = cursor.limit(check["limit"])
+            entry.update(summarize_plan(cursor.explain()))
+        except Exception as e:
+            entry["error"] = str(e)
+            entry["covered"] = False
+        results.append(entry)
+    return results
@@ -1,4 +1,6 @@
 import os
+import json
+import argparse
 from pathlib import Path
 import pandas as pd
 from tqdm import tqdm
@@ -6,48 +8,171 @@ from datetime import datetime
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from eval_cache import JudgeCache, judgment_key, prompt_version
+from eval_runner import EvalRunner
+
 # ------------------------------
 # Setup
 # ------------------------------
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Retries/backoff are handled by EvalRunner, so the SDK's own retry loop is off
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+EVAL_MODEL = os.getenv("EVAL_MODEL", "gpt-4o-mini")
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "8"))
+EVAL_RPM = int(os.getenv("EVAL_RPM", "500"))
+EVAL_TPM = int(os.getenv("EVAL_TPM", "200000"))
+EVAL_MAX_RETRIES = int(os.getenv("EVAL_MAX_RETRIES", "6"))
+# Judge results are cached here between runs; set EVAL_CACHE_PATH= (empty) to always re-judge
+# separate: one call per field; combined: one JSON-schema call per row judges tip and rewrite together
+# (combined verdicts are cached under their own prompt version, so switching modes re-judges rows)
+EVAL_JUDGE_MODE = os.getenv("EVAL_JUDGE_MODE", "separate")
+EVAL_JUDGE_RATIONALE = os.getenv("EVAL_JUDGE_RATIONALE", "false").lower() == "true"
+EVAL_CACHE_PATH = os.getenv("EVAL_CACHE_PATH", str(Path(__file__).resolve().parent / ".eval_cache.sqlite"))
 
 # ------------------------------
 # Shared ABCDE rubric evaluator (for tip and rewrite)
 # ------------------------------
-def eval_vs_ideal(question, expert, submission):
+JUDGE_SYSTEM_MESSAGE = """\
+You are an evaluation assistant that grades how well a model’s feedback matches an expert (ideal) response.
+Always evaluate in the context of the full conversation between the partner and the learner.
+
+Rules:
+1. If the model feedback addresses a different linguistic issue (e.g., tone vs. vocabulary vs. grammar), treat that as a disagreement (D).
+2. If the model feedback misses or ignores the expert’s main point, treat it as a disagreement (D).
+3. If either the expert or model feedback is missing, mark it as D (unless both are blank → E).
+Output only a single letter from A–E and nothing else.
+"""
+
+JUDGE_OPTIONS = """\
+(A) The model feedback identifies the same issue or correction as the expert, but it is less complete — missing explanation, reasoning, or examples that the expert provides.  
+(B) The model feedback adds extra relevant detail while staying fully consistent with the expert.  
+(C) The model feedback covers the same ideas and explanations as the expert — equally complete and accurate.  
+(D) The model feedback gives different, incorrect, or irrelevant advice.  
+(E) The model feedback only differs stylistically (tone, punctuation, or rephrasing) but conveys the same meaning.
+"""
+
+JUDGE_USER_TEMPLATE = """\
+You are comparing a model-generated feedback message to an expert version.
+Evaluate whether the model’s message provides correct, relevant, and consistent feedback 
+based on the dialogue context between the partner and the learner.
+
+[BEGIN DATA]
+************
+[Conversation Context]
+{question}
+************
+[Expert Feedback]
+{expert}
+************
+[Model Feedback]
+{submission}
+************
+[END DATA]
+
+Compare the factual and semantic content of the model feedback with the expert version.
+Ignore minor stylistic differences (tone, punctuation, formatting).
+
+Choose ONE option:
+
+""" + JUDGE_OPTIONS + """
+
+Output a single capital letter (A–E).
+"""
+
+
+JUDGE_PROMPT_VERSION = prompt_version(JUDGE_SYSTEM_MESSAGE, JUDGE_USER_TEMPLATE)
+
+_judge_cache = None
+
+
+def get_judge_cache():
+    global _judge_cache
+    if _judge_cache is None and EVAL_CACHE_PATH:
+        _judge_cache = JudgeCache(EVAL_CACHE_PATH)
+    return _judge_cache
+
+
+def judge_cache_key(question, expert, submission):
+    return judgment_key(
+        EVAL_MODEL, JUDGE_PROMPT_VERSION, str(question), str(expert or "").strip(), str(submission or "").strip()
+    )
+
+
+def judge_messages(question, expert, submission):
+    """
+    Return (letter, None) when the case is decided without GPT (missing text),
+    otherwise (None, messages) for the judge call.
+    """
     # Handle missing or placeholder text cases first
     expert = str(expert or "").strip()
     submission = str(submission or "").strip()
 
     # Case 1: both missing → skip scoring (E)
     if not expert and not submission:
-        return "E"
+        return "E", None
 
     # Case 2: model missing but expert exists → D
     if not submission and expert:
-        return "D"
+        return "D", None
 
     # Case 3: expert missing but model exists → D
     if not expert and submission:
-        return "D"
+        return "D", None
+
+    user_message = JUDGE_USER_TEMPLATE.format(question=question, expert=expert, submission=submission)
+    return None, [
+        {"role": "system", "content": JUDGE_SYSTEM_MESSAGE},
+        {"role": "user", "content": user_message},
+    ]
+
+
+def estimate_tokens(messages):
+    """Rough prompt size for rate limiting (~4 chars per token) plus the one-letter answer."""
+    if not messages:
+        return 0
+    return sum(len(m["content"]) for m in messages) // 4 + 8
+
+
+def call_judge(messages):
+    response = client.chat.completions.create(
+        model=EVAL_MODEL,
+        messages=messages,
+    )
+    return response.choices[0].message.content.strip()[0]
 
-    # ------------------------------
-    # System + user prompt for GPT
-    # ------------------------------
-    system_message = """\
+
+def eval_vs_ideal(question, expert, submission):
+    letter, messages = judge_messages(question, expert, submission)
+    if letter:
+        return letter
+    cache = get_judge_cache()
+    key = judge_cache_key(question, expert, submission)
+    cached = cache.get(key) if cache else None
+    if cached:
+        return cached
+    letter = call_judge(messages)
+    if cache and letter in VALID_LETTERS:
+        cache.put(key, letter)
+    return letter
+
+
+# ------------------------------
+# Combined judge: tip + rewrite in one structured call
+# ------------------------------
+COMBINED_SYSTEM_MESSAGE = """\
 You are an evaluation assistant that grades how well a model’s feedback matches an expert (ideal) response.
 Always evaluate in the context of the full conversation between the partner and the learner.
+You grade the tip, the rewrite, or both for the same learner reply. Grade each one independently.
 
 Rules:
 1. If the model feedback addresses a different linguistic issue (e.g., tone vs. vocabulary vs. grammar), treat that as a disagreement (D).
 2. If the model feedback misses or ignores the expert’s main point, treat it as a disagreement (D).
 3. If either the expert or model feedback is missing, mark it as D (unless both are blank → E).
-Output only a single letter from A–E and nothing else.
 """
 
-    user_message = f"""\
-You are comparing a model-generated feedback message to an expert version.
+COMBINED_USER_TEMPLATE = """\
+For {each}, compare the model-generated version to the expert version.
 Evaluate whether the model’s message provides correct, relevant, and consistent feedback 
 based on the dialogue context between the partner and the learner.
 
@@ -56,59 +181,122 @@ based on the dialogue context between the partner and the learner.
 [Conversation Context]
 {question}
 ************
-[Expert Feedback]
-{expert}
-************
-[Model Feedback]
-{submission}
-************
-[END DATA]
+{sections}[END DATA]
 
 Compare the factual and semantic content of the model feedback with the expert version.
 Ignore minor stylistic differences (tone, punctuation, formatting).
 
-Choose ONE option:
-
-(A) The model feedback identifies the same issue or correction as the expert, but it is less complete — missing explanation, reasoning, or examples that the expert provides.  
-(B) The model feedback adds extra relevant detail while staying fully consistent with the expert.  
-(C) The model feedback covers the same ideas and explanations as the expert — equally complete and accurate.  
-(D) The model feedback gives different, incorrect, or irrelevant advice.  
-(E) The model feedback only differs stylistically (tone, punctuation, or rephrasing) but conveys the same meaning.
+Choose ONE option for {choices}:
 
+""" + JUDGE_OPTIONS
 
-Output a single capital letter (A–E).
+# One per judged field; fields already decided by the missing-text rules are left out of the prompt
+COMBINED_FIELD_SECTION = """\
+[Expert {label}]
+{expert}
+************
+[Model {label}]
+{submission}
+************
 """
 
+JUDGED_FIELDS = ("tip", "rewrite")
+
+
+def _combined_schema(with_rationale, fields=JUDGED_FIELDS):
+    properties = {field: {"type": "string", "enum": sorted("ABCDE")} for field in fields}
+    if with_rationale:
+        properties["rationale"] = {"type": "string", "description": "One short sentence explaining the labels."}
+    return {
+        "name": "feedback_judgment",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": properties,
+            "required": list(properties),
+            "additionalProperties": False,
+        },
+    }
+
+
+COMBINED_PROMPT_VERSION = prompt_version(
+    COMBINED_SYSTEM_MESSAGE, COMBINED_USER_TEMPLATE, COMBINED_FIELD_SECTION,
+    json.dumps(_combined_schema(EVAL_JUDGE_RATIONALE)),
+)
+
+
+def combined_judge_messages(row):
+    """
+    Return (letters, messages). letters holds the fields decided without GPT (missing text);
+    only the other fields are sent to the judge, and messages is None when none are left.
+    """
+    question = judge_inputs(row, "tip")[0]
+    letters, sections = {}, []
+    for field in JUDGED_FIELDS:
+        _, expert, submission = judge_inputs(row, field)
+        letter, _ = judge_messages(question, expert, submission)
+        if letter:
+            letters[field] = letter
+            continue
+        sections.append(COMBINED_FIELD_SECTION.format(
+            label=field.capitalize(), expert=str(expert or "").strip(), submission=str(submission or "").strip()
+        ))
+    if not sections:
+        return letters, None
+
+    names = [f"the {field}" for field in JUDGED_FIELDS if field not in letters]
+    user_message = COMBINED_USER_TEMPLATE.format(
+        each=names[0] if len(names) == 1 else "each of " + " and ".join(names),
+        question=question,
+        sections="".join(sections),
+        choices=" and ONE option for ".join(names),
+    )
+    return letters, [
+        {"role": "system", "content": COMBINED_SYSTEM_MESSAGE},
+        {"role": "user", "content": user_message},
+    ]
+
+
+def combined_cache_key(row):
+    question, tip_expert, tip_submission = judge_inputs(row, "tip")
+    _, rewrite_expert, rewrite_submission = judge_inputs(row, "rewrite")
+    return judgment_key(
+        EVAL_MODEL,
+        COMBINED_PROMPT_VERSION,
+        str(question),
+        json.dumps([str(tip_expert or "").strip(), str(rewrite_expert or "").strip()], ensure_ascii=False),
+        json.dumps([str(tip_submission or "").strip(), str(rewrite_submission or "").strip()], ensure_ascii=False),
+    )
+
+
+def call_combined_judge(messages, fields=JUDGED_FIELDS):
+    """One schema-constrained call; returns {field: letter for each judged field[, "rationale": str]}."""
     response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": user_message},
-        ],
+        model=EVAL_MODEL,
+        messages=messages,
+        response_format={"type": "json_schema", "json_schema": _combined_schema(EVAL_JUDGE_RATIONALE, fields)},
     )
+    return json.loads(response.choices[0].message.content)
+
 
-    return response.choices[0].message.content.strip()[0]
 # ------------------------------
 # Specialized evaluation functions
 # ------------------------------
-def eval_tip(row):
+def judge_inputs(row, field):
+    """(question, expert, submission) for judging feedback.<field> against feedback.<field>_ideal."""
     question = (
         f"Partner said: {row.get('turn_transcript', '')}\n"
         f"Learner replied: {row.get('transcript', '')}"
     )
-    expert = row.get("feedback.tip_ideal", "")
-    submission = row.get("feedback.tip", "")
-    return eval_vs_ideal(question, expert, submission)
+    return question, row.get(f"feedback.{field}_ideal", ""), row.get(f"feedback.{field}", "")
+
+
+def eval_tip(row):
+    return eval_vs_ideal(*judge_inputs(row, "tip"))
 
 
 def eval_rewrite(row):
-    question = (
-        f"Partner said: {row.get('turn_transcript', '')}\n"
-        f"Learner replied: {row.get('transcript', '')}"
-    )
-    expert = row.get("feedback.rewrite_ideal", "")
-    submission = row.get("feedback.rewrite", "")
-    return eval_vs_ideal(question, expert, submission)
+    return eval_vs_ideal(*judge_inputs(row, "rewrite"))
 
 
 # ------------------------------
@@ -123,19 +311,6 @@ def eval_grade(row):
     return 1.0 if model_grade == ideal_grade else 0.0
 
 
-# ------------------------------
-# Run evaluation
-# ------------------------------
-csv_path = Path(__file__).resolve().parent.parent / "BeSpoken_eval.csv"
-
-try:
-    df = pd.read_csv(csv_path, encoding="utf-8-sig")
-except UnicodeDecodeError:
-    print("⚠️ UTF-8 decode failed; retrying with latin-1 encoding.")
-    df = pd.read_csv(csv_path, encoding="latin1")
-
-print("🔍 Running BeSpoken Evaluation (context-aware ABCDE rubric)...")
-
 VALID_LETTERS = {"A", "B", "C", "D", "E"}
 
 
@@ -149,104 +324,246 @@ def extract_label(raw_value):
     return "?"
 
 
-def safe_eval(func, row):
-    try:
-        raw = func(row)
+def _failed_judgment(exc):
+    print(f"⚠️ Evaluation error: {exc}")
+    return "?"
+
+
+def judge_rows(df, fields=("tip", "rewrite"), runner=None, cache=None):
+    """
+    Judge every row for every field in one concurrent, rate-limited pool.
+    Verdicts already in the judge cache are reused without an API call.
+    Returns {field: [letter per row]} in row order.
+    """
+    runner = runner or EvalRunner(
+        max_workers=EVAL_CONCURRENCY, rpm=EVAL_RPM, tpm=EVAL_TPM, max_retries=EVAL_MAX_RETRIES
+    )
+    cache = cache or get_judge_cache()
+    letters = {field: [None] * len(df) for field in fields}
+    tasks, estimates, slots = [], [], []
+    for position, (_, row) in enumerate(df.iterrows()):
+        for field in fields:
+            inputs = judge_inputs(row, field)
+            letter, messages = judge_messages(*inputs)
+            if letter:
+                letters[field][position] = letter
+                continue
+            key = judge_cache_key(*inputs)
+            cached = cache.get(key) if cache else None
+            if cached:
+                letters[field][position] = cached
+                continue
+            tasks.append(lambda messages=messages, key=key: _judge_and_store(messages, key, cache))
+            estimates.append(estimate_tokens(messages))
+            slots.append((field, position))
+
+    results = runner.run(tasks, estimates, on_error=_failed_judgment, desc="Judging")
+    for (field, position), raw in zip(slots, results):
         letter = extract_label(raw)
-        if letter == "?":
+        if letter == "?" and raw != "?":
             print(f"⚠️ Unexpected evaluator output: {raw}")
-        return letter
-    except Exception as exc:
-        print(f"⚠️ Evaluation error: {exc}")
-        return "?"
-
+        letters[field][position] = letter
+    print(f"⚙️ Judge calls: {runner.stats()}")
+    if cache:
+        print(f"🗃️ Judge cache: {cache.stats()}")
+    return letters
+
+
+def _judge_and_store(messages, key, cache):
+    raw = call_judge(messages)
+    letter = extract_label(raw)
+    # Stored as soon as it lands, so an interrupted run keeps what it already paid for
+    if cache and letter != "?":
+        cache.put(key, letter)
+    return raw
+
+
+def judge_rows_combined(df, runner=None, cache=None):
+    """
+    Combined mode: one structured judge call per row for both tip and rewrite.
+    Returns {"tip": [...], "rewrite": [...], "rationale": [...]} in row order.
+    """
+    runner = runner or EvalRunner(
+        max_workers=EVAL_CONCURRENCY, rpm=EVAL_RPM, tpm=EVAL_TPM, max_retries=EVAL_MAX_RETRIES
+    )
+    cache = cache or get_judge_cache()
+    results = {"tip": [None] * len(df), "rewrite": [None] * len(df), "rationale": [""] * len(df)}
+    tasks, estimates, slots = [], [], []
+    for position, (_, row) in enumerate(df.iterrows()):
+        letters, messages = combined_judge_messages(row)
+        if messages is None:
+            verdict = letters
+        else:
+            key = combined_cache_key(row)
+            verdict = cache.get(key) if cache else None
+            if verdict is None:
+                fields = tuple(field for field in JUDGED_FIELDS if field not in letters)
+                tasks.append(lambda messages=messages, key=key, fields=fields:
+                             _combined_judge_and_store(messages, key, cache, fields))
+                estimates.append(estimate_tokens(messages) + (40 if EVAL_JUDGE_RATIONALE else 10))
+                slots.append((position, letters))
+                continue
+            verdict = {**verdict, **letters}
+        _record_verdict(results, position, verdict)
+
+    verdicts = runner.run(tasks, estimates, on_error=_failed_combined_judgment, desc="Judging")
+    for (position, letters), verdict in zip(slots, verdicts):
+        # Missing-text rules win over the model for the field they decide
+        _record_verdict(results, position, {**verdict, **letters})
+    print(f"⚙️ Judge calls: {runner.stats()}")
+    if cache:
+        print(f"🗃️ Judge cache: {cache.stats()}")
+    return results
+
+
+def _record_verdict(results, position, verdict):
+    for field in ("tip", "rewrite"):
+        letter = verdict.get(field)
+        results[field][position] = letter if letter in VALID_LETTERS else "?"
+    results["rationale"][position] = verdict.get("rationale", "")
+
+
+def _combined_judge_and_store(messages, key, cache, fields=JUDGED_FIELDS):
+    verdict = call_combined_judge(messages, fields)
+    if cache and all(verdict.get(field) in VALID_LETTERS for field in fields):
+        cache.put(key, verdict)
+    return verdict
+
+
+def _failed_combined_judgment(exc):
+    print(f"⚠️ Evaluation error: {exc}")
+    return {}
 
-df["eval_tip"] = [safe_eval(eval_tip, row) for _, row in tqdm(df.iterrows(), total=len(df))]
-df["eval_rewrite"] = [safe_eval(eval_rewrite, row) for _, row in tqdm(df.iterrows(), total=len(df))]
-df["grade_score"] = [eval_grade(row) for _, row in tqdm(df.iterrows(), total=len(df))]
 
 # ------------------------------
 # Scoring rubric
 # ------------------------------
 score_map = {"A": 0.8, "B": 0.8, "C": 1.0, "E": 1.0, "D": 0.0}
-df["tip_score"] = df["eval_tip"].map(score_map).fillna(0)
-df["rewrite_score"] = df["eval_rewrite"].map(score_map).fillna(0)
 
-# ------------------------------
-# Summary
-# ------------------------------
-print("\n📊 Summary:")
-print(f"✅ Grade match accuracy: {df['grade_score'].mean():.2%}")
-print(f"💡 Average tip score: {df['tip_score'].mean():.2f}")
-print(f"✍️ Average rewrite score: {df['rewrite_score'].mean():.2f}")
-
-for col in ["eval_tip", "eval_rewrite"]:
-    print(f"\n{col} distribution:")
-    print(df[col].value_counts())
 
-out_name = f"bespoken_eval_results_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
-df.to_csv(out_name, index=False)
-print(f"\n💾 Results saved to {out_name}")
+def load_eval_csv(csv_path):
+    try:
+        return pd.read_csv(csv_path, encoding="utf-8-sig")
+    except UnicodeDecodeError:
+        print("⚠️ UTF-8 decode failed; retrying with latin-1 encoding.")
+        return pd.read_csv(csv_path, encoding="latin1")
+
+
+def evaluate(df, runner=None, mode=None):
+    """Add eval_tip/eval_rewrite/grade_score and the derived score columns to df."""
+    mode = mode or EVAL_JUDGE_MODE
+    if mode == "combined":
+        letters = judge_rows_combined(df, runner)
+        if EVAL_JUDGE_RATIONALE:
+            df["eval_rationale"] = letters["rationale"]
+    else:
+        letters = judge_rows(df, ("tip", "rewrite"), runner)
+    df["eval_tip"] = letters["tip"]
+    df["eval_rewrite"] = letters["rewrite"]
+    df["grade_score"] = [eval_grade(row) for _, row in tqdm(df.iterrows(), total=len(df))]
+    df["tip_score"] = df["eval_tip"].map(score_map).fillna(0)
+    df["rewrite_score"] = df["eval_rewrite"].map(score_map).fillna(0)
+    return df
+
+
+def print_summary(df):
+    print("\n📊 Summary:")
+    print(f"✅ Grade match accuracy: {df['grade_score'].mean():.2%}")
+    print(f"💡 Average tip score: {df['tip_score'].mean():.2f}")
+    print(f"✍️ Average rewrite score: {df['rewrite_score'].mean():.2f}")
+
+    for col in ["eval_tip", "eval_rewrite"]:
+        print(f"\n{col} distribution:")
+        print(df[col].value_counts())
 
 
 # ------------------------------
 # Markdown report generation
 # ------------------------------
-avg_tip = df["tip_score"].mean()
-avg_rewrite = df["rewrite_score"].mean()
-avg_grade = df["grade_score"].mean()
+def write_markdown_report(df):
+    avg_tip = df["tip_score"].mean()
+    avg_rewrite = df["rewrite_score"].mean()
+    avg_grade = df["grade_score"].mean()
 
-timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-md_filename = f"BeSpoken_eval_report_{timestamp}.md"
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    md_filename = f"BeSpoken_eval_report_{timestamp}.md"
 
-df["avg_score"] = df[["tip_score", "rewrite_score", "grade_score"]].mean(axis=1)
-lowest_rows = df.sort_values("avg_score").head(5)
+    df["avg_score"] = df[["tip_score", "rewrite_score", "grade_score"]].mean(axis=1)
+    lowest_rows = df.sort_values("avg_score").head(5)
 
-with open(md_filename, "w") as md:
-    md.write(f"# 🧩 BeSpoken Evaluation Report\n\n")
-    md.write(f"**Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-    md.write(f"**Total Samples:** {len(df)}\n\n")
+    with open(md_filename, "w") as md:
+        md.write(f"# 🧩 BeSpoken Evaluation Report\n\n")
+        md.write(f"**Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        md.write(f"**Total Samples:** {len(df)}\n\n")
 
-    md.write("## 📊 Overall Scores\n\n")
-    md.write(f"- **Tip Score (avg):** {df['tip_score'].mean():.2f}\n")
-    md.write(f"- **Rewrite Score (avg):** {df['rewrite_score'].mean():.2f}\n")
-    md.write(f"- **Grade Accuracy:** {df['grade_score'].mean():.2f}\n\n")
+        md.write("## 📊 Overall Scores\n\n")
+        md.write(f"- **Tip Score (avg):** {df['tip_score'].mean():.2f}\n")
+        md.write(f"- **Rewrite Score (avg):** {df['rewrite_score'].mean():.2f}\n")
+        md.write(f"- **Grade Accuracy:** {df['grade_score'].mean():.2f}\n\n")
+
+        md.write("## 🧠 All Evaluation Examples\n\n")
+        df["avg_score"] = df[["tip_score", "rewrite_score", "grade_score"]].mean(axis=1)
+
+        # Sort by scenario or average score if you prefer
+        sorted_df = df.sort_values(by=["scenario_title", "avg_score"], ascending=[True, False])
+
+        for i, row in sorted_df.iterrows():
+            md.write(f"### Example {i+1}\n\n")
+            md.write(f"**🧭 Scenario:** {row.get('scenario_title', 'N/A')}\n\n")
+            md.write(f"**🗣 Partner said:** {row.get('turn_transcript', '')}\n\n")
+            md.write(f"**👩‍🎓 Learner said:** {row.get('transcript', '')}\n\n")
+
+            # Handle NaN or None text cleanly
+            tip = row.get('feedback.tip', '') or "(none)"
+            tip_ideal = row.get('feedback.tip_ideal', '') or "(none)"
+            rewrite = row.get('feedback.rewrite', '') or "(none)"
+            rewrite_ideal = row.get('feedback.rewrite_ideal', '') or "(none)"
+            grade = row.get('feedback.grade', '') or "(none)"
+            grade_ideal = row.get('feedback.grade_ideal', '') or "(none)"
+
+            md.write(f"**💬 Model Tip:** {tip}\n\n")
+            md.write(f"**🎯 Ideal Tip:** {tip_ideal}\n\n")
+            md.write(f"**🧪 Eval Tip:** {row.get('eval_tip', '?')}\n\n")
+            md.write(f"**📈 Tip Score:** {row.get('tip_score', 0):.2f}\n\n")
+
+            md.write(f"**✏️ Model Rewrite:** {rewrite}\n\n")
+            md.write(f"**🏆 Ideal Rewrite:** {rewrite_ideal}\n\n")
+            md.write(f"**🧪 Eval Rewrite:** {row.get('eval_rewrite', '?')}\n\n")
+            md.write(f"**📈 Rewrite Score:** {row.get('rewrite_score', 0):.2f}\n\n")
+
+            md.write(f"**✅ Model Grade:** {grade}\n\n")
+            md.write(f"**🎯 Ideal Grade:** {grade_ideal}\n\n")
+            md.write(f"**🧪 Grade Score:** {row.get('grade_score', 0):.2f}\n\n")
+
+            md.write(f"**Overall Score:** {row['avg_score']:.2f}\n\n")
+            md.write("---\n\n")
+
+    print(f"📄 Markdown report saved to {md_filename}")
+    return md_filename
+
+
+DEFAULT_CSV = Path(__file__).resolve().parent.parent / "BeSpoken_eval.csv"
+
+
+def main(csv_path=DEFAULT_CSV, mode=None):
+    df = load_eval_csv(csv_path)
+
+    print(f"🔍 Running BeSpoken Evaluation (context-aware ABCDE rubric, {mode or EVAL_JUDGE_MODE} judge)...")
+    evaluate(df, mode=mode)
+    print_summary(df)
+
+    out_name = f"bespoken_eval_results_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+    df.to_csv(out_name, index=False)
+    print(f"\n💾 Results saved to {out_name}")
+
+    write_markdown_report(df)
+    return df
 
-    md.write("## 🧠 All Evaluation Examples\n\n")
-    df["avg_score"] = df[["tip_score", "rewrite_score", "grade_score"]].mean(axis=1)
 
-    # Sort by scenario or average score if you prefer
-    sorted_df = df.sort_values(by=["scenario_title", "avg_score"], ascending=[True, False])
-
-    for i, row in sorted_df.iterrows():
-        md.write(f"### Example {i+1}\n\n")
-        md.write(f"**🧭 Scenario:** {row.get('scenario_title', 'N/A')}\n\n")
-        md.write(f"**🗣 Partner said:** {row.get('turn_transcript', '')}\n\n")
-        md.write(f"**👩‍🎓 Learner said:** {row.get('transcript', '')}\n\n")
-
-        # Handle NaN or None text cleanly
-        tip = row.get('feedback.tip', '') or "(none)"
-        tip_ideal = row.get('feedback.tip_ideal', '') or "(none)"
-        rewrite = row.get('feedback.rewrite', '') or "(none)"
-        rewrite_ideal = row.get('feedback.rewrite_ideal', '') or "(none)"
-        grade = row.get('feedback.grade', '') or "(none)"
-        grade_ideal = row.get('feedback.grade_ideal', '') or "(none)"
-
-        md.write(f"**💬 Model Tip:** {tip}\n\n")
-        md.write(f"**🎯 Ideal Tip:** {tip_ideal}\n\n")
-        md.write(f"**🧪 Eval Tip:** {row.get('eval_tip', '?')}\n\n")
-        md.write(f"**📈 Tip Score:** {row.get('tip_score', 0):.2f}\n\n")
-
-        md.write(f"**✏️ Model Rewrite:** {rewrite}\n\n")
-        md.write(f"**🏆 Ideal Rewrite:** {rewrite_ideal}\n\n")
-        md.write(f"**🧪 Eval Rewrite:** {row.get('eval_rewrite', '?')}\n\n")
-        md.write(f"**📈 Rewrite Score:** {row.get('rewrite_score', 0):.2f}\n\n")
-
-        md.write(f"**✅ Model Grade:** {grade}\n\n")
-        md.write(f"**🎯 Ideal Grade:** {grade_ideal}\n\n")
-        md.write(f"**🧪 Grade Score:** {row.get('grade_score', 0):.2f}\n\n")
-
-        md.write(f"**Overall Score:** {row['avg_score']:.2f}\n\n")
-        md.write("---\n\n")
-
-print(f"📄 Markdown report saved to {md_filename}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate BeSpoken feedback against expert answers.")
+    parser.add_argument("csv_path", nargs="?", default=DEFAULT_CSV)
+    parser.add_argument("--judge-mode", choices=["combined", "separate"], default=None,
+                        help="separate (default): one call per field; combined: one structured call per row")
+    args = parser.parse_args()
+    main(args.csv_path, args.judge_mode)
@@ -0,0 +1,77 @@
+"""
+On-disk cache of judge results, so eval reruns only pay for rows that changed.
+
+Keys hash everything the verdict depends on: judge model, judge prompt version,
+conversation context, expert text and submission text. Change any of them and
+the row is judged again; otherwise the stored letter is reused. Backed by SQLite
+so it survives between runs and is safe to share across the runner's threads.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+def prompt_version(*parts: str) -> str:
+    """Short content hash of the judge prompt text; editing the prompt changes the version."""
+    return hashlib.sha256("\x1e".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
+def judgment_key(model: str, version: str, question: str, expert: str, submission: str) -> str:
+    payload = json.dumps([model, version, question, expert, submission], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class JudgeCache:
+    def __init__(self, path: str, namespace: str = "judge"):
+        self.path = path
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS judgments ("
+            " key TEXT PRIMARY KEY,"
+            " namespace TEXT NOT NULL,"
+            " result TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM judgments WHERE key = ?", (self._key(key),)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, result):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO judgments (key, namespace, result, created_at) VALUES (?, ?, ?, ?)",
+                (self._key(key), self.namespace, json.dumps(result, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
@@ -0,0 +1,164 @@
+"""
+Concurrent runner for LLM evaluation calls.
+
+Every judge call of a run (tips and rewrites for all rows) goes through one
+bounded thread pool. Calls are admitted by a shared requests/tokens-per-minute
+limiter, 429/5xx/connection errors are retried with exponential backoff (honoring
+Retry-After), and results come back in the order the tasks were given, no matter
+which call finishes first.
+
+    runner = EvalRunner(max_workers=8, rpm=500, tpm=200_000)
+    results = runner.run([lambda: judge(a), lambda: judge(b)], token_estimates=[900, 900])
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+except ImportError:  # runner still works for non-OpenAI callables
+    APIConnectionError = APIStatusError = APITimeoutError = RateLimitError = None
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
+
+
+class RateLimiter:
+    """Sliding one-minute window over requests and (estimated) tokens, shared by all workers."""
+
+    def __init__(self, rpm: int | None = None, tpm: int | None = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._lock = threading.Lock()
+        self._events = deque()  # (timestamp, tokens)
+        self._tokens_in_window = 0
+        self.waited_sec = 0.0
+
+    def _expire(self, now: float):
+        while self._events and now - self._events[0][0] >= 60.0:
+            _, tokens = self._events.popleft()
+            self._tokens_in_window -= tokens
+
+    def acquire(self, tokens: int = 0):
+        """Block until one more request of `tokens` tokens fits in the last minute."""
+        if self.tpm:
+            tokens = min(tokens, self.tpm)  # one oversized request must still be able to run
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._expire(now)
+                over_rpm = self.rpm and len(self._events) >= self.rpm
+                over_tpm = self.tpm and self._tokens_in_window + tokens > self.tpm
+                if not over_rpm and not over_tpm:
+                    self._events.append((now, tokens))
+                    self._tokens_in_window += tokens
+                    return
+                # Oldest event leaving the window is the earliest anything can change
+                wait = max(60.0 - (now - self._events[0][0]), 0.01)
+                self.waited_sec += wait
+            time.sleep(wait)
+
+
+def is_retryable(e: Exception) -> bool:
+    if RateLimitError is None:
+        return False
+    if isinstance(e, (RateLimitError, APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(e, APIStatusError) and e.status_code >= 500
+
+
+def _retry_after(e: Exception) -> float | None:
+    response = getattr(e, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class EvalRunner:
+    def __init__(
+        self,
+        max_workers: int = 8,
+        rpm: int | None = None,
+        tpm: int | None = None,
+        max_retries: int = 6,
+        base_delay_sec: float = 1.0,
+        max_delay_sec: float = 60.0,
+        progress: bool = True,
+    ):
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rpm, tpm)
+        self.max_retries = max_retries
+        self.base_delay_sec = base_delay_sec
+        self.max_delay_sec = max_delay_sec
+        self.progress = progress
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    def call(self, fn, tokens: int = 0):
+        """Run fn() under the rate limiter, retrying transient API errors with backoff."""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(tokens)
+            with self._lock:
+                self.calls += 1
+            try:
+                return fn()
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = min(self.base_delay_sec * (2 ** attempt), self.max_delay_sec)
+                    delay *= random.uniform(0.5, 1.0)  # jitter so workers don't retry in lockstep
+                with self._lock:
+                    self.retries += 1
+                print(f"⚠️ {type(e).__name__} (attempt {attempt + 1}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def run(self, tasks: list, token_estimates: list[int] | None = None, on_error=None, desc: str = "Evaluating") -> list:
+        """
+        Run zero-argument callables concurrently and return their results in task order.
+        A task that still fails after retries yields on_error(exception) (re-raised if on_error is None).
+        """
+        estimates = token_estimates or [0] * len(tasks)
+        results = [None] * len(tasks)
+        bar = tqdm(total=len(tasks), desc=desc) if self.progress and tqdm else None
+
+        def _run_one(index: int):
+            try:
+                results[index] = self.call(tasks[index], estimates[index])
+            except Exception as e:
+                with self._lock:
+                    self.failures += 1
+                if on_error is None:
+                    raise
+                results[index] = on_error(e)
+            finally:
+                if bar is not None:
+                    bar.update(1)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="eval") as pool:
+                futures = [pool.submit(_run_one, i) for i in range(len(tasks))]
+                for future in futures:
+                    future.result()
+        finally:
+            if bar is not None:
+                bar.close()
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": self.failures,
+                "rate_limit_wait_sec": round(self.limiter.waited_sec, 1),
+            }
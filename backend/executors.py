@@ -0,0 +1,155 @@
+"""
+Named, app-lifetime thread pools for the I/O stages of the upload pipeline.
+
+Each StagePool admits at most max_workers running + max_pending queued tasks.
+Beyond that, submit() fails fast with PoolSaturated (surfaced as 503 + Retry-After)
+instead of letting work pile up without bound. Pools record wait and run times so
+worker counts can be sized per instance from /metrics.
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+class PoolSaturated(RuntimeError):
+    """Raised when a stage pool has no free slot within its admission timeout."""
+
+    def __init__(self, pool_name: str, retry_after_sec: int):
+        super().__init__(f"Server busy: {pool_name} pool is saturated. Retry in {retry_after_sec}s.")
+        self.pool_name = pool_name
+        self.retry_after_sec = retry_after_sec
+
+
+class StagePool:
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_pending: int = 0,
+        admit_timeout_sec: float = 0.0,
+        retry_after_sec: int = 2,
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.admit_timeout_sec = admit_timeout_sec
+        self.retry_after_sec = retry_after_sec
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so forked gunicorn workers build their own threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=f"{self.name}-pool"
+                )
+            return self._executor
+
+    def _admit(self):
+        if self.admit_timeout_sec > 0:
+            admitted = self._slots.acquire(timeout=self.admit_timeout_sec)
+        else:
+            admitted = self._slots.acquire(blocking=False)
+        if not admitted:
+            with self._lock:
+                self._rejected += 1
+            raise PoolSaturated(self.name, self.retry_after_sec)
+        with self._lock:
+            self._in_flight += 1
+            self._submitted += 1
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _run(self, fn, args, kwargs, admitted_at: float):
+        started = time.perf_counter()
+        wait = started - admitted_at
+        with self._lock:
+            self._active += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+                self._run_total += time.perf_counter() - started
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Run fn on the pool. Raises PoolSaturated if no slot is free."""
+        self._admit()
+        admitted_at = time.perf_counter()
+        try:
+            future = self._get_executor().submit(self._run, fn, args, kwargs, admitted_at)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _f: self._release())
+        return future
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold a slot while running on the caller's thread (e.g. a streamed completion
+        that has to be consumed by the request generator). Raises PoolSaturated if none is free.
+        """
+        self._admit()
+        started = time.perf_counter()
+        with self._lock:
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+                self._run_total += time.perf_counter() - started
+            self._release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self._completed or 1
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "active": self._active,
+                "queued": max(0, self._in_flight - self._active),
+                "utilization": round(self._active / self.max_workers, 3) if self.max_workers else 0.0,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_total / completed * 1000, 1),
+                "max_wait_ms": round(self._wait_max * 1000, 1),
+                "avg_run_ms": round(self._run_total / completed * 1000, 1),
+            }
+
+
+class StagePools:
+    """Registry of the process-wide stage pools, keyed by name."""
+
+    def __init__(self):
+        self._pools = {}
+
+    def add(self, pool: StagePool) -> StagePool:
+        self._pools[pool.name] = pool
+        return pool
+
+    def __getitem__(self, name: str) -> StagePool:
+        return self._pools[name]
+
+    def stats(self) -> dict:
+        return {name: pool.stats() for name, pool in self._pools.items()}
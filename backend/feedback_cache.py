@@ -0,0 +1,191 @@
+"""
+Exact-match cache of generated feedback, so repeated short answers skip GPT.
+
+Learners often give the same reply to the same turn ("Hey, what's up?"). The key
+hashes everything the feedback depends on: scenario_id, turn_index, the
+normalized transcript, a fingerprint of the prompt context (turn text + context
+window), the system prompt version and the model. Lookups go to an in-process
+LRU/TTL cache first, then (optionally) a shared Mongo collection whose documents
+expire through a TTL index. Concurrent misses for the same key share one
+upstream call via SingleFlight.
+"""
+import copy
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from singleflight import SingleFlight
+from ttl_cache import TTLCache
+
+_PUNCTUATION = re.compile(r"[^\w\s']")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_transcript(text: str | None) -> str:
+    """Case, punctuation and whitespace-insensitive form of a transcript ("Hey, what's up?" == "hey what's up")."""
+    text = unicodedata.normalize("NFKC", text or "").replace("’", "'").casefold()
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def retarget_highlights(feedback: dict, transcript: str) -> dict:
+    """
+    Rebuild highlight_tokens over this transcript's own words (the frontend renders the
+    tokens in place of the transcript). Words the cached feedback colored keep their
+    color; unseen words inherit green, since only matching or green answers are reused.
+    """
+    colors = {}
+    for token in feedback.get("highlight_tokens") or []:
+        for word in str(token.get("token", "")).split():
+            colors.setdefault(normalize_transcript(word), token.get("color", "green"))
+    feedback["highlight_tokens"] = [
+        {"token": word, "color": colors.get(normalize_transcript(word), "green")}
+        for word in (transcript or "").split()
+    ]
+    return feedback
+
+
+def context_fingerprint(
+    scenario_title: str | None = None,
+    scenario_description: str | None = None,
+    turn_transcript: str | None = None,
+    context_window: dict | None = None,
+) -> str:
+    """Short hash of the prompt context besides the transcript; a catalog edit or new history changes it."""
+    window = context_window or {}
+    payload = json.dumps(
+        [scenario_title, scenario_description, turn_transcript,
+         window.get("prev_partner") or [], window.get("prev_user") or []],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def feedback_key(
+    scenario_id: str,
+    turn_index: int,
+    transcript: str,
+    fingerprint: str,
+    prompt_version: str,
+    model: str,
+) -> str:
+    payload = json.dumps(
+        [scenario_id, turn_index, normalize_transcript(transcript), fingerprint, prompt_version, model],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FeedbackCache:
+    def __init__(self, maxsize: int = 5000, ttl_sec: float = 86400.0, collection=None, shared_ttl_sec: float | None = None):
+        self._cache = TTLCache(maxsize=maxsize, ttl_sec=ttl_sec)
+        self._flight = SingleFlight()
+        self.collection = collection  # optional second tier, shared by every worker
+        self.shared_ttl_sec = shared_ttl_sec or ttl_sec
+        # Mongo writes happen off the request path
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="feedback-cache") if collection is not None else None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._shared_hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._errors = 0
+
+    def _count(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _load_shared(self, key: str):
+        if self.collection is None:
+            return None
+        try:
+            doc = self.collection.find_one(
+                {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}}, {"feedback": 1}
+            )
+        except Exception as e:
+            self._count("_errors")
+            print(f"⚠️ Feedback cache lookup failed: {e}")
+            return None
+        return doc.get("feedback") if doc else None
+
+    def _store_shared(self, key: str, feedback: dict):
+        now = datetime.now(timezone.utc)
+        try:
+            self.collection.replace_one(
+                {"_id": key},
+                {"feedback": feedback, "created_at": now, "expires_at": now + timedelta(seconds=self.shared_ttl_sec)},
+                upsert=True,
+            )
+        except Exception as e:
+            self._count("_errors")
+            print(f"⚠️ Feedback cache write failed: {e}")
+
+    def _lookup(self, key: str) -> dict | None:
+        feedback = self._cache.get(key)
+        if feedback is None:
+            feedback = self._load_shared(key)
+            if feedback is None:
+                return None
+            self._cache.set(key, feedback)
+            self._count("_shared_hits")
+        return copy.deepcopy(feedback)
+
+    def get(self, key: str) -> dict | None:
+        """Cached feedback for key (memory, then Mongo), or None. Callers get their own copy."""
+        feedback = self._lookup(key)
+        self._count("_hits" if feedback is not None else "_misses")
+        return feedback
+
+    def put(self, key: str, feedback: dict):
+        feedback = copy.deepcopy(feedback)
+        self._cache.set(key, feedback)
+        if self._writer is not None:
+            self._writer.submit(self._store_shared, key, feedback)
+
+    def get_or_generate(self, key: str, generate) -> tuple[dict, str]:
+        """
+        Return (feedback, source): source is "hit" (memory or Mongo), "coalesced" (shared an
+        identical in-flight call) or "miss" (generate() ran and its result was cached).
+        """
+        feedback = self._lookup(key)
+        if feedback is not None:
+            self._count("_hits")
+            return feedback, "hit"
+
+        led = []
+
+        def _generate():
+            led.append(True)
+            # Another request may have filled the key between the lookup above and taking the lead
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached, "hit"
+            result = generate()
+            self.put(key, result)
+            return result, "miss"
+
+        feedback, source = self._flight.do(key, _generate)
+        if not led:
+            source = "coalesced"
+        self._count({"hit": "_hits", "miss": "_misses", "coalesced": "_coalesced"}[source])
+        return copy.deepcopy(feedback), source
+
+    def stats(self) -> dict:
+        stats = {"memory": self._cache.stats(), "in_flight": self._flight.stats()}
+        with self._lock:
+            served = self._hits + self._coalesced
+            lookups = served + self._misses
+            stats.update({
+                "shared_tier": self.collection is not None,
+                "hits": self._hits,
+                "shared_hits": self._shared_hits,
+                "coalesced": self._coalesced,
+                "misses": self._misses,
+                "errors": self._errors,
+                "hit_ratio": round(served / lookups, 3) if lookups else None,
+            })
+        return stats
@@ -0,0 +1,252 @@
+"""
+Feedback generation shared by the web app and the offline eval/regen scripts.
+
+The GPT call and post-processing live here (prompt building in prompt_builder.py)
+with no import-time side effects: no Mongo, S3 or OpenAI clients are created.
+Callers inject the OpenAI client, so app.py and batch jobs run the exact
+production path.
+
+    engine = FeedbackEngine(OpenAI())
+    feedback = engine.generate(transcript, scenario_title, scenario_description, turn_transcript, context_window)
+"""
+import json
+import os
+import time
+
+import prompt_registry
+from prompt_builder import DEFAULT_MAX_PROMPT_TOKENS, PromptBuilder
+from prompt_registry import Prompt
+
+DEFAULT_MODEL = "gpt-4o-mini"  # overridden by FAST_GPT_MODEL
+DEFAULT_TEMPERATURE = 0.5
+DEFAULT_MAX_TOKENS = 220
+DEFAULT_PROMPT_NAME = "feedback"  # system_prompt.txt; overridden by FEEDBACK_PROMPT
+
+
+def postprocess_feedback(feedback: dict) -> dict:
+    """Fill in defaults for missing fields and apply the off-topic / low-relevance rewrites."""
+    # Ensure all required fields exist with defaults
+    result = {
+        "tip": feedback.get("tip", "Keep practicing!"),
+        "rewrite": feedback.get("rewrite", "none"),
+        "context_relevance": float(feedback.get("context_relevance", 0.5)),
+        "off_topic": bool(feedback.get("off_topic", False)),
+        "missing_elements": feedback.get("missing_elements", []),
+        "safety": feedback.get("safety", "ok"),
+        "grade": feedback.get("grade", "yellow"),  # Default to 'yellow' if missing
+        "highlight_tokens": feedback.get("highlight_tokens", [])  # Default to empty array
+    }
+
+    # Validate context_relevance is in [0, 1]
+    result["context_relevance"] = max(0.0, min(1.0, result["context_relevance"]))
+
+    # Post-process feedback based on off_topic and context_relevance flags
+    if result["off_topic"]:
+        result["raw_tip"] = result["tip"]
+        result["tip"] = "Your reply was off topic. Try responding to your partner's question next time."
+        result["rewrite"] = "none"
+    elif result["context_relevance"] < 0.5:
+        result["raw_tip"] = result["tip"]
+        result["tip"] = "Your answer didn't fully address the question. Try staying closer to the topic."
+    return result
+
+
+def iter_json_fields(chunks):
+    """
+    Incrementally parse a streamed top-level JSON object.
+    Yields (key, value) as soon as each value is complete, so callers can forward
+    fields before the closing brace arrives.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    started = False
+    for chunk in chunks:
+        buf += chunk
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                break
+            if not started:
+                if buf[pos] != "{":
+                    return
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "}":
+                return
+            try:
+                key, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break
+            while end < len(buf) and buf[end] in " \t\r\n":
+                end += 1
+            if end >= len(buf) or buf[end] != ":":
+                break
+            end += 1
+            while end < len(buf) and buf[end] in " \t\r\n":
+                end += 1
+            try:
+                value, end = decoder.raw_decode(buf, end)
+            except json.JSONDecodeError:
+                break
+            # Numbers/literals may still be growing - only accept once a delimiter follows
+            while end < len(buf) and buf[end] in " \t\r\n":
+                end += 1
+            if end >= len(buf) or buf[end] not in ",}":
+                break
+            yield key, value
+            pos = end
+
+
+def _stamp(feedback: dict, prompt: dict) -> dict:
+    """Record which system prompt version produced this feedback (persisted with the turn)."""
+    feedback["prompt_version"] = prompt["prompt_version"]
+    return feedback
+
+
+def _usage_dict(usage) -> dict:
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+    }
+
+
+class FeedbackEngine:
+    """
+    The production feedback path (prompt -> GPT -> post-processing) over an injected client.
+    Thread-safe; one instance can serve concurrent requests or batch workers.
+    """
+
+    def __init__(
+        self,
+        client,
+        model: str | None = None,
+        system_prompt: str | None = None,
+        prompt_name: str | None = None,
+        registry: prompt_registry.PromptRegistry | None = None,
+        temperature: float = DEFAULT_TEMPERATURE,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        max_prompt_tokens: int | None = None,
+    ):
+        self.client = client
+        # Resolved at construction (after the caller has loaded .env), not at import
+        self.model = model or os.getenv("FAST_GPT_MODEL", DEFAULT_MODEL)
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.prompt_builder = PromptBuilder(
+            self.model,
+            max_prompt_tokens=max_prompt_tokens or int(os.getenv("PROMPT_MAX_TOKENS", str(DEFAULT_MAX_PROMPT_TOKENS))),
+        )
+        # A literal system_prompt (benchmark variants) is pinned; otherwise the named prompt is
+        # read from the registry on each request, so edits to its file are picked up live
+        self.prompt_name = prompt_name or os.getenv("FEEDBACK_PROMPT", DEFAULT_PROMPT_NAME)
+        self.registry = registry or prompt_registry.prompts
+        self._pinned_prompt = Prompt("inline", None, system_prompt, ()) if system_prompt is not None else None
+
+    def pin_prompt(self) -> "FeedbackEngine":
+        """Freeze the current prompt version for this engine (batch runs key results on it)."""
+        self._pinned_prompt = self.current_prompt()
+        return self
+
+    def current_prompt(self) -> Prompt:
+        """The system prompt for the next request, with its name and content-hash version."""
+        return self._pinned_prompt or self.registry.get(self.prompt_name)
+
+    @property
+    def system_prompt(self) -> str:
+        return self.current_prompt().text
+
+    @property
+    def prompt_version(self) -> str:
+        """Short content hash of the system prompt; editing the prompt changes it."""
+        return self.current_prompt().version
+
+    def build_messages(self, transcript, scenario_title=None, scenario_description=None,
+                       turn_transcript=None, context_window=None) -> tuple[list[dict], dict]:
+        """Token-budgeted messages and the prompt report (see prompt_builder), with prompt_name/prompt_version."""
+        prompt = self.current_prompt()
+        messages, report = self.prompt_builder.build(
+            prompt.text, transcript, scenario_title, scenario_description, turn_transcript, context_window
+        )
+        report["prompt_name"] = prompt.name
+        report["prompt_version"] = prompt.version
+        return messages, report
+
+    def messages(self, transcript, scenario_title=None, scenario_description=None,
+                 turn_transcript=None, context_window=None) -> list[dict]:
+        return self.build_messages(transcript, scenario_title, scenario_description, turn_transcript, context_window)[0]
+
+    def _create(self, messages, **kwargs):
+        if not self.client:
+            raise RuntimeError("OpenAI client is not initialized. Set OPENAI_API_KEY and install openai SDK.")
+        return self.client.chat.completions.create(
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            response_format={"type": "json_object"},
+            messages=messages,
+            **kwargs,
+        )
+
+    def generate_detailed(self, transcript, scenario_title=None, scenario_description=None,
+                          turn_transcript=None, context_window=None) -> dict:
+        """
+        One feedback completion. Returns {"feedback": post-processed, "raw": model JSON,
+        "usage": {prompt_tokens, completion_tokens}, "prompt": prompt size report, "latency_ms"}.
+        """
+        messages, prompt = self.build_messages(
+            transcript, scenario_title, scenario_description, turn_transcript, context_window
+        )
+        started = time.perf_counter()
+        completion = self._create(messages)
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        raw = json.loads(completion.choices[0].message.content)
+        return {
+            "feedback": _stamp(postprocess_feedback(raw), prompt),
+            "raw": raw,
+            "usage": _usage_dict(getattr(completion, "usage", None)),
+            "prompt": prompt,
+            "latency_ms": latency_ms,
+        }
+
+    def generate(self, transcript, scenario_title=None, scenario_description=None,
+                 turn_transcript=None, context_window=None) -> dict:
+        """
+        Post-processed feedback: tip, rewrite, context_relevance, off_topic, missing_elements, safety, grade,
+        highlight_tokens, and the prompt_version that produced it.
+        """
+        return self.generate_detailed(
+            transcript, scenario_title, scenario_description, turn_transcript, context_window
+        )["feedback"]
+
+    def stream(self, transcript, scenario_title=None, scenario_description=None,
+               turn_transcript=None, context_window=None):
+        """
+        Streaming variant of generate.
+        Yields ("prompt", report) with the prompt size, ("feedback_field", {"field", "value"}) for each
+        raw field as the completion streams, then a final ("feedback", result) with the post-processed
+        feedback (which may override fields already sent, e.g. the tip of an off-topic reply).
+        """
+        messages, prompt = self.build_messages(
+            transcript, scenario_title, scenario_description, turn_transcript, context_window
+        )
+        yield "prompt", prompt
+        completion = self._create(messages, stream=True)
+        parts = []
+
+        def _deltas():
+            for chunk in completion:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+
+        for key, value in iter_json_fields(_deltas()):
+            yield "feedback_field", {"field": key, "value": value}
+
+        feedback = json.loads("".join(parts))
+        yield "feedback", _stamp(postprocess_feedback(feedback), prompt)
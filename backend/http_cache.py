@@ -0,0 +1,76 @@
+"""
+Pre-serialized, ETagged response bodies for catalog-derived endpoints.
+
+Bodies are built once per (key, catalog version) and reused until the scenario
+catalog changes. Conditional requests with a matching If-None-Match get a 304
+without touching the body at all.
+"""
+import hashlib
+import threading
+
+from flask import Response, request
+
+
+class CachedBodies:
+    def __init__(self, serialize, max_age_sec: int = 60, stale_while_revalidate_sec: int = 600, max_entries: int = 4096):
+        self.serialize = serialize
+        self.max_age_sec = max_age_sec
+        self.stale_while_revalidate_sec = stale_while_revalidate_sec
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version = None
+        self._bodies = {}
+        self._hits = 0
+        self._builds = 0
+        self._not_modified = 0
+
+    def _get(self, key, version: str, build):
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._bodies = {}
+            entry = self._bodies.get(key)
+            if entry is not None:
+                self._hits += 1
+                return entry
+        payload = build()
+        if payload is None:
+            return None
+        body = self.serialize(payload)
+        entry = (body, hashlib.sha256(body).hexdigest()[:32])
+        with self._lock:
+            self._builds += 1
+            if version == self._version and len(self._bodies) < self.max_entries:
+                self._bodies[key] = entry
+        return entry
+
+    def respond(self, key, version: str, build):
+        """
+        Return a cached JSON response for key, calling build() -> payload (or None) on a miss.
+        Returns None when build() returns None so the caller can produce its own error.
+        """
+        entry = self._get(key, version, build)
+        if entry is None:
+            return None
+        body, etag = entry
+        headers = {
+            "Cache-Control": f"public, max-age={self.max_age_sec}, stale-while-revalidate={self.stale_while_revalidate_sec}",
+        }
+        if request.if_none_match.contains(etag):
+            with self._lock:
+                self._not_modified += 1
+            response = Response(status=304, headers=headers)
+        else:
+            response = Response(body, mimetype="application/json", headers=headers)
+        response.set_etag(etag)
+        return response
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self._version,
+                "entries": len(self._bodies),
+                "hits": self._hits,
+                "builds": self._builds,
+                "not_modified": self._not_modified,
+            }
@@ -0,0 +1,134 @@
+"""
+Process-wide background job queue used by the async mode of /upload.
+
+Jobs are kept in memory, so /jobs/<id> must be served by the same process that
+accepted the upload (one gunicorn worker per instance, or sticky routing).
+"""
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when the bounded job queue cannot accept more work."""
+
+
+class JobQueue:
+    def __init__(self, max_workers: int = 4, max_queue: int = 32, result_ttl_sec: int = 600):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.result_ttl_sec = result_ttl_sec
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._workers = []
+        self._active = 0
+        self._rejected = 0
+
+    def _ensure_workers(self):
+        # Started lazily so forked gunicorn workers get their own live threads
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.max_workers):
+                t = threading.Thread(target=self._worker, name=f"upload-job-{i}", daemon=True)
+                t.start()
+                self._workers.append(t)
+
+    def submit(self, fn, *args, **kwargs) -> str:
+        """
+        Enqueue fn(*args, **kwargs) and return the job id.
+        fn must return (result: dict, status_code: int); a status >= 400 marks the job failed.
+        Raises JobQueueFull when the queue is at capacity.
+        """
+        self._ensure_workers()
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "status_code": None,
+            "_expires": None,
+        }
+        with self._lock:
+            self._prune()
+            self._jobs[job_id] = job
+        try:
+            self._queue.put_nowait((job_id, fn, args, kwargs))
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+                self._rejected += 1
+            raise JobQueueFull(f"Job queue is full ({self.max_queue} pending).")
+        return job_id
+
+    def _worker(self):
+        while True:
+            job_id, fn, args, kwargs = self._queue.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    self._queue.task_done()
+                    continue
+                job["status"] = "running"
+                job["started_at"] = datetime.now(timezone.utc).isoformat()
+                self._active += 1
+            try:
+                result, status_code = fn(*args, **kwargs)
+            except Exception as e:
+                print(f"❌ Upload job {job_id} crashed: {e}")
+                result, status_code = {"error": str(e)}, 500
+            with self._done:
+                self._active -= 1
+                job["finished_at"] = datetime.now(timezone.utc).isoformat()
+                job["status_code"] = status_code
+                if status_code >= 400:
+                    job["status"] = "failed"
+                    job["error"] = result.get("error") if isinstance(result, dict) else str(result)
+                else:
+                    job["status"] = "done"
+                    job["result"] = result
+                job["_expires"] = time.monotonic() + self.result_ttl_sec
+                self._done.notify_all()
+            self._queue.task_done()
+
+    def _prune(self):
+        # Caller holds the lock
+        now = time.monotonic()
+        expired = [jid for jid, job in self._jobs.items() if job["_expires"] and job["_expires"] < now]
+        for jid in expired:
+            del self._jobs[jid]
+
+    def get(self, job_id: str, wait_sec: float = 0) -> dict | None:
+        """Return a public snapshot of the job, blocking up to wait_sec for it to finish (long-poll)."""
+        deadline = time.monotonic() + max(0.0, wait_sec)
+        with self._done:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return None
+                remaining = deadline - time.monotonic()
+                if job["status"] in ("done", "failed") or remaining <= 0:
+                    return {k: v for k, v in job.items() if not k.startswith("_")}
+                self._done.wait(remaining)
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = {}
+            for job in self._jobs.values():
+                statuses[job["status"]] = statuses.get(job["status"], 0) + 1
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_max": self.max_queue,
+                "workers": self.max_workers,
+                "active": self._active,
+                "rejected": self._rejected,
+                "jobs": statuses,
+            }
@@ -0,0 +1,48 @@
+"""
+Build expensive clients on first use instead of at import.
+
+Lazy(factory) stands in for the object the factory returns: attribute access
+builds it once (thread-safe) and then delegates. A factory may return None when
+the dependency is not configured, in which case the proxy is falsy, so existing
+`if not client:` checks keep working.
+"""
+import threading
+import time
+
+
+class Lazy:
+    def __init__(self, factory, name: str = ""):
+        self._factory = factory
+        self._name = name
+        self._lock = threading.Lock()
+        self._value = None
+        self._built = False
+        self.build_ms = None
+
+    def get(self):
+        if self._built:
+            return self._value
+        with self._lock:
+            if not self._built:
+                started = time.perf_counter()
+                self._value = self._factory()
+                self.build_ms = int((time.perf_counter() - started) * 1000)
+                self._built = True
+        return self._value
+
+    @property
+    def initialized(self) -> bool:
+        return self._built
+
+    def __getattr__(self, attr):
+        value = self.get()
+        if value is None:
+            raise RuntimeError(f"{self._name or 'client'} is not available")
+        return getattr(value, attr)
+
+    def __bool__(self):
+        return self.get() is not None
+
+    def __repr__(self):
+        state = repr(self._value) if self._built else "not built"
+        return f"<Lazy {self._name}: {state}>"
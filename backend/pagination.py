@@ -0,0 +1,66 @@
+"""
+Keyset pagination over (created_at, _id), newest first.
+
+Pages are fetched with a range predicate on the last row seen instead of skip(),
+so every page costs the same index walk no matter how deep the client pages.
+Cursors are opaque, URL-safe tokens.
+"""
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+SORT = [("created_at", -1), ("_id", -1)]
+
+
+def encode_cursor(doc: dict) -> str:
+    payload = {"t": doc["created_at"].isoformat(), "i": str(doc["_id"])}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[datetime, ObjectId]:
+    """Raises ValueError for anything that is not a cursor we issued."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        return datetime.fromisoformat(payload["t"]), ObjectId(payload["i"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def parse_limit(raw: str | None, default: int, maximum: int) -> int:
+    """Page size from a query param; 'all' or anything above maximum is capped at maximum."""
+    if raw is None:
+        return default
+    if raw.lower() == "all":
+        return maximum
+    try:
+        limit = int(raw)
+    except ValueError:
+        return default
+    if limit < 1:
+        return default
+    return min(limit, maximum)
+
+
+def fetch_page(collection, base_filter: dict, projection: dict, limit: int, cursor: str | None = None):
+    """
+    Return (docs, next_cursor) for one page, newest first.
+    next_cursor is None when there are no more rows.
+    """
+    query = dict(base_filter)
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        after = {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}},
+        ]}
+        query = {"$and": [query, after]} if query else after
+    docs = list(collection.find(query, {**projection, "created_at": 1}).sort(SORT).limit(limit + 1))
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, encode_cursor(docs[-1])
+    return docs, None
@@ -0,0 +1,214 @@
+"""
+Token-budgeted feedback prompts.
+
+build_feedback_user_prompt() is the user prompt format. PromptBuilder wraps it
+with a real token budget: context lines are capped per line, and when system +
+user prompt would exceed max_prompt_tokens the oldest context lines are dropped
+first (learner lines, then partner lines), then the partner's turn text and
+finally the learner transcript are truncated. Every build returns a report with
+the token counts, so prompt size is measured per request instead of guessed.
+
+Tokens are counted with tiktoken when it is installed (and its encoding can be
+loaded); otherwise with a ~4 characters/token estimate, reported as "estimate".
+"""
+import threading
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # token counts fall back to an estimate
+    tiktoken = None
+
+DEFAULT_MAX_PROMPT_TOKENS = 2000
+DEFAULT_LINE_MAX_TOKENS = 48  # ~180 characters of English
+MIN_FIELD_TOKENS = 32
+FALLBACK_ENCODING = "o200k_base"
+CHARS_PER_TOKEN = 4
+# Chat format overhead: 3 tokens per message plus 3 priming the reply
+MESSAGE_OVERHEAD_TOKENS = 3
+
+
+def build_feedback_user_prompt(
+    transcript: str,
+    scenario_title: str | None = None,
+    scenario_description: str | None = None,
+    turn_transcript: str | None = None,
+    context_window: dict | None = None
+) -> str:
+    """Build the user prompt sent alongside the system prompt for feedback generation."""
+    # Build context section for user prompt
+    context_section = ""
+    if context_window:
+        prev_partner = context_window.get("prev_partner", [])
+        prev_user = context_window.get("prev_user", [])
+
+        if prev_partner or prev_user:
+            context_section = "\n\nPrevious conversation context:\n"
+            if prev_partner:
+                context_section += "Partner said earlier:\n"
+                for i, partner_line in enumerate(prev_partner, 1):
+                    context_section += f"  {i}. {partner_line}\n"
+            if prev_user:
+                context_section += "Learner said earlier:\n"
+                for i, user_line in enumerate(prev_user, 1):
+                    context_section += f"  {i}. {user_line}\n"
+
+    return (
+        f"Scenario: {scenario_title or 'Conversation'} - {scenario_description or 'Practice conversation'}\n"
+        f"Current turn - Partner said: '{turn_transcript or '[no context]'}'{context_section}\n"
+        f"Learner responded: '{transcript}'\n\n"
+        "Evaluate if the learner's response appropriately addresses the partner's question/goal."
+        " Give one quick tip about how to sound more natural to a native U.S. English speaker."
+        " If it already sounds natural, praise them instead of suggesting a rewrite."
+    )
+
+
+class Tokenizer:
+    """The model's tiktoken encoding, loaded on first use, or a character-count estimate."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.name = None
+        self._encoding = None
+        self._lock = threading.Lock()
+
+    def load(self) -> str:
+        """Resolve the encoding (may read or download tiktoken's BPE file). Returns the tokenizer name."""
+        with self._lock:
+            if self.name is not None:
+                return self.name
+            if tiktoken is not None:
+                try:
+                    try:
+                        self._encoding = tiktoken.encoding_for_model(self.model)
+                    except KeyError:
+                        self._encoding = tiktoken.get_encoding(FALLBACK_ENCODING)
+                    self.name = self._encoding.name
+                    return self.name
+                except Exception as e:
+                    print(f"⚠️ tiktoken encoding unavailable, estimating prompt tokens: {e}")
+            self.name = "estimate"
+            return self.name
+
+    def count(self, text: str) -> int:
+        if self.name is None:
+            self.load()
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return -(-len(text) // CHARS_PER_TOKEN)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """text cut to at most max_tokens tokens, ending in "..." when cut."""
+        if self.count(text) <= max_tokens:
+            return text
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            return self._encoding.decode(tokens[:max(max_tokens - 1, 0)]).rstrip() + "..."
+        return text[:max(max_tokens * CHARS_PER_TOKEN - 3, 0)].rstrip() + "..."
+
+
+class PromptBuilder:
+    def __init__(self, model: str, max_prompt_tokens: int = DEFAULT_MAX_PROMPT_TOKENS,
+                 line_max_tokens: int = DEFAULT_LINE_MAX_TOKENS):
+        self.tokenizer = Tokenizer(model)
+        self.max_prompt_tokens = max_prompt_tokens
+        self.line_max_tokens = line_max_tokens
+        # Partner lines arrive capped from the catalog; learner lines repeat across a session's turns
+        self._fit_line = lru_cache(maxsize=4096)(self._cap_line)
+        self._system_tokens = (None, 0)  # (system prompt, token count) of the last prompt seen
+        self._lock = threading.Lock()
+        self._builds = 0
+        self._tokens_total = 0
+        self._tokens_max = 0
+        self._trimmed = 0
+        self._over_budget = 0
+
+    def _cap_line(self, line: str) -> str:
+        return self.tokenizer.truncate(line, self.line_max_tokens)
+
+    def _count_system(self, system_prompt: str) -> int:
+        prompt, tokens = self._system_tokens
+        if prompt != system_prompt:
+            tokens = self.tokenizer.count(system_prompt)
+            self._system_tokens = (system_prompt, tokens)
+        return tokens
+
+    def build(self, system_prompt: str, transcript: str, scenario_title=None, scenario_description=None,
+              turn_transcript=None, context_window=None) -> tuple[list[dict], dict]:
+        """
+        Chat messages for one feedback request, within max_prompt_tokens when possible, and a report:
+        {"tokenizer", "system_tokens", "user_tokens", "prompt_tokens", "budget", "dropped_context_lines",
+        "truncated", "over_budget"}.
+        """
+        window = context_window or {}
+        partner = [self._fit_line(line) for line in window.get("prev_partner") or [] if line]
+        learner = [self._fit_line(line) for line in window.get("prev_user") or [] if line]
+        fixed = self._count_system(system_prompt) + 3 * MESSAGE_OVERHEAD_TOKENS
+        dropped = 0
+        truncated = []
+
+        def _render():
+            user = build_feedback_user_prompt(
+                transcript, scenario_title, scenario_description, turn_transcript,
+                {"prev_partner": partner, "prev_user": learner},
+            )
+            return user, self.tokenizer.count(user)
+
+        user_prompt, user_tokens = _render()
+        while fixed + user_tokens > self.max_prompt_tokens and (learner or partner):
+            (learner or partner).pop(0)
+            dropped += 1
+            user_prompt, user_tokens = _render()
+        for field in ("turn_transcript", "transcript"):
+            over = fixed + user_tokens - self.max_prompt_tokens
+            text = turn_transcript if field == "turn_transcript" else transcript
+            if over <= 0 or not text:
+                continue
+            keep = max(self.tokenizer.count(text) - over, MIN_FIELD_TOKENS)
+            shortened = self.tokenizer.truncate(text, keep)
+            if shortened == text:
+                continue
+            if field == "turn_transcript":
+                turn_transcript = shortened
+            else:
+                transcript = shortened
+            truncated.append(field)
+            user_prompt, user_tokens = _render()
+
+        total = fixed + user_tokens
+        report = {
+            "tokenizer": self.tokenizer.name,
+            "system_tokens": fixed - 3 * MESSAGE_OVERHEAD_TOKENS,
+            "user_tokens": user_tokens,
+            "prompt_tokens": total,
+            "budget": self.max_prompt_tokens,
+            "dropped_context_lines": dropped,
+            "truncated": truncated,
+            "over_budget": total > self.max_prompt_tokens,
+        }
+        with self._lock:
+            self._builds += 1
+            self._tokens_total += total
+            self._tokens_max = max(self._tokens_max, total)
+            if dropped or truncated:
+                self._trimmed += 1
+            if report["over_budget"]:
+                self._over_budget += 1
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+        return messages, report
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tokenizer": self.tokenizer.name,
+                "budget": self.max_prompt_tokens,
+                "line_max_tokens": self.line_max_tokens,
+                "builds": self._builds,
+                "avg_prompt_tokens": round(self._tokens_total / self._builds, 1) if self._builds else None,
+                "max_prompt_tokens": self._tokens_max,
+                "trimmed": self._trimmed,
+                "over_budget": self._over_budget,
+            }
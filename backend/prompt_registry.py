@@ -0,0 +1,132 @@
+"""
+Named system prompts, loaded once and hot-reloaded when their file changes.
+
+Each prompt is identified by name ("feedback" is system_prompt.txt) and carries a
+content-hash version, so caches, saved turns and eval runs can key on exactly
+which prompt text produced a result. Files are re-checked (stat only) at most
+every PROMPT_RELOAD_SEC seconds; an edited file is swapped in atomically, and a
+file that cannot be read keeps serving the previous text.
+
+Extra prompts can be registered in code or through PROMPT_FILES, e.g.
+PROMPT_FILES="feedback_short=prompts/short.txt,feedback_strict=/etc/bespoken/strict.txt"
+(relative paths resolve against this directory).
+"""
+import hashlib
+import os
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROMPT_RELOAD_SEC = float(os.getenv("PROMPT_RELOAD_SEC", "5"))
+DEFAULT_PROMPTS = {"feedback": os.path.join(BASE_DIR, "system_prompt.txt")}
+
+
+def content_version(text: str) -> str:
+    """Short content hash of a prompt; editing the text changes the version."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+class Prompt:
+    """One loaded prompt version. Immutable; a reload creates a new Prompt."""
+
+    __slots__ = ("name", "path", "text", "version", "signature", "loaded_at")
+
+    def __init__(self, name: str, path: str, text: str, signature: tuple):
+        self.name = name
+        self.path = path
+        self.text = text
+        self.version = content_version(text)
+        self.signature = signature
+        self.loaded_at = time.time()
+
+
+def _signature(path: str) -> tuple:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _read(name: str, path: str) -> Prompt:
+    signature = _signature(path)
+    with open(path, "r", encoding="utf-8") as f:
+        return Prompt(name, path, f.read(), signature)
+
+
+def parse_prompt_files(spec: str | None) -> dict:
+    """PROMPT_FILES value ("name=path,name=path") → {name: absolute path}."""
+    paths = {}
+    for item in (spec or "").split(","):
+        name, _, path = item.strip().partition("=")
+        if not name or not path:
+            continue
+        paths[name.strip()] = path.strip() if os.path.isabs(path.strip()) else os.path.join(BASE_DIR, path.strip())
+    return paths
+
+
+class PromptRegistry:
+    def __init__(self, paths: dict | None = None, reload_sec: float = PROMPT_RELOAD_SEC):
+        self.paths = dict(paths or {})
+        self.reload_sec = reload_sec
+        self._prompts = {}
+        self._checked = {}
+        self._lock = threading.Lock()
+        self._reloads = 0
+
+    def register(self, name: str, path: str):
+        with self._lock:
+            self.paths[name] = path
+            self._prompts.pop(name, None)
+
+    def get(self, name: str) -> Prompt:
+        """
+        The current version of a named prompt. The first call reads the file; later calls
+        only stat it, at most once per reload_sec. Raises KeyError for unknown names.
+        """
+        now = time.monotonic()
+        prompt = self._prompts.get(name)
+        if prompt is not None and now - self._checked.get(name, 0.0) < self.reload_sec:
+            return prompt
+        with self._lock:
+            if name not in self.paths:
+                # PROMPT_FILES is read on demand, after the app has loaded .env
+                self.paths.update({k: v for k, v in parse_prompt_files(os.getenv("PROMPT_FILES")).items()
+                                   if k not in self.paths})
+            path = self.paths[name]
+            prompt = self._prompts.get(name)
+            if prompt is not None and now - self._checked.get(name, 0.0) < self.reload_sec:
+                return prompt
+            self._checked[name] = now
+            if prompt is None:
+                prompt = self._prompts[name] = _read(name, path)
+                print(f"📝 Loaded prompt '{name}' (version {prompt.version})")
+                return prompt
+            try:
+                if _signature(path) != prompt.signature:
+                    reloaded = _read(name, path)
+                    if reloaded.version != prompt.version:
+                        print(f"🔄 Reloaded prompt '{name}': {prompt.version} → {reloaded.version}")
+                        self._reloads += 1
+                    prompt = self._prompts[name] = reloaded
+            except OSError as e:
+                print(f"⚠️ Prompt reload failed, keeping '{name}' version {prompt.version}: {e}")
+            return prompt
+
+    def versions(self) -> dict:
+        """{name: version} of every prompt loaded so far."""
+        with self._lock:
+            return {name: prompt.version for name, prompt in self._prompts.items()}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "reload_sec": self.reload_sec,
+                "reloads": self._reloads,
+                "prompts": {
+                    name: {"version": prompt.version, "path": prompt.path, "chars": len(prompt.text),
+                           "loaded_at": prompt.loaded_at}
+                    for name, prompt in self._prompts.items()
+                },
+            }
+
+
+# Process-wide registry used by FeedbackEngine
+prompts = PromptRegistry(DEFAULT_PROMPTS)
@@ -0,0 +1,64 @@
+"""
+Cached dependency health for the /ready endpoint.
+
+Checks run on a background thread (first pass right after startup, then every
+interval_sec), so /ready answers from the last results without touching Mongo
+or OpenAI on the request path. A check is a callable that returns a detail dict
+(or None) when healthy and raises when not; only `required` checks gate readiness.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+
+
+class ReadinessProbe:
+    def __init__(self, checks: dict, required: set[str] | None = None, interval_sec: float = 30.0):
+        self.checks = checks
+        self.required = set(checks) if required is None else set(required)
+        self.interval_sec = interval_sec
+        self._lock = threading.Lock()
+        self._results = {}
+        self._thread = None
+        self._first_pass = threading.Event()
+        self.first_ready_at = None  # time.perf_counter() of the first pass with every required check ok
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="readiness-probe", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self.run_checks()
+            self._first_pass.set()
+            time.sleep(self.interval_sec)
+
+    def run_checks(self):
+        for name, check in self.checks.items():
+            started = time.perf_counter()
+            entry = {"ok": True}
+            try:
+                detail = check()
+                if detail:
+                    entry.update(detail)
+            except Exception as e:
+                entry = {"ok": False, "error": str(e)}
+            entry["latency_ms"] = int((time.perf_counter() - started) * 1000)
+            entry["checked_at"] = datetime.now(timezone.utc).isoformat()
+            with self._lock:
+                self._results[name] = entry
+        if self.first_ready_at is None and self.snapshot()["ready"]:
+            self.first_ready_at = time.perf_counter()
+
+    def wait(self, timeout_sec: float) -> bool:
+        """Block until the first pass of checks has finished (or timeout)."""
+        return self._first_pass.wait(timeout_sec)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            results = dict(self._results)
+        pending = [name for name in self.checks if name not in results]
+        ready = not pending and all(results[name]["ok"] for name in self.required)
+        return {"ready": ready, "pending": pending, "checks": results}
@@ -1,29 +1,29 @@
 import os
 import json
+import hashlib
+import argparse
+import threading
 import pandas as pd
-from tqdm import tqdm
 from datetime import datetime
-from openai import OpenAI
-from dotenv import load_dotenv
-import subprocess
 from pathlib import Path
 
+import eval as bespoken_eval
+from eval_runner import EvalRunner
+from feedback_engine import FeedbackEngine
+
 # === Setup ===
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Reuse eval.py's client (SDK retries off; EvalRunner does backoff) and rate-limit settings
+client = bespoken_eval.client
+# Same prompt, model and post-processing as /upload; REGEN_MODEL overrides the model only
+engine = FeedbackEngine(client, model=os.getenv("REGEN_MODEL") or None).pin_prompt()
+REGEN_MODEL = engine.model
 
-# === Load system prompt ===
-with open("system_prompt.txt", encoding="utf-8") as f:
-    system_prompt = f.read()
+# === Load system prompt (from the prompt registry, pinned for the whole run) ===
+system_prompt = engine.system_prompt
 
-# === Load test dataset ===
-csv_path = Path(__file__).resolve().parent.parent / "BeSpoken_eval.csv"
+PROMPT_HASH = engine.prompt_version
+FEEDBACK_FIELDS = ("tip", "rewrite", "grade")
 
-try:
-    df = pd.read_csv(csv_path, encoding="utf-8-sig")
-except UnicodeDecodeError:
-    print("⚠️ UTF-8 decode failed; retrying with latin-1 encoding.")
-    df = pd.read_csv(csv_path, encoding="latin1")
 
 # === Helper ===
 def clean_text(text):
@@ -33,72 +33,157 @@ def clean_text(text):
         text.replace("â€™", "'")
         .replace("â€“", "-")
         .replace("â€œ", '"')
-        .replace("â€", '"')
+        .replace("â€", '"')
         .replace("Â", "")
         .strip()
     )
 
+
+def _text(value):
+    return value if isinstance(value, str) else ""
+
+
+def row_context_window(row):
+    """
+    The context window saved with the turn: a JSON column (turn_export.py) or the
+    flattened context_window.prev_partner[i] / prev_user[i] columns of a mongoexport CSV.
+    """
+    value = row.get("context_window")
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str) and value.strip():
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            pass
+    window = {}
+    for side in ("prev_partner", "prev_user"):
+        lines = []
+        i = 0
+        while f"context_window.{side}[{i}]" in row:
+            line = _text(row.get(f"context_window.{side}[{i}]"))
+            if line:
+                lines.append(line)
+            i += 1
+        window[side] = lines
+    return window if any(window.values()) else None
+
+
+def feedback_args(row):
+    """Arguments for FeedbackEngine.generate, exactly as /upload would pass them for this turn."""
+    return (
+        _text(row.get("transcript", "")),
+        _text(row.get("scenario_title", "")) or None,
+        _text(row.get("scenario_description", "")) or None,
+        _text(row.get("turn_transcript", "")) or None,
+        row_context_window(row),
+    )
+
+
+def build_user_message(row):
+    """The token-budgeted user prompt /upload would send for this row."""
+    return engine.build_messages(*feedback_args(row))[0][1]["content"]
+
+
+def row_key(user_message):
+    """Identifies one regeneration: same prompt, model and row text → same key."""
+    payload = json.dumps([REGEN_MODEL, PROMPT_HASH, user_message], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
 # === Regeneration ===
+def generate(row, feedback_engine=None):
+    """One production feedback call. Returns (feedback, usage, latency_ms); usage has prompt/completion token counts."""
+    result = (feedback_engine or engine).generate_detailed(*feedback_args(row))
+    return result["feedback"], result["usage"], result["latency_ms"]
+
+
 def regenerate_feedback(row):
-    partner = row.get("turn_transcript", "")
-    learner = row.get("transcript", "")
-    scenario = row.get("scenario_title", "")
-    description = row.get("scenario_description", "")
+    return generate(row)[0]
 
-    user_message = f"""
-Scenario: {scenario}
-Description: {description}
 
-Partner said: {partner}
-Learner replied: {learner}
-"""
+# === Checkpointing ===
+class Checkpoint:
+    """
+    Append-only JSONL of finished rows ({"key", "feedback"}), flushed per row.
+    Rerunning with the same file skips every row whose key is already there.
+    """
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message},
-            ],
-            response_format={"type": "json_object"},
-        )
-        feedback = json.loads(response.choices[0].message.content)
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.done = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from an interrupted run
+                    self.done[entry["key"]] = entry["feedback"]
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def record(self, key, feedback):
+        with self._lock:
+            self._file.write(json.dumps({"key": key, "feedback": feedback}, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self.done[key] = feedback
+
+    def close(self):
+        self._file.close()
+
+
+def regenerate_all(df, checkpoint, runner):
+    """Regenerate feedback for every row not already in the checkpoint; returns feedback dicts in row order."""
+    rows = [row for _, row in df.iterrows()]
+    messages = [build_user_message(row) for row in rows]
+    keys = [row_key(m) for m in messages]
+    todo = [i for i, key in enumerate(keys) if key not in checkpoint.done]
+    print(f"🔁 Regenerating feedback: {len(todo)} rows to go, {len(df) - len(todo)} already checkpointed")
+
+    def _task(i):
+        feedback = regenerate_feedback(rows[i])
+        checkpoint.record(keys[i], feedback)
         return feedback
-    except Exception as e:
-        print(f"⚠️ Error regenerating row: {e}")
-        return {"tip": "", "rewrite": "", "grade": ""}
-
-# === Run regeneration ===
-regenerated = []
-print("🔁 Regenerating feedback for all rows...")
-for _, row in tqdm(df.iterrows(), total=len(df)):
-    regenerated.append(regenerate_feedback(row))
-
-df["feedback.tip_new"] = [clean_text(fb.get("tip", "")) for fb in regenerated]
-df["feedback.rewrite_new"] = [clean_text(fb.get("rewrite", "")) for fb in regenerated]
-df["feedback.grade_new"] = [clean_text(fb.get("grade", "")) for fb in regenerated]
-
-# === Save regenerated file ===
-timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-regen_file = f"BeSpoken_regen_{timestamp}.csv"
-df.to_csv(regen_file, index=False, encoding="utf-8-sig")
-print(f"💾 Regenerated feedback saved to {regen_file}")
-
-# === Step 2: Run your evaluation script ===
-eval_script = "eval.py"
-print("🧮 Running evaluation...")
-subprocess.run(["python", eval_script, regen_file], check=False)
-
-# === Step 3: Generate Markdown Summary (optional inline) ===
-try:
-    eval_df = pd.read_csv("BeSpoken_eval_output.csv") if os.path.exists("BeSpoken_eval_output.csv") else pd.read_csv(regen_file)
+
+    def _failed(exc):
+        print(f"⚠️ Error regenerating row: {exc}")
+        return None  # not checkpointed, so the next run retries it
+
+    runner.run(
+        [lambda i=i: _task(i) for i in todo],
+        [bespoken_eval.estimate_tokens([{"content": system_prompt}, {"content": messages[i]}]) + 300 for i in todo],
+        on_error=_failed,
+        desc="Regenerating",
+    )
+    return [checkpoint.done.get(key) or {"tip": "", "rewrite": "", "grade": ""} for key in keys]
+
+
+def as_eval_frame(df):
+    """Eval input scoring the regenerated feedback: _new columns become feedback.*, old ones move to *_previous."""
+    eval_df = df.copy()
+    for field in FEEDBACK_FIELDS:
+        if f"feedback.{field}" in eval_df:
+            eval_df[f"feedback.{field}_previous"] = eval_df[f"feedback.{field}"]
+        eval_df[f"feedback.{field}"] = eval_df[f"feedback.{field}_new"]
+    return eval_df
+
+
+# === Markdown Summary ===
+def write_report(eval_df, timestamp):
     md_filename = f"BeSpoken_Report_{timestamp}.md"
+    eval_df["avg_score"] = eval_df[["tip_score", "rewrite_score", "grade_score"]].mean(axis=1)
 
     with open(md_filename, "w", encoding="utf-8") as md:
         md.write(f"# 🧩 BeSpoken Evaluation Report\n\n")
         md.write(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
         md.write(f"**Total Samples:** {len(eval_df)}\n\n")
 
+        md.write("## 📊 Overall Scores (regenerated feedback)\n\n")
+        md.write(f"- **Tip Score (avg):** {eval_df['tip_score'].mean():.2f}\n")
+        md.write(f"- **Rewrite Score (avg):** {eval_df['rewrite_score'].mean():.2f}\n")
+        md.write(f"- **Grade Accuracy:** {eval_df['grade_score'].mean():.2f}\n\n")
+
         md.write("## 🧠 All Evaluation Examples\n\n")
         for i, row in eval_df.iterrows():
             md.write(f"### Example {i+1}\n\n")
@@ -119,9 +204,55 @@ try:
             md.write(f"**✅ Model Grade:** {row.get('feedback.grade', '')}\n\n")
             md.write(f"**🎯 Ideal Grade:** {row.get('feedback.grade_ideal', '')}\n\n")
             md.write(f"**🧪 Grade Score:** {row.get('grade_score', 0)}\n\n")
-            md.write(f"**Overall Score:** {row.get('avg_score', 0)}\n\n")
+            md.write(f"**Overall Score:** {row.get('avg_score', 0):.2f}\n\n")
             md.write("---\n\n")
 
     print(f"📝 Markdown report saved to {md_filename}")
-except Exception as e:
-    print(f"⚠️ Markdown generation skipped: {e}")
+    return md_filename
+
+
+def main(csv_path, checkpoint_path, fresh=False):
+    df = bespoken_eval.load_eval_csv(csv_path)
+    if fresh and Path(checkpoint_path).exists():
+        os.remove(checkpoint_path)
+    checkpoint = Checkpoint(checkpoint_path)
+    runner = EvalRunner(
+        max_workers=bespoken_eval.EVAL_CONCURRENCY,
+        rpm=bespoken_eval.EVAL_RPM,
+        tpm=bespoken_eval.EVAL_TPM,
+        max_retries=bespoken_eval.EVAL_MAX_RETRIES,
+    )
+    try:
+        regenerated = regenerate_all(df, checkpoint, runner)
+    finally:
+        checkpoint.close()
+
+    for field in FEEDBACK_FIELDS:
+        df[f"feedback.{field}_new"] = [clean_text(fb.get(field, "")) for fb in regenerated]
+
+    # === Save regenerated file ===
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    regen_file = f"BeSpoken_regen_{timestamp}.csv"
+    df.to_csv(regen_file, index=False, encoding="utf-8-sig")
+    print(f"💾 Regenerated feedback saved to {regen_file}")
+
+    # === Evaluate the regenerated feedback (in-process, shares eval.py's judge cache) ===
+    print("🧮 Running evaluation on regenerated feedback...")
+    eval_df = bespoken_eval.evaluate(as_eval_frame(df))
+    bespoken_eval.print_summary(eval_df)
+    eval_file = f"bespoken_eval_results_{timestamp}.csv"
+    eval_df.to_csv(eval_file, index=False)
+    print(f"💾 Evaluation results saved to {eval_file}")
+
+    write_report(eval_df, timestamp)
+    return eval_df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenerate feedback with the current system prompt, then evaluate it.")
+    parser.add_argument("csv_path", nargs="?", default=bespoken_eval.DEFAULT_CSV)
+    parser.add_argument("--checkpoint", default="BeSpoken_regen_checkpoint.jsonl",
+                        help="per-row JSONL checkpoint; rerun with the same file to resume")
+    parser.add_argument("--fresh", action="store_true", help="discard the checkpoint and regenerate every row")
+    args = parser.parse_args()
+    main(args.csv_path, args.checkpoint, args.fresh)
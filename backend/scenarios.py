@@ -1,249 +1,221 @@
-SCENARIOS = {
-
-    "campus_encounter": {
-        "title": "Campus Encounter - Small Talks",
-        "description": "Practice greeting friends and classmates casually around campus while building confidence in everyday small talk.",
-        "difficulty": "Intermediate",
-        "image_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/preview_image/campus_encounter.png",
-        "turns": [
-            {
-                "turn_index": 1,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/Campus_encounter/campus_encounter_v1.mp4",
-                "example_video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/Campus_encounter/campus_encounter_v1answer.mp4",
-                "transcript": "Maddie: “Hey, what’s up? How’s it going? It’s so nice out today. What have you been up to on this beautiful Spring day?”"
-            },
-            {
-                "turn_index": 2,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/Campus_encounter/campus_encounter_v2.mp4",
-                "example_video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/Campus_encounter/campus_encounter_v2answer.mp4",
-                "transcript": "Oh look, here comes Eddie. Remember, he was in our group for that marketing project a couple of weeks ago. Anyways, let’s say hi to him! To start, you can say “Hi” in a casual way – some common options are “hey, Eddie!”, “what’s up?”, or “how’s it going?” After that, let’s ask them how their quarter is going."
-            },
-            {
-                "turn_index": 3,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/Campus_encounter/campus_encounter_v3.mp4",
-                "transcript": "Maddie: “Now it’s your turn to respond – “what’s good with you” is another way to ask “how are you”. Why don’t you tell Eddie what you’ve been up to the last few weeks?”"
-            },
-            {
-                "turn_index": 4,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/Campus_encounter/campus_encounter_v4vf.mp4",
-                "transcript": "Maddie: “So we’re about to walk by Mika. You’re friendly with her, but you don’t know her that well. It might be awkward if we stop to talk, so in this case just give them a wave and one of those casual greetings like “Hi there,” “what’s up?”, or “what’s going on?”. You can quickly compliment part of her outfit if you want too.” Mika: “Hi there! Oh my god, I love your shoes!” *keeps walking*"
-            },
-            {
-                "turn_index": 5,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/Campus_encounter/campus_encounter_v4.5.mp4",
-                "example_video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/Campus_encounter/example_turn5.mp4",
-                "transcript": "Maddie: “Nice job, that was super chill. Glad we didn’t get stuck in an awkward conversation. We’re almost to the coffeeshop, but I also see Natalie and Veronica over there. We’re going to their party this weekend. First, you should say hi with one of your new greetings and then you can tell them how excited you are for the party!”"
-            },
-            {
-                "turn_index": 6,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/Campus_encounter/campus_encounter_v5.mp4",
-                "transcript": "Ooh a themed party – that should be fun. Now you should thank them once again for the party invite and ask if you can bring anything to the party."
-            },
-            {
-                "turn_index": 7,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/Campus_encounter/campus_encounter_v6.mp4",
-                "transcript": "Awesome job making your way through all those conversations on your way here. Let’s head in!"
-            }
-        ]
-    },
+"""
+Scenario catalog.
 
+Scenarios live in scenario_data/, one file per scenario (<scenario_id>.json, or .yaml/.yml
+when PyYAML is installed). Files are validated once and compiled into an immutable
+ScenarioCatalog with an O(1) index keyed by (scenario_id, turn_index). The directory is
+re-checked at most every SCENARIO_RELOAD_SEC seconds and the catalog is swapped
+atomically when a file changes; a broken edit keeps serving the previous catalog.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
 
-    "happy_hour": {
-        "title": "Happy Hour - First Networking Event",
-        "description": "Practice introducing yourself and making small talk at a work happy hour with new colleagues.",
-        "difficulty": "Beginner",
-        "image_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/preview_image/happy_hour",
-        "turns": [
-            {
-                "turn_index": 1,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/happy_hour_3.mp4",
-                "example_video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/happy_hour/example_turn1.mp4",
-                "transcript": "Hey, nice to meet you! Where are you from? Tell me a little about yourself?"
-            },
-            {
-                "turn_index": 2,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/happy_hour_6.mp4",
-                "transcript": "I'm from Iowa! I grew up in the capital, Des Moines, but it's pretty small for a capital so it feels like a small town. How's it been settling in here? You doing anything fun this weekend?"
-            },
-            {
-                "turn_index": 3,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/happy_hour_10.mp4",
-                "example_video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/happy_hour/example_turn3.mp4",
-                "transcript": "That's so cool! Hey, I've had a few of these drinks, so I gotta run to the bathroom, but it was great to meet you!"
-            }
-        ]
-    },
-
-    "baseball_game": {
-        "title": "Baseball Game - Day Out at Wrigley Field",
-        "description": "Practice chatting naturally while watching a baseball game — from learning the rules to celebrating a win with friends.",
-        "difficulty": "Intermediate",
-        "image_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/preview_image/baseball.png",
-        "turns": [
-            {
-                "turn_index": 1,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/baseball/baseballv0.mp4",
-                "transcript": "Hey there! I’m so glad you agreed to go to this baseball game with me!"
-            },
-            {
-                "turn_index": 2,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/baseball/baseballv1.mp4",
-                "transcript": "Wow, these seats are great! Look at this view! And it’s such a beautiful day! The baseball season is from April through September which is spring and summer throughout the United States, so the weather is almost always warm. Have you ever been to a baseball game before?"
-            },
-            {
-                "turn_index": 3,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/baseball/baseballv2.mp4",
-                "transcript": "Got it. So can you tell me what you already know about the rules of baseball?"
-            },
-            {
-                "turn_index": 4,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/baseball/baseballv2.5.mp4",
-                "transcript": "Wow, that’s great! You already know so much! All that talking has got me feeling hungry. Let’s grab some food before the game starts."
-            },
-            {
-                "turn_index": 5,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/baseball/baseballv3.mp4",
-                "transcript": "Hi, welcome to the Wrigley Field concession stand, what can I get you?"
-            },
-            {
-                "turn_index": 6,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/baseball/baseballv4.mp4",
-                "transcript": "Oh, I missed it. What just happened? (The correct answer should be along the lines of: That ball was crushed! I thought he hit it out of the ballpark! The center fielder made such a great play to catch that!)"
-            },
-            {
-                "turn_index": 7,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/baseball/baseballv5.mp4",
-                "transcript": "Oh no, I was in the bathroom. What did I miss? (The correct answer should be along the lines of: Wow, he crushed that ball! He’s such a good home run hitter! And a great catcher on defense too!)"
-            },
-            {
-                "turn_index": 8,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/baseball/baseballv6.mp4",
-                "transcript": "Wow! That was a crazy game. I’m so glad the Cubs won! Now let’s head out to the Wrigleyville bars and celebrate!"
-            }
-        ]
-    },
+import answer_bank
+from feedback_engine import DEFAULT_MODEL
+from prompt_builder import DEFAULT_LINE_MAX_TOKENS, Tokenizer
 
+try:
+    import yaml
+except Exception:  # pragma: no cover - YAML scenario files are optional
+    yaml = None
 
-    "meeting": {
-        "title": "Leading a Meeting - Choosing a Brand Mascot",
-        "description": "You're leading a team meeting to decide on a brand mascot for BeSpoken. Practice facilitating discussion, managing different opinions, and keeping the meeting on track.",
-        "difficulty": "Intermediate",
-        "image_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/preview_image/meeting",
-        "turns": [
-            {
-                "turn_index": 1,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/meeting/meeting_1vF.mp4",
-                "transcript": "Ok, looks like everyone’s here! First thing’s first, you’ll need to kick off the conversation."
-            },
-            {
-                "turn_index": 2,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/meeting/meeting_2.mp4",
-                "transcript": "That was quite a strong opinion! Go ahead and respond to James."
-            },
-            {
-                "turn_index": 3,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/meeting/meeting_4.mp4",
-                "transcript": "Ok, we’ve heard about the bear and the parrot, but we’ve barely mentioned the clown. Clowns are probably best for communicating our value of celebrating mistakes—how about you offer that up to the group?"
-            },
-            {
-                "turn_index": 4,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/meeting/meeting_5.mp4",
-                "transcript": "Whoa, James is really flying off the rails here! You should encourage him to take this topic offline and bring this conversation back on track. We also haven’t heard from Francesca yet, so why don’t you ask for her perspective?"
-            },
-            {
-                "turn_index": 5,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/meeting/meeting_6.mp4",
-                "transcript": "Whoa, Francesca struck gold there! We can probably wrap this up here. You should thank Francesca for her great idea, summarize the results of the meeting, and thank everyone for participating."
-            }
-        ]
-    },
-
-    "coffee_chat": {
-        "title": "Coffee Chat with a Startup Founder",
-        "description": "Practice conversational interviewing and small talk during an informal coffee chat with a startup founder.",
-        "difficulty": "Advanced",
-        "image_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/preview_image/coffeechat.png",
-        "turns": [
-            {
-                "turn_index": 1,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/coffee+chat/coffeechat+v1.mp4",
-                "example_video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/coffee+chat/coffeechat+v1answer.mp4",
-                "transcript": "So that’s enough about me; tell me about yourself! What’s your background, and what brings you here to talk about a job at BeSpoken?"
-            },
-            {
-                "turn_index": 2,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/coffee+chat/coffeechat+v2.mp4",
-                "example_video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/coffee+chat/coffeechat+v2answer.mp4",
-                "transcript": "Great, super interesting. Thanks for sharing! And what kind of role are you looking for here?"
-            },
-            {
-                "turn_index": 3,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/coffee+chat/coffeechat+v3.mp4",
-                "example_video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/coffee+chat/coffeechat+v3+answer.mp4",
-                "transcript": "Ok cool, that’s helpful to know. Now that I have a clearer sense of who you are, I’d love to answer any questions you have. (Hint: ask him about BeSpoken's culture)"
-            },
-            {
-                "turn_index": 4,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/coffee+chat/coffeechat+v4.mp4",
-                "example_video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/coffee+chat/coffeechat+v4+answer.mp4",
-                "transcript": "Great question! Anything other questions? (Hint: ask him about a typical week at BeSpoken)"
-            },
-            {
-                "turn_index": 5,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/coffee+chat/coffeechat+v5.mp4",
-                "transcript": "Great question! Anything other questions? (Hint: wrap up the conversation)"
-            },
-            {
-                "turn_index": 6,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/coffee+chat/coffeechat+v6.mp4",
-                "transcript": "Very cool. Let me check with my team about what openings we have, but we’ll keep the conversation going! Feel free to add me on LinkedIn if you want to reach out about anything else comes up."
-            }
-        ]
-    },
+SCENARIO_DIR = os.getenv(
+    "SCENARIO_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenario_data")
+)
+SCENARIO_RELOAD_SEC = float(os.getenv("SCENARIO_RELOAD_SEC", "5"))
 
+_EXTENSIONS = (".json", ".yaml", ".yml")
 
-    "grocery_store": {
-        "title": "Check Out at Whole Foods",
-        "description": "Practice real-world checkout conversations at a Whole Foods-style grocery store.",
-        "difficulty": "Beginner",
-        "image_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/preview_image/grocery_shopping",
-        "turns": [
-            {
-                "turn_index": 1,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/grocery_store/grocery_store_1.mp4",
-                "transcript": "Hi there! Did you find everything okay today?"
-            },
-            {
-                "turn_index": 2,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/grocery_store/grocery_Store_2.mp4",
-                "transcript": "Do you want a bag?"
-            },
-            {
-                "turn_index": 3,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/grocery_store/grocery_store_3.mp4",
-                "transcript": "That’ll be twenty-three forty-five. How would you like to pay?"
-            },
-            {
-                "turn_index": 4,
-                "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/grocery_store/grocery_store_4.mp4",
-                "transcript": "Here’s your receipt. Have a great day!"
+_line_tokenizer = None
+
+
+def _cap_partner_line(line: str) -> str:
+    """A partner line capped to the prompt builder's per-line token budget, once per catalog load."""
+    global _line_tokenizer
+    if _line_tokenizer is None:
+        # Created on the first catalog load, after the app has loaded .env
+        _line_tokenizer = Tokenizer(os.getenv("FAST_GPT_MODEL", DEFAULT_MODEL))
+    return _line_tokenizer.truncate(line, DEFAULT_LINE_MAX_TOKENS)
+
+
+class TurnRecord:
+    """One compiled turn, with its scenario's title/description denormalized for lookups."""
+
+    __slots__ = (
+        "scenario_id",
+        "turn_index",
+        "video_url",
+        "example_video_url",
+        "transcript",
+        "scenario_title",
+        "scenario_description",
+        "no_grade",
+        "no_grade_tip",
+        "expected_answers",
+        "answer_tip",
+        "partner_lines",
+    )
+
+    def __init__(self, scenario_id: str, scenario: dict, turn: dict, partner_lines: tuple):
+        self.scenario_id = scenario_id
+        self.turn_index = turn["turn_index"]
+        self.video_url = turn["video_url"]
+        self.example_video_url = turn.get("example_video_url")
+        self.transcript = turn["transcript"]
+        self.scenario_title = scenario["title"]
+        self.scenario_description = scenario["description"]
+        # Answer bank (see answer_bank.py): compiled once per catalog load
+        self.no_grade = bool(turn.get("no_grade", False))
+        self.no_grade_tip = turn.get("no_grade_tip")
+        self.expected_answers = answer_bank.compile_answers(turn.get("expected_answers"))
+        self.answer_tip = turn.get("answer_tip")
+        # Token-capped partner lines of every earlier turn, for the feedback prompt's context window
+        self.partner_lines = partner_lines
+
+
+class ScenarioCatalog:
+    """Immutable compiled view of all scenario files."""
+
+    __slots__ = ("scenarios", "turns", "partner_lines", "summaries", "version", "signature", "loaded_at")
+
+    def __init__(self, scenarios: dict, signature: tuple):
+        self.scenarios = MappingProxyType(scenarios)
+        # (turn_index, capped partner line) per scenario, in turn order
+        self.partner_lines = MappingProxyType({
+            scenario_id: tuple((turn["turn_index"], _cap_partner_line(turn["transcript"])) for turn in scenario["turns"])
+            for scenario_id, scenario in scenarios.items()
+        })
+        self.turns = MappingProxyType({
+            (scenario_id, turn["turn_index"]): TurnRecord(
+                scenario_id, scenario, turn, tuple(line for _, line in self.partner_lines[scenario_id][:position])
+            )
+            for scenario_id, scenario in scenarios.items()
+            for position, turn in enumerate(scenario["turns"])
+        })
+        self.summaries = tuple(
+            {
+                'id': scenario_id,
+                'title': data['title'],
+                'description': data['description'],
+                'difficulty': data.get('difficulty', 'Beginner'),  # default if not specified
+                'image_url': data.get('image_url', '')  # default empty if not specified
             }
-        ]
-    },
-
-
-    "testing": {
-        "title": "Product testing",
-        "description": "Internal testing only, do not use.",
-        "difficulty": "Beginner",
-        "image_url": "https://images.unsplash.com/photo-1759038085950-1234ca8f5fed?crop=entropy&cs=tinysrgb&fit=max&fm=jpg&ixid=M3w3Nzg4Nzd8MHwxfHNlYXJjaHwxfHxob3RlbCUyMHJlY2VwdGlvbiUyMGRlc2t8ZW58MXx8fHwxNzYwMzcwODMxfDA&ixlib=rb-4.1.0&q=80&w=1080",
-        "turns": [
-            {"turn_index": 1, "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/grocery_store_1.mp4", "transcript": "Did you find everything ok today?"},
-            # {"turn_index": 2, "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/meeting/meeting_6.mp4", "transcript": "Can you tell me what time breakfast is served and if Wi-Fi is included?"},
-            # {"turn_index": 3, "video_url": "https://celia-audio-test-bucket.s3.us-east-2.amazonaws.com/videos/meeting/meeting_6.mp4", "transcript": "Thank you! Could I also get an extra key card, please?"}
-        ]
-    }
-}
+            for scenario_id, data in scenarios.items()
+        )
+        self.version = hashlib.sha256(
+            json.dumps(list(scenarios.items()), sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:16]
+        self.signature = signature
+        self.loaded_at = time.time()
+
+
+def _validate(data, path: str) -> dict:
+    def fail(msg):
+        raise ValueError(f"Invalid scenario file {path}: {msg}")
+
+    if not isinstance(data, dict):
+        fail("top level must be an object")
+    for field in ("title", "description"):
+        if not isinstance(data.get(field), str) or not data[field]:
+            fail(f"'{field}' must be a non-empty string")
+    turns = data.get("turns")
+    if not isinstance(turns, list) or not turns:
+        fail("'turns' must be a non-empty list")
+    seen = set()
+    for i, turn in enumerate(turns):
+        if not isinstance(turn, dict):
+            fail(f"turn #{i} must be an object")
+        turn_index = turn.get("turn_index")
+        if not isinstance(turn_index, int) or isinstance(turn_index, bool):
+            fail(f"turn #{i} 'turn_index' must be an integer")
+        if turn_index in seen:
+            fail(f"duplicate turn_index {turn_index}")
+        seen.add(turn_index)
+        for field in ("video_url", "transcript"):
+            if not isinstance(turn.get(field), str) or not turn[field]:
+                fail(f"turn {turn_index} '{field}' must be a non-empty string")
+        if turn.get("example_video_url") is not None and not isinstance(turn["example_video_url"], str):
+            fail(f"turn {turn_index} 'example_video_url' must be a string")
+        if not isinstance(turn.get("no_grade", False), bool):
+            fail(f"turn {turn_index} 'no_grade' must be true or false")
+        for field in ("no_grade_tip", "answer_tip"):
+            if turn.get(field) is not None and not isinstance(turn[field], str):
+                fail(f"turn {turn_index} '{field}' must be a string")
+        if turn.get("expected_answers") is not None:
+            answer_bank.validate_answers(turn["expected_answers"], lambda msg: fail(f"turn {turn_index} {msg}"))
+    data["turns"] = sorted(turns, key=lambda t: t["turn_index"])
+    return data
+
+
+def _scenario_files(directory: str) -> list[str]:
+    names = []
+    for name in os.listdir(directory):
+        ext = os.path.splitext(name)[1].lower()
+        if ext not in _EXTENSIONS:
+            continue
+        if ext != ".json" and yaml is None:
+            print(f"⚠️ Skipping {name}: install PyYAML to load YAML scenario files")
+            continue
+        names.append(os.path.join(directory, name))
+    return sorted(names)
+
+
+def _signature(paths: list[str]) -> tuple:
+    result = []
+    for path in paths:
+        st = os.stat(path)
+        result.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(result)
+
+
+def load_catalog(directory: str = SCENARIO_DIR) -> ScenarioCatalog:
+    """Read, validate and compile every scenario file in directory."""
+    paths = _scenario_files(directory)
+    signature = _signature(paths)
+    loaded = []
+    for path in paths:
+        scenario_id = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f) if path.endswith(".json") else yaml.safe_load(f)
+        data = _validate(data, path)
+        loaded.append((data.pop("order", None), scenario_id, data))
+    # Explicit "order" first (library display order), then by id
+    loaded.sort(key=lambda item: (item[0] is None, item[0] if item[0] is not None else 0, item[1]))
+    return ScenarioCatalog({scenario_id: data for _, scenario_id, data in loaded}, signature)
+
+
+_catalog = load_catalog()
+_catalog_lock = threading.Lock()
+_last_check = time.monotonic()
+
+
+def get_catalog() -> ScenarioCatalog:
+    """Return the current catalog, reloading it if scenario files changed since the last check."""
+    global _catalog, _last_check
+    now = time.monotonic()
+    if now - _last_check < SCENARIO_RELOAD_SEC:
+        return _catalog
+    with _catalog_lock:
+        if now - _last_check < SCENARIO_RELOAD_SEC:
+            return _catalog
+        _last_check = now
+        try:
+            if _signature(_scenario_files(SCENARIO_DIR)) != _catalog.signature:
+                catalog = load_catalog()
+                print(f"🔄 Reloaded scenario catalog: {len(catalog.scenarios)} scenarios (version {catalog.version})")
+                _catalog = catalog
+        except Exception as e:
+            print(f"⚠️ Scenario reload failed, keeping version {_catalog.version}: {e}")
+    return _catalog
+
+
+def get_turn_record(scenario_id: str, turn_index: int) -> TurnRecord | None:
+    """O(1) lookup of a compiled turn, or None if not found."""
+    return get_catalog().turns.get((scenario_id, turn_index))
 
 
 def get_turn_context(scenario_id: str, turn_index: int) -> dict:
@@ -252,76 +224,55 @@ def get_turn_context(scenario_id: str, turn_index: int) -> dict:
     Returns a dict with: scenario_title, scenario_description, and turn_transcript
     Returns None if scenario_id or turn_index not found.
     """
-    if scenario_id not in SCENARIOS:
+    record = get_turn_record(scenario_id, turn_index)
+    if record is None:
         return None
-    
-    scenario = SCENARIOS[scenario_id]
-    
-    # Find the turn with matching turn_index
-    for turn in scenario["turns"]:
-        if turn["turn_index"] == turn_index:
-            return {
-                "scenario_title": scenario["title"],
-                "scenario_description": scenario["description"],
-                "turn_transcript": turn["transcript"]
-            }
-    
-    return None
+    return {
+        "scenario_title": record.scenario_title,
+        "scenario_description": record.scenario_description,
+        "turn_transcript": record.transcript
+    }
+
+
+def get_answer_feedback(scenario_id: str, turn_index: int, transcript: str) -> dict | None:
+    """
+    Precomputed feedback from the turn's answer bank (no-grade turn or expected answer), or None.
+    Stamped with prompt_version "answer_bank@<catalog version>", since no system prompt produced it.
+    """
+    catalog = get_catalog()
+    return answer_bank.match(catalog.turns.get((scenario_id, turn_index)), transcript, catalog.version)
 
 
 def get_video_url(scenario_id: str, turn_index: int) -> str:
     """Returns the video URL for a given scenario and turn, or None if not found."""
-    if scenario_id not in SCENARIOS:
-        return None
-    
-    scenario = SCENARIOS[scenario_id]
-    
-    # Find the turn with matching turn_index
-    for turn in scenario["turns"]:
-        if turn["turn_index"] == turn_index:
-            return turn["video_url"]
-    
-    return None
+    record = get_turn_record(scenario_id, turn_index)
+    return record.video_url if record else None
 
 def get_example_video_url(scenario_id: str, turn_index: int) -> str | None:
     """Returns the example video URL for a given scenario and turn, or None if not found."""
-    if scenario_id not in SCENARIOS:
-        return None
-    
-    scenario = SCENARIOS[scenario_id]
-    
-    # Find the turn with matching turn_index
-    for turn in scenario["turns"]:
-        if turn["turn_index"] == turn_index:
-            return turn.get("example_video_url")  # Returns None if key doesn't exist
-    
-    return None
+    record = get_turn_record(scenario_id, turn_index)
+    return record.example_video_url if record else None
 
 def get_all_scenarios():
     """Get list of all scenarios for the library."""
-    return [
-        {
-            'id': scenario_id,
-            'title': data['title'],
-            'description': data['description'],
-            'difficulty': data.get('difficulty', 'Beginner'),  # default if not specified
-            'image_url': data.get('image_url', '')  # default empty if not specified
-        }
-        for scenario_id, data in SCENARIOS.items()
-    ]
+    return [dict(summary) for summary in get_catalog().summaries]
+
+def get_partner_lines(scenario_id: str, turn_index: int) -> tuple:
+    """
+    Token-capped partner lines of every turn before turn_index, oldest first. Works for turn
+    indexes the catalog does not have (e.g. a client ahead of a catalog edit).
+    """
+    catalog = get_catalog()
+    record = catalog.turns.get((scenario_id, turn_index))
+    if record is not None:
+        return record.partner_lines
+    return tuple(line for ti, line in catalog.partner_lines.get(scenario_id, ()) if ti < turn_index)
 
 def get_scenario_data(scenario_id):
-    """Get full scenario data by ID."""
-    return SCENARIOS.get(scenario_id)
+    """Get full scenario data by ID. Treat the returned dict as read-only."""
+    return get_catalog().scenarios.get(scenario_id)
 
 def get_turn_question(scenario_id, turn_index):
     """Get the turn question (transcript) for a specific turn in a scenario."""
-    scenario = SCENARIOS.get(scenario_id)
-    if not scenario or 'turns' not in scenario:
-        return None
-    
-    for turn in scenario['turns']:
-        if turn.get('turn_index') == turn_index:
-            return turn.get('transcript')
-    
-    return None
\ No newline at end of file
+    record = get_turn_record(scenario_id, turn_index)
+    return record.transcript if record else None
@@ -0,0 +1,207 @@
+"""
+Per-turn nearest-neighbour index of transcripts that already earned green feedback.
+
+The exact feedback cache misses paraphrases and Whisper variance ("Hi, nice to meet
+you" vs "Hi nice to meet you too"). Each (scenario, turn, prompt, model) bucket keeps
+hashed character 3-gram vectors of recent green answers in a NumPy matrix; a new
+transcript is compared against the whole bucket with one matrix-vector product, and
+feedback is reused when the best cosine similarity clears the threshold. Only green,
+on-topic feedback is indexed, so a reuse can never hand out a correction meant for
+someone else's mistake.
+
+Character n-grams barely notice a negation ("I'm ready" vs "I'm not ready", "yes I
+did" vs "no I didn't"), so neighbours are only eligible when both transcripts carry
+the same negation markers.
+
+A sampled fraction of reuses is shadow-verified: the caller generates real feedback
+in the background and reports it back. A non-green verdict evicts the neighbour that
+was reused. NumPy is optional; without it the index is disabled.
+"""
+import random
+import threading
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # similarity reuse is optional
+    np = None
+
+from feedback_cache import normalize_transcript
+from ttl_cache import TTLCache
+
+NGRAM = 3
+# Negation markers compared before reuse; any "n't" contraction counts as "not"
+_NEGATIONS = {
+    "not": "not", "cannot": "not", "no": "no", "nope": "no", "nah": "no", "never": "never",
+    "nothing": "nothing", "nobody": "nobody", "none": "none", "neither": "neither", "nor": "nor",
+}
+
+
+def ngram_vector(text: str, dim: int = 1024):
+    """L2-normalized hashed character 3-gram counts of the normalized transcript (None if too short)."""
+    padded = f" {normalize_transcript(text)} "
+    if len(padded) < NGRAM + 2:
+        return None
+    buckets = [zlib.crc32(padded[i:i + NGRAM].encode("utf-8")) % dim for i in range(len(padded) - NGRAM + 1)]
+    vector = np.bincount(buckets, minlength=dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def negation_markers(text: str) -> frozenset:
+    """Canonical negation words in the normalized transcript; two answers are only comparable if these match."""
+    markers = set()
+    for word in normalize_transcript(text).split():
+        if word.endswith("n't"):
+            markers.add("not")
+        elif word in _NEGATIONS:
+            markers.add(_NEGATIONS[word])
+    return frozenset(markers)
+
+
+def is_reusable(feedback: dict) -> bool:
+    return feedback.get("grade") == "green" and not feedback.get("off_topic") and feedback.get("safety", "ok") == "ok"
+
+
+class _TurnIndex:
+    __slots__ = ("vectors", "entries", "size")
+
+    def __init__(self, dim: int):
+        self.vectors = np.zeros((8, dim), dtype=np.float32)
+        self.entries = []  # (normalized transcript, feedback, negation markers), row-aligned with vectors
+        self.size = 0
+
+
+class SimilarityIndex:
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        max_per_turn: int = 200,
+        max_turns: int = 500,
+        ttl_sec: float = 86400.0,
+        shadow_rate: float = 0.05,
+        dim: int = 1024,
+    ):
+        if np is None:
+            raise RuntimeError("Similarity reuse requires numpy (pip install numpy)")
+        self.threshold = threshold
+        self.max_per_turn = max_per_turn
+        self.shadow_rate = shadow_rate
+        self.dim = dim
+        self._turns = TTLCache(maxsize=max_turns, ttl_sec=ttl_sec)
+        self._lock = threading.Lock()
+        self._lookups = 0
+        self._hits = 0
+        self._near_misses = 0
+        self._hit_score_total = 0.0
+        self._added = 0
+        self._shadow = {"sampled": 0, "agreed": 0, "disagreed": 0, "skipped": 0}
+
+    def add(self, bucket, transcript: str, feedback: dict) -> bool:
+        """Index freshly generated feedback if it is reusable. Oldest entries roll off past max_per_turn."""
+        if not is_reusable(feedback):
+            return False
+        vector = ngram_vector(transcript, self.dim)
+        if vector is None:
+            return False
+        normalized = normalize_transcript(transcript)
+        with self._lock:
+            index = self._turns.get(bucket)
+            if index is None:
+                index = _TurnIndex(self.dim)
+            if any(text == normalized for text, _, _ in index.entries):
+                return False
+            if index.size == self.max_per_turn:
+                index.vectors[:index.size - 1] = index.vectors[1:index.size].copy()
+                index.entries.pop(0)
+                index.size -= 1
+            elif index.size == len(index.vectors):
+                grown = np.zeros((min(len(index.vectors) * 2, self.max_per_turn), self.dim), dtype=np.float32)
+                grown[:index.size] = index.vectors[:index.size]
+                index.vectors = grown
+            index.vectors[index.size] = vector
+            index.entries.append((normalized, feedback, negation_markers(normalized)))
+            index.size += 1
+            self._added += 1
+            self._turns.set(bucket, index)
+        return True
+
+    def lookup(self, bucket, transcript: str) -> dict | None:
+        """
+        Best indexed neighbour at or above the threshold with the same negation markers:
+        {"feedback", "score", "matched", "shadow"}.
+        "shadow" is True when the caller should verify this reuse with a real generation.
+        """
+        vector = ngram_vector(transcript, self.dim)
+        markers = negation_markers(transcript)
+        with self._lock:
+            self._lookups += 1
+            index = self._turns.get(bucket)
+            if vector is None or index is None or index.size == 0:
+                return None
+            scores = index.vectors[:index.size] @ vector
+            mismatched = [row for row, (_, _, other) in enumerate(index.entries) if other != markers]
+            if mismatched:
+                scores[mismatched] = -1.0
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            if score < self.threshold:
+                if score >= self.threshold - 0.05:
+                    self._near_misses += 1
+                return None
+            self._hits += 1
+            self._hit_score_total += score
+            matched, feedback, _ = index.entries[best]
+        return {
+            "feedback": dict(feedback),
+            "score": round(score, 4),
+            "matched": matched,
+            "shadow": random.random() < self.shadow_rate,
+        }
+
+    def discard(self, bucket, matched: str):
+        """Drop one indexed transcript (its reuse failed shadow verification)."""
+        with self._lock:
+            index = self._turns.get(bucket)
+            if index is None:
+                return
+            for row, (text, _, _) in enumerate(index.entries):
+                if text == matched:
+                    index.vectors[row:index.size - 1] = index.vectors[row + 1:index.size].copy()
+                    index.entries.pop(row)
+                    index.size -= 1
+                    return
+
+    def record_shadow(self, bucket, match: dict, fresh: dict | None) -> bool | None:
+        """
+        Compare a reused match with freshly generated feedback for the same transcript.
+        None (generation skipped or failed) is only counted; a non-green verdict evicts the neighbour.
+        """
+        with self._lock:
+            if fresh is None:
+                self._shadow["skipped"] += 1
+                return None
+            self._shadow["sampled"] += 1
+            agreed = is_reusable(fresh)
+            self._shadow["agreed" if agreed else "disagreed"] += 1
+        if not agreed:
+            print(f"⚠️ Similar feedback reuse failed verification (score={match['score']}); evicting '{match['matched']}'")
+            self.discard(bucket, match["matched"])
+        return agreed
+
+    def stats(self) -> dict:
+        with self._lock:
+            shadow = dict(self._shadow)
+            checked = shadow["agreed"] + shadow["disagreed"]
+            shadow["agreement_rate"] = round(shadow["agreed"] / checked, 3) if checked else None
+            return {
+                "threshold": self.threshold,
+                "shadow_rate": self.shadow_rate,
+                "turns": len(self._turns),
+                "indexed": self._added,
+                "lookups": self._lookups,
+                "hits": self._hits,
+                "hit_ratio": round(self._hits / self._lookups, 3) if self._lookups else None,
+                "avg_hit_score": round(self._hit_score_total / self._hits, 4) if self._hits else None,
+                "near_misses": self._near_misses,
+                "shadow": shadow,
+            }
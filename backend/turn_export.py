@@ -0,0 +1,232 @@
+"""
+Streaming export of conversation_turns for offline evaluation.
+
+Rows come off a batched Mongo cursor and are written one at a time, so memory
+stays flat however many turns match. Columns use the same dotted names as the
+hand-maintained eval CSVs (turn_transcript, transcript, feedback.tip, ...), so an
+export can be fed straight to eval.py / regen_and_eval.py.
+
+  python turn_export.py --format csv --scenario campus_encounter --since 2025-11-01 -o turns.csv
+
+NDJSON and CSV are also served by GET /export/turns, without user_email (the eval
+scripts never read it, and the HTTP export is not behind a login). Parquet needs
+pyarrow and is CLI-only (the file footer is only written at the end).
+"""
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional, only needed for --format parquet
+    pa = None
+    pq = None
+
+FORMATS = ("ndjson", "csv", "parquet")
+GRADES = ("green", "yellow", "red")
+
+COLUMNS = [
+    "_id",
+    "user_id",
+    "user_email",
+    "scenario_id",
+    "scenario_title",
+    "scenario_description",
+    "turn_index",
+    "turn_transcript",
+    "audio_url",
+    "transcript",
+    "feedback.tip",
+    "feedback.rewrite",
+    "feedback.grade",
+    "feedback.raw_tip",
+    "feedback.context_relevance",
+    "feedback.off_topic",
+    "feedback.safety",
+    "feedback.missing_elements",
+    "feedback.highlight_tokens",
+    "feedback.prompt_version",
+    "feedback.answer_bank",
+    "context_window",
+    "created_at",
+]
+
+# GET /export/turns leaves out learner identity; the CLI export keeps every column
+HTTP_COLUMNS = [column for column in COLUMNS if column != "user_email"]
+
+# Fields stored as lists/dicts; serialized as JSON text so every format keeps flat columns
+_JSON_COLUMNS = {"feedback.missing_elements", "feedback.highlight_tokens", "context_window"}
+
+PROJECTION = {
+    "user_id": 1, "user_email": 1, "scenario_id": 1, "scenario_title": 1,
+    "scenario_description": 1, "turn_index": 1, "turn_transcript": 1,
+    "audio_url": 1, "transcript": 1, "feedback": 1, "context_window": 1, "created_at": 1,
+}
+HTTP_PROJECTION = {field: 1 for field in PROJECTION if field != "user_email"}
+
+
+def _parse_date(value: str) -> datetime:
+    """ISO date or datetime; naive values are taken as UTC."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def build_filter(scenario_id: str | None = None, since: str | None = None,
+                 until: str | None = None, grade: str | None = None) -> dict:
+    """Mongo filter for the export. since is inclusive, until exclusive. Raises ValueError on bad input."""
+    query = {}
+    if scenario_id:
+        query["scenario_id"] = scenario_id
+    created_at = {}
+    try:
+        if since:
+            created_at["$gte"] = _parse_date(since)
+        if until:
+            created_at["$lt"] = _parse_date(until)
+    except ValueError:
+        raise ValueError("since/until must be ISO dates, e.g. 2025-11-01 or 2025-11-01T12:00:00Z")
+    if created_at:
+        query["created_at"] = created_at
+    if grade:
+        grade = grade.lower()
+        if grade not in GRADES:
+            raise ValueError(f"grade must be one of {', '.join(GRADES)}")
+        query["feedback.grade"] = grade
+    return query
+
+
+def iter_turns(collection, query: dict, batch_size: int = 500, projection: dict = PROJECTION):
+    """Matching turns oldest first, pulled from the server batch_size documents at a time."""
+    cursor = (
+        collection.find(query, projection)
+        .sort([("created_at", 1), ("_id", 1)])
+        .batch_size(batch_size)
+    )
+    try:
+        yield from cursor
+    finally:
+        cursor.close()
+
+
+def flatten_turn(doc: dict, columns: list = COLUMNS) -> dict:
+    """One conversation_turns document -> one flat row keyed by columns."""
+    feedback = doc.get("feedback") or {}
+    row = {}
+    for column in columns:
+        if column.startswith("feedback."):
+            value = feedback.get(column.split(".", 1)[1])
+        else:
+            value = doc.get(column)
+        if column in _JSON_COLUMNS:
+            value = json.dumps(value, ensure_ascii=False) if value else None
+        elif column == "_id":
+            value = str(value)
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        row[column] = value
+    return row
+
+
+def iter_ndjson(docs, columns: list = COLUMNS):
+    for doc in docs:
+        yield json.dumps(flatten_turn(doc, columns), ensure_ascii=False) + "\n"
+
+
+def iter_csv(docs, columns: list = COLUMNS):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    for doc in docs:
+        writer.writerow(flatten_turn(doc, columns))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _parquet_schema():
+    types = {"turn_index": pa.int64(), "feedback.context_relevance": pa.float64(), "feedback.off_topic": pa.bool_()}
+    return pa.schema([(column, types.get(column, pa.string())) for column in COLUMNS])
+
+
+def write_parquet(docs, path: str, row_group_size: int = 5000) -> int:
+    """Write docs to a Parquet file one row group at a time. Returns the row count."""
+    if pq is None:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+    schema = _parquet_schema()
+    count = 0
+    rows = []
+    with pq.ParquetWriter(path, schema) as writer:
+        for doc in docs:
+            rows.append(flatten_turn(doc))
+            if len(rows) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                count += len(rows)
+                rows = []
+        if rows or not count:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            count += len(rows)
+    return count
+
+
+def export_turns(collection, out, fmt: str, query: dict, batch_size: int = 500) -> int:
+    """Write matching turns to out (a path for parquet, a text file object otherwise). Returns the row count."""
+    docs = iter_turns(collection, query, batch_size)
+    if fmt == "parquet":
+        return write_parquet(docs, out)
+    count = 0
+
+    def _counted():
+        nonlocal count
+        for doc in docs:
+            count += 1
+            yield doc
+
+    for chunk in (iter_csv if fmt == "csv" else iter_ndjson)(_counted()):
+        out.write(chunk)
+    return count
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    parser = argparse.ArgumentParser(description="Export BeSpoken conversation turns for offline evaluation.")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("-o", "--out", help="output file (default: stdout; required for parquet)")
+    parser.add_argument("--scenario", help="only this scenario_id")
+    parser.add_argument("--since", help="created_at >= this ISO date/datetime")
+    parser.add_argument("--until", help="created_at < this ISO date/datetime")
+    parser.add_argument("--grade", choices=GRADES, help="only turns with this feedback.grade")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.format == "parquet" and not args.out:
+        parser.error("--out is required for parquet")
+    try:
+        query = build_filter(args.scenario, args.since, args.until, args.grade)
+    except ValueError as e:
+        parser.error(str(e))
+
+    load_dotenv(os.path.join(os.path.dirname(__file__), ".env"), override=True)
+    client = MongoClient(os.getenv("MONGODB_URI"), serverSelectionTimeoutMS=30000, tls=True)
+    collection = client[os.getenv("DB_NAME", "Cluster0")].conversation_turns
+
+    print(f"📤 Exporting conversation_turns {query or '(all)'} as {args.format}...", file=sys.stderr)
+    if args.format == "parquet" or not args.out:
+        rows = export_turns(collection, args.out or sys.stdout, args.format, query, args.batch_size)
+    else:
+        # utf-8-sig matches how the eval scripts read their CSVs
+        encoding = "utf-8-sig" if args.format == "csv" else "utf-8"
+        with open(args.out, "w", encoding=encoding, newline="") as f:
+            rows = export_turns(collection, f, args.format, query, args.batch_size)
+    print(f"✅ Exported {rows} turns{f' to {args.out}' if args.out else ''}", file=sys.stderr)
@@ -0,0 +1,208 @@
+"""
+Write-behind persistence for conversation turns.
+
+save_turn() hands documents to a TurnWriter instead of calling insert_one on the
+request path. A single background thread flushes them with insert_many in
+micro-batches (by size or time), retries transient Mongo errors and drains the
+queue on shutdown. Documents carry a client-generated _id, so retries are
+idempotent and the turn_id can be returned before the write lands.
+"""
+import atexit
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError
+
+DUPLICATE_KEY = 11000
+
+
+def _is_transient(e: Exception) -> bool:
+    if isinstance(e, ConnectionFailure):
+        return True
+    return isinstance(e, PyMongoError) and e.has_error_label("RetryableWriteError")
+
+
+class TurnWriter:
+    def __init__(
+        self,
+        collection,
+        batch_size: int = 50,
+        flush_interval_sec: float = 0.5,
+        max_queue: int = 10000,
+        max_retries: int = 5,
+        max_failed_tracked: int = 1000,
+        on_saved=None,
+    ):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval_sec = flush_interval_sec
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.max_failed_tracked = max_failed_tracked
+        self.on_saved = on_saved  # callable(list of docs) run on the writer thread after each flush
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._failed = OrderedDict()
+        self._stop = threading.Event()
+        self._thread = None
+        self._exit_hook = False
+        self._written = 0
+        self._failed_count = 0
+        self._batches = 0
+        self._retries = 0
+        self._sync_fallbacks = 0
+        self._last_flush_ms = None
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="turn-writer", daemon=True)
+            self._thread.start()
+            # Restarting after close() must not stack another drain at exit
+            if not self._exit_hook:
+                atexit.register(self.close)
+                self._exit_hook = True
+
+    def enqueue(self, doc: dict) -> str:
+        """Queue a document (which must already have an _id) and return its id as a string."""
+        turn_id = str(doc["_id"])
+        if not self._thread or not self._thread.is_alive():
+            self.start()
+        with self._lock:
+            self._pending.add(turn_id)
+        try:
+            self._queue.put_nowait(doc)
+        except queue.Full:
+            # Backpressure: never drop a turn, pay the write latency on this request instead
+            print(f"⚠️ Turn write queue full ({self.max_queue}); writing {turn_id} synchronously")
+            with self._lock:
+                self._sync_fallbacks += 1
+            self._write_batch([doc])
+        return turn_id
+
+    def status(self, turn_id: str) -> dict | None:
+        """Return {"status": "pending"} / {"status": "failed", "error": ...} for tracked ids, else None."""
+        with self._lock:
+            if turn_id in self._pending:
+                return {"status": "pending"}
+            if turn_id in self._failed:
+                return {"status": "failed", "error": self._failed[turn_id]}
+        return None
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval_sec)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval_sec
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write_batch(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write_batch(self, batch: list):
+        _t = time.perf_counter()
+        remaining = batch
+        saved = []
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.collection.insert_many(remaining, ordered=False)
+                self._mark_saved(remaining)
+                saved = remaining
+                remaining = []
+                break
+            except BulkWriteError as e:
+                # Duplicates mean an earlier attempt already landed that document
+                errors = {err["index"]: err for err in e.details.get("writeErrors", [])}
+                hard = {i: err for i, err in errors.items() if err.get("code") != DUPLICATE_KEY}
+                saved = [doc for i, doc in enumerate(remaining) if i not in hard]
+                self._mark_saved(saved)
+                for i, err in hard.items():
+                    self._mark_failed(remaining[i], err.get("errmsg", "write error"))
+                remaining = []
+                break
+            except Exception as e:
+                if _is_transient(e) and attempt < self.max_retries:
+                    with self._lock:
+                        self._retries += 1
+                    delay = min(0.2 * (2 ** attempt), 5.0)
+                    print(f"⚠️ Transient MongoDB error writing {len(remaining)} turns (attempt {attempt + 1}): {e}; retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    continue
+                print(f"❌ MongoDB insert_many failed for {len(remaining)} turns: {e}")
+                for doc in remaining:
+                    self._mark_failed(doc, str(e))
+                remaining = []
+                break
+        with self._lock:
+            self._batches += 1
+            self._last_flush_ms = int((time.perf_counter() - _t) * 1000)
+        if saved and self.on_saved:
+            try:
+                self.on_saved(saved)
+            except Exception as e:
+                print(f"⚠️ Turn writer on_saved hook failed for {len(saved)} turns: {e}")
+
+    def _mark_saved(self, docs: list):
+        with self._lock:
+            for doc in docs:
+                self._pending.discard(str(doc["_id"]))
+            self._written += len(docs)
+
+    def _mark_failed(self, doc: dict, error: str):
+        turn_id = str(doc["_id"])
+        with self._lock:
+            self._pending.discard(turn_id)
+            self._failed[turn_id] = error
+            while len(self._failed) > self.max_failed_tracked:
+                self._failed.popitem(last=False)
+            self._failed_count += 1
+
+    def flush(self, timeout_sec: float = 10.0) -> bool:
+        """Block until everything queued so far has been written (or timeout). Returns True if drained."""
+        deadline = time.monotonic() + timeout_sec
+        while time.monotonic() < deadline:
+            if self._queue.unfinished_tasks == 0:
+                return True
+            time.sleep(0.05)
+        return self._queue.unfinished_tasks == 0
+
+    def close(self, timeout_sec: float = 10.0):
+        """Drain the queue and stop the writer thread."""
+        if not self._thread:
+            return
+        drained = self.flush(timeout_sec)
+        self._stop.set()
+        self._thread.join(timeout=self.flush_interval_sec * 2)
+        if not drained:
+            print(f"⚠️ Turn writer stopped with {self._queue.qsize()} turns still queued")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_max": self.max_queue,
+                "pending": len(self._pending),
+                "written": self._written,
+                "failed": self._failed_count,
+                "batches": self._batches,
+                "retries": self._retries,
+                "sync_fallbacks": self._sync_fallbacks,
+                "last_flush_ms": self._last_flush_ms,
+            }
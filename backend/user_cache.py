@@ -0,0 +1,51 @@
+"""
+Bounded TTL cache of user profiles (email/name) used to enrich saved turns.
+
+google_signin() primes it, so a learner's uploads normally never touch db.users.
+Concurrent misses for the same user share one find_one via SingleFlight, and
+unknown users are cached briefly as a negative entry.
+"""
+from bson import ObjectId
+
+from singleflight import SingleFlight
+from ttl_cache import TTLCache
+
+_NOT_FOUND = {}
+
+
+class UserProfileCache:
+    def __init__(self, users_collection, maxsize: int = 10000, ttl_sec: float = 3600.0, negative_ttl_sec: float = 60.0):
+        self.users = users_collection
+        self.negative_ttl_sec = negative_ttl_sec
+        self._cache = TTLCache(maxsize=maxsize, ttl_sec=ttl_sec)
+        self._flight = SingleFlight()
+
+    def put(self, user_id: str, email: str | None, name: str | None = None):
+        self._cache.set(user_id, {"email": email, "name": name})
+
+    def _load(self, user_id: str) -> dict:
+        doc = self.users.find_one({"_id": ObjectId(user_id)}, {"email": 1, "name": 1})
+        if not doc:
+            self._cache.set(user_id, _NOT_FOUND, ttl_sec=self.negative_ttl_sec)
+            return _NOT_FOUND
+        profile = {"email": doc.get("email"), "name": doc.get("name")}
+        self._cache.set(user_id, profile)
+        return profile
+
+    def get(self, user_id: str) -> dict | None:
+        """Return {"email", "name"} for user_id, or None if the id is invalid or unknown."""
+        if not user_id or not ObjectId.is_valid(user_id):
+            return None
+        profile = self._cache.get(user_id)
+        if profile is None:
+            profile = self._flight.do(user_id, lambda: self._load(user_id))
+        return profile or None
+
+    def get_email(self, user_id: str) -> str | None:
+        profile = self.get(user_id)
+        return profile.get("email") if profile else None
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        stats["loads"] = self._flight.stats()
+        return stats